@@ -3,15 +3,41 @@ AI Features Module - 20+ Legal AI Features using Groq
 Provides comprehensive legal assistance features for Indian law
 """
 
-import httpx
-import json
-from typing import Dict, Any, List, Optional
-from pydantic import BaseModel
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from types import MappingProxyType
+import aiohttp
+from typing import Dict, Any, List, Optional, AsyncIterator, Set, Tuple
+import msgspec
+from fastapi import HTTPException
+from fastapi.responses import Response, StreamingResponse
 
 # Groq API Configuration
-from groq_client import GroqClient
+from groq_client import (
+    RETRYABLE_STATUSES, GroqClient, backoff_delay, breaker, close_session, get_session, request_timeout
+)
+from log_utils import get_logger
+from micro_batcher import MicroBatcher
+
+logger = get_logger("AIFeatures")
 groq = GroqClient()
-DEFAULT_MODEL = "llama-3.3-70b-versatile"
+DEFAULT_MODEL = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
+FAST_MODEL = os.getenv("GROQ_FAST_MODEL", "llama-3.1-8b-instant")
+
+# Output ceilings (tokens); features override where shorter answers suffice
+DEFAULT_MAX_TOKENS = 2000
+
+# Upper bound on concurrent LLM calls fanned out by one feature request
+MAX_PARALLEL = int(os.getenv("GROQ_MAX_PARALLEL", "4"))
+
+# Model tiers: shallow features run on the small model, reasoning-heavy ones on the large one
+MODEL_TIERS = {
+    "fast": FAST_MODEL,
+    "deep": DEFAULT_MODEL
+}
 
 # Government Portal Links
 GOVT_PORTALS = {
@@ -31,100 +57,735 @@ GOVT_PORTALS = {
     "labour": "https://labour.gov.in"
 }
 
-# Pydantic Models
-class AIFeatureRequest(BaseModel):
+# Portal subsets per category, resolved once at import
+PORTAL_CATEGORIES = {
+    "legal": ["indian_kanoon", "ecourts", "nalsa"],
+    "consumer": ["consumer_helpline"],
+    "cyber": ["cybercrime"],
+    "rti": ["rti"],
+    "tax": ["income_tax", "gst"],
+    "corporate": ["mca"],
+    "labour": ["labour"],
+    "all": list(GOVT_PORTALS.keys())
+}
+
+CATEGORY_PORTALS = {
+    category: MappingProxyType({key: GOVT_PORTALS[key] for key in keys if key in GOVT_PORTALS})
+    for category, keys in PORTAL_CATEGORIES.items()
+}
+
+# Request Models (msgspec Structs)
+class AIFeatureRequest(msgspec.Struct):
     query: str
     context: Optional[str] = None
     language: str = "en"
 
-class CasePredictionRequest(BaseModel):
+class CasePredictionRequest(msgspec.Struct):
     case_facts: str
     case_type: str  # civil, criminal, family, property, etc.
     jurisdiction: str = "India"
 
-class BailCheckRequest(BaseModel):
+class BailCheckRequest(msgspec.Struct):
     offense: str
     section: str
     accused_details: Optional[str] = None
 
-class FIRRequest(BaseModel):
+class FIRRequest(msgspec.Struct):
     incident_description: str
     incident_date: str
     incident_location: str
     complainant_name: str
     accused_details: Optional[str] = None
 
-class LegalTranslationRequest(BaseModel):
+class LegalTranslationRequest(msgspec.Struct):
     text: str
     source_lang: str = "en"
     target_lang: str = "hi"
 
-class ConsumerComplaintRequest(BaseModel):
+class ConsumerComplaintRequest(msgspec.Struct):
     product_service: str
     issue_description: str
     company_name: str
     purchase_date: str
     amount_involved: float
 
-class CyberComplaintRequest(BaseModel):
+class CyberComplaintRequest(msgspec.Struct):
     incident_type: str  # fraud, hacking, harassment, etc.
     incident_description: str
     evidence_details: Optional[str] = None
 
-class PropertyVerifyRequest(BaseModel):
+class PropertyVerifyRequest(msgspec.Struct):
     document_type: str  # sale deed, title deed, agreement, etc.
     document_text: str
     property_location: str
 
-class LaborAdviceRequest(BaseModel):
+class LaborAdviceRequest(msgspec.Struct):
     issue_type: str  # salary, termination, harassment, leave, etc.
     employment_type: str  # permanent, contract, casual
     issue_description: str
 
 
-async def call_groq(prompt: str, model: str = DEFAULT_MODEL, system_prompt: str = None) -> str:
-    """Make a call to Groq API using GroqClient"""
+# Per-request timeout for feature calls on the shared session
+FEATURE_TIMEOUT = request_timeout(180)
+
+
+async def get_client() -> aiohttp.ClientSession:
+    """Return the process-wide Groq ClientSession (shared with RAGEngine)"""
+    return get_session()
+
+
+async def close_client() -> None:
+    """Stop the batcher and close the shared ClientSession"""
+    await batcher.stop()
+    await close_session()
+
+
+def _build_payload(model: str, system_prompt: str, prompt: str, max_tokens: int = DEFAULT_MAX_TOKENS, stream: bool = False) -> Dict[str, Any]:
+    """Build the chat completion request body"""
+    return {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt}
+        ],
+        "temperature": 0.5,
+        "max_tokens": max_tokens,
+        "stream": stream
+    }
+
+
+class GroqError(Exception):
+    """Base error for failed Groq completions"""
+
+
+class GroqUnavailable(GroqError):
+    """Groq could not be reached (missing key, connection failure, timeout)"""
+
+
+class GroqHTTPError(GroqError):
+    """Groq answered with an HTTP error status"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"Groq HTTP {status}: {message}")
+        self.status = status
+
+
+# Feature calls are user-facing one-shots, so they get one more attempt than GroqClient's
+# RETRY_ATTEMPTS; backoff is the shared full-jitter curve
+FEATURE_RETRY_ATTEMPTS = 3
+
+
+def _completion_content(body: bytes) -> str:
+    """Answer text from a chat completion body; raises GroqUnavailable if it is malformed"""
     try:
-        # Note: GroqClient is synchronous in its current implementation, 
-        # but we wrap it for consistency in the async features module.
-        content = groq.generate_legal_content(prompt, system_prompt or "You are a professional Indian Legal Assistant.")
-        return content
-    except Exception as e:
-        return f"Error connecting to Groq: {str(e)}"
+        content = msgspec.json.decode(body)["choices"][0]["message"]["content"]
+    except (msgspec.DecodeError, KeyError, IndexError, TypeError) as e:
+        raise GroqUnavailable(f"Malformed Groq response: {e!r}") from e
+    if not isinstance(content, str):
+        raise GroqUnavailable("Malformed Groq response: no message content")
+    return content
+
+
+async def _post_groq(model: str, system_prompt: str, prompt: str, max_tokens: int = DEFAULT_MAX_TOKENS) -> str:
+    """Send a single chat completion request to Groq and return the content"""
+    if not groq.api_key:
+        raise GroqUnavailable("Groq API Key not found in environment or constructor.")
+
+    # Shares the breaker with GroqClient: while Groq is down, fail fast instead of retrying
+    if breaker.is_open():
+        raise GroqUnavailable("Groq unavailable after repeated failures; retrying after cooldown")
+
+    session = await get_client()
+    error: GroqError = GroqUnavailable("No attempt made")
+    for attempt in range(FEATURE_RETRY_ATTEMPTS):
+        try:
+            async with session.post(
+                groq.base_url,
+                headers={"Authorization": f"Bearer {groq.api_key}", "Content-Type": "application/json"},
+                data=msgspec.json.encode(_build_payload(model, system_prompt, prompt, max_tokens)),
+                timeout=FEATURE_TIMEOUT
+            ) as response:
+                if response.status >= 400:
+                    error = GroqHTTPError(response.status, (await response.read()).decode("utf-8", "replace"))
+                    if error.status not in RETRYABLE_STATUSES:
+                        raise error
+                else:
+                    # Only a usable body counts as success; a garbled 2xx is retried like a 5xx
+                    try:
+                        content = _completion_content(await response.read())
+                    except GroqUnavailable as e:
+                        error = e
+                    else:
+                        breaker.record_success()
+                        return content
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            error = GroqUnavailable(f"Error connecting to Groq: {e}")
+
+        breaker.record_failure()
+        if attempt < FEATURE_RETRY_ATTEMPTS - 1 and not breaker.is_open():
+            await asyncio.sleep(backoff_delay(attempt))
+
+    raise error
+
+
+async def _open_stream(model: str, system_prompt: str, prompt: str, max_tokens: int) -> aiohttp.ClientResponse:
+    """Start a streaming completion; raises GroqError if Groq can't be reached or answers with an error status"""
+    if not groq.api_key:
+        raise GroqUnavailable("Groq API Key not found in environment or constructor.")
+    if breaker.is_open():
+        raise GroqUnavailable("Groq unavailable after repeated failures; retrying after cooldown")
+
+    session = await get_client()
+    try:
+        response = await session.post(
+            groq.base_url,
+            headers={"Authorization": f"Bearer {groq.api_key}", "Content-Type": "application/json"},
+            data=msgspec.json.encode(_build_payload(model, system_prompt, prompt, max_tokens, stream=True)),
+            timeout=FEATURE_TIMEOUT
+        )
+    except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+        breaker.record_failure()
+        raise GroqUnavailable(f"Error connecting to Groq: {e}") from e
+
+    if response.status >= 400:
+        error = GroqHTTPError(response.status, (await response.read()).decode("utf-8", "replace"))
+        response.release()
+        if error.status in RETRYABLE_STATUSES:
+            breaker.record_failure()
+        raise error
+
+    breaker.record_success()
+    return response
+
+
+async def _stream_deltas(response: aiohttp.ClientResponse) -> AsyncIterator[str]:
+    """Yield content deltas from an open streaming response, raising GroqError if it breaks off"""
+    async with response:
+        try:
+            async for raw_line in response.content:
+                # Server-sent events: "data: {...}" lines, terminated by "data: [DONE]".
+                # Kept as bytes: msgspec parses them directly, no str decode per chunk
+                line = raw_line.strip()
+                if not line.startswith(b"data: "):
+                    continue
+                data = line[6:]
+                if data == b"[DONE]":
+                    break
+                delta = msgspec.json.decode(data)["choices"][0].get("delta", {}).get("content")
+                if delta:
+                    yield delta
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise GroqUnavailable(f"Groq stream interrupted: {e}") from e
+        except (msgspec.DecodeError, KeyError, IndexError, TypeError, AttributeError) as e:
+            raise GroqUnavailable(f"Malformed Groq stream chunk: {e!r}") from e
+
+
+async def stream_groq(prompt: str, model: str = None, system_prompt: str = None, tier: str = "deep", max_tokens: int = DEFAULT_MAX_TOKENS) -> AsyncIterator[str]:
+    """
+    Open a Groq completion stream and return an iterator of its content deltas.
+    Connection, key and status failures raise a 503 here, before any response
+    has started; a stream that breaks off midway raises GroqError.
+    """
+    try:
+        response = await _open_stream(
+            model or MODEL_TIERS.get(tier, DEFAULT_MODEL),
+            system_prompt or "You are a professional Indian Legal Assistant.",
+            prompt,
+            max_tokens
+        )
+    except GroqError as e:
+        logger.warning("Groq Error: %s", e)
+        raise HTTPException(status_code=503, detail="Service temporarily unavailable") from e
+    return _stream_deltas(response)
+
+
+class GroqBatcher(MicroBatcher):
+    """
+    Coalesces feature calls that arrive within a short window into one batch.
+    Identical requests in a batch share a single upstream call; the rest are
+    dispatched concurrently over the shared connection pool.
+    """
+
+    def __init__(self, max_batch_size: int = 8, max_latency: float = 0.05):
+        super().__init__(max_batch_size, max_latency)
+        # Running dispatches; the loop only holds tasks weakly
+        self._dispatches: Set[asyncio.Task] = set()
+
+    async def submit(self, prompt: str, model: str, system_prompt: str, max_tokens: int = DEFAULT_MAX_TOKENS) -> str:
+        """Queue a request and wait for its result"""
+        return await self._submit((model, system_prompt, prompt, max_tokens))
+
+    async def stop(self) -> None:
+        """Cancel the background worker and any dispatches still running"""
+        await super().stop()
+        for task in self._dispatches:
+            task.cancel()
+        self._dispatches.clear()
+
+    async def _flush(self, batch: List[Tuple[tuple, asyncio.Future]]) -> None:
+        grouped: Dict[tuple, List[asyncio.Future]] = {}
+        for key, future in batch:
+            grouped.setdefault(key, []).append(future)
+
+        # Dispatch without blocking collection of the next batch
+        task = asyncio.create_task(self._dispatch(grouped))
+        self._dispatches.add(task)
+        task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, grouped: Dict[tuple, List[asyncio.Future]]) -> None:
+        keys = list(grouped)
+        try:
+            results = await asyncio.gather(*(_post_groq(*key) for key in keys), return_exceptions=True)
+        except asyncio.CancelledError:
+            # Cancelled by stop(): release the waiters rather than leave them pending
+            for futures in grouped.values():
+                for future in futures:
+                    future.cancel()
+            raise
+
+        for key, result in zip(keys, results):
+            for future in grouped[key]:
+                if future.done():
+                    continue
+                if isinstance(result, BaseException):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+
+batcher = GroqBatcher()
+
+
+# Response cache: LRU of prompt hash -> (expires_at, content)
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600"))
+_RESPONSE_CACHE: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+
+def _cache_key(model: str, system_prompt: str, prompt: str, max_tokens: int) -> str:
+    """Hash the full request so repeated feature inputs hit the cache"""
+    return hashlib.blake2b(f"{model}\x00{max_tokens}\x00{system_prompt}\x00{prompt}".encode("utf-8"), digest_size=16).hexdigest()
+
+
+async def call_groq(prompt: str, model: str = None, system_prompt: str = None, tier: str = "deep", max_tokens: int = DEFAULT_MAX_TOKENS) -> str:
+    """Make a call to Groq API through the shared batcher, with a TTL response cache"""
+    model = model or MODEL_TIERS.get(tier, DEFAULT_MODEL)
+    system_prompt = system_prompt or "You are a professional Indian Legal Assistant."
+
+    key = _cache_key(model, system_prompt, prompt, max_tokens)
+    cached = _RESPONSE_CACHE.get(key)
+    if cached is not None:
+        if cached[0] > time.monotonic():
+            _RESPONSE_CACHE.move_to_end(key)
+            return cached[1]
+        del _RESPONSE_CACHE[key]
+
+    try:
+        content = await batcher.submit(prompt, model, system_prompt, max_tokens)
+    except GroqError as e:
+        logger.warning("Groq Error: %s", e)
+        raise HTTPException(status_code=503, detail="Service temporarily unavailable") from e
+
+    _RESPONSE_CACHE[key] = (time.monotonic() + RESPONSE_CACHE_TTL, content)
+    _RESPONSE_CACHE.move_to_end(key)
+    if len(_RESPONSE_CACHE) > RESPONSE_CACHE_SIZE:
+        _RESPONSE_CACHE.popitem(last=False)
+    return content
+
+
+def _compact(text: str) -> str:
+    """Collapse newlines and indentation so prompts carry no wasted whitespace tokens"""
+    return " ".join(text.split())
+
+
+# System prompts per feature, compacted once at import
+SYSTEM_PROMPTS = {fid: _compact(text) for fid, text in {
+    "case_predictor": """You are a Senior Advocate and Judicial Analyst at the Supreme Court of India.
+CRITICAL RULE: You MUST use the Bharatiya Nyaya Sanhita (BNS) for criminal offenses.
+Do NOT use IPC sections as primary references.
+Analyze the case facts provided and predict the likely outcome by considering:
+1. Statutory provisions (BNS/BSA/BNSS) exclusively. Mention the equivalent legacy IPC/CrPC sections ONLY for historical mapping.
+2. Ratio Decidendi of recent Apex Court precedents.
+3. Constitutional safeguards (Part III) and procedural fairness.
+Provide a balanced, objective jurisdictional analysis with confidence scores.""",
+    "risk_analyzer": """You are an expert Corporate Counsel specializing in Indian Business Law (Indian Contract Act 1872, Companies Act 2013).
+CRITICAL: Analyze the document with respect to the CURRENT Indian legal landscape (2024-2025).
+Identify risks under the Indian Contract Act, Consumer Protection Act 2019,
+Digital Personal Data Protection (DPDP) Act 2023, and Stamp Duty laws.
+Provide realistic, actionable insights for real-life scenario situations.""",
+    "bail_checker": """You are a Senior Criminal Law Expert.
+CRITICAL: The Bharatiya Nagarik Suraksha Sanhita (BNSS), Bharatiya Nyaya Sanhita (BNS), and Bharatiya Sakshya Adhiniyam (BSA) ARE THE CURRENT LAWS OF INDIA as of July 1, 2024.
+Analyze bail eligibility under the BNSS (formerly CrPC). Consider Section 436-455 BNSS grounds,
+Constitutional safeguards under Article 21 (Personal Liberty), and jurisdictional bail benchmarks
+set by the Supreme Court in recent landmark judgments.""",
+    "fir_generator": """You are an expert in drafting FIRs and Complaints under the Bharatiya Nagarik Suraksha Sanhita (BNSS).
+CRITICAL: The BNSS and BNS are the CURRENT AND ACTIVE laws of India (effective July 1, 2024).
+Ensure the draft is legally sound for Indian Police Stations, correctly mapping incidents to BNS sections
+and ensuring all jurisdictional and evidentiary basics required by Section 173 BNSS are covered.""",
+    "translator": """You are a Senior Legal Translator specializing in Indian Judicial English and Hindi.
+Maintain absolute statutory accuracy, especially for terms in the Constitution of India and
+Bharatiya Nyaya Sanhita. Ensure the translation adheres to the legal register of District/High Courts.""",
+    "judgment_simplifier": """You are a Legal Rapporteur and Court Clerking expert.
+Simplify complex Indian judgments by clearly extracting the 'Ratio Decidendi' (Reason for Decision)
+and 'Obiter Dicta' in plain language while maintaining citations and judicial rigor.""",
+    "section_finder": """You are a Legal Statutory Specialist. Find specific sections in the
+Bharatiya Nyaya Sanhita (BNS) [Replacement for IPC] and Bharatiya Nagarik Suraksha Sanhita (BNSS) [formerly CrPC].
+Always provide the BNS-to-IPC mapping for historical reference and statutory continuity.""",
+    "cost_estimator": """You are a Legal Auditor. Provide cost estimates for litigation in India
+considering Advocate Fee Rules of various High Courts, the Court Fees Act 1870,
+and standard Bar Council of India benchmarks for civil, criminal, and corporate matters.""",
+    "precedent_matcher": """You are a Senior Legal Researcher specializing in the Apex Court and High Courts of India.
+Find precedents focusing on landmark judgments that set 'Stare Decisis' for the legal issue provided.
+Identify key 'Ingredients of the Offense' or 'Points for Determination' from relevant case laws.""",
+    "consumer_complaint": """You are an expert in the Consumer Protection Act, 2019.
+Draft detailed Consumer Complaints for the District/State Commission, highlighting 'Deficiency of Service',
+'Unfair Trade Practice', and ensuring compliance with Section 35 of the Act.""",
+    "rti_generator": """You are a Senior RTI Consultant. Draft RTI Applications under
+Section 6(1) of the Right to Information Act, 2005. Frame questions to avoid Section 8 exemptions
+and ensure the application is addressed properly to the Central/State Public Information Officer.""",
+    "cyber_complaint": """You are a Cyber Law Expert specializing in the IT Act, 2000, and the Digital Personal Data Protection Act (DPDP) 2023.
+Analyze cyber crimes and draft complaints for the National Cyber Crime Reporting Portal (NCRP),
+citing specific sections like 66A, 66E, or 67A as applicable.""",
+    "property_verifier": """You are a Real Estate Attorney and Property Auditor.
+Analyze documents like Sale Deeds, Allotment Letters, and Khata extracts under the
+Registration Act 1908, RERA 2016, and the Transfer of Property Act 1882.""",
+    "marriage_guide": """You are a Family Law Attorney specialized in the Hindu Marriage Act, 1955,
+the Special Marriage Act, 1954, and Muslim Personal Law procedures. Guide users through
+civil and religious registration requirements in various Indian states.""",
+    "divorce_guide": """You are a Senior Family Law Counsel. Provide guidance on divorce proceedings
+under HMA, SMA, and other Personal Laws. Focus on Section 13/13B (Mutual Consent) grounds,
+Interim Maintenance (Section 24), and Child Custody guidelines set by the Supreme Court.""",
+    "labor_advisor": """You are an Industrial Relations and Labor Law Authority.
+Analyze issues under the new Labor Codes (2020), the Industrial Disputes Act,
+and state-specific Shops & Establishments Acts. Advise on statutory compliance and worker rights.""",
+    "news_summarizer": """You are a Legal Correspondent and Legislative Analyst.
+Analyze Indian legal developments and statutory shifts to explain their practical impact
+on citizens with constitutional and jurisprudential context.""",
+    "court_scheduler": """You are a Court Administrative Specialist. Explain court procedures,
+filing formalities, and hearing protocols (High Courts, District Courts, NCLT, DRT)
+in line with the latest judicial notifications and the BNSS guidelines.""",
+    "jargon_explainer": """You are a Legal Educator specializing in Jurisprudence.
+Explain Indian legal maxims and terms (like Res Judicata, Caveat Emptor, Writ)
+in both English and the official Hindi 'Vidhi' terminology.""",
+    "multi_doc_analyzer": """You are a Lead Legal Auditor and Analysis Specialist.
+Compare multiple Indian legal documents for cross-statutory consistency,
+conflict with BNS/BNSS, or violation of constitutional basic structures.""",
+    "multi_doc_summary": """You are a Legal Analyst. Summarize the Indian legal document provided,
+preserving parties, obligations, statutory references, dates and amounts. Do not add commentary."""
+}.items()}
+
+
+# User prompt templates per feature (keyed by AI_FEATURES_DIRECTORY id), built once at import
+PROMPT_TEMPLATES = {
+    "case_predictor": """
+Case Type: {case_type}
+Jurisdiction: {jurisdiction}
+
+Case Facts:
+{case_facts}
+
+Please provide:
+1. Predicted Outcome (Favorable/Unfavorable/Uncertain)
+2. Confidence Level (percentage)
+3. Key Factors Affecting Outcome
+4. Relevant Precedents/Case Laws
+5. Recommended Legal Strategy
+6. Risk Assessment
+""",
+    "risk_analyzer": """
+Document Type: {document_type}
+
+Document Content:
+{document_text}
+
+Analyze for:
+1. High-Risk Clauses (with severity rating 1-10)
+2. Missing Essential Clauses
+3. Compliance Issues
+4. Unfair Terms (under Consumer Protection Act)
+5. Stamp Duty & Registration Requirements
+6. Recommendations for Improvement
+""",
+    "bail_checker": """
+Offense: {offense}
+Section: {section}
+Accused Details: {accused_details}
+
+Determine:
+1. Is the offense bailable or non-bailable?
+2. Bail provisions under BNSS (Bharatiya Nagarik Suraksha Sanhita)
+3. Conditions for bail grant
+4. Likely bail amount (if bailable)
+5. Recommended approach for bail application
+6. Relevant case laws for bail in similar offenses
+7. Time frame for bail hearing
+""",
+    "fir_generator": """
+Generate an FIR complaint draft with the following details:
+
+Complainant: {complainant_name}
+Incident Date: {incident_date}
+Incident Location: {incident_location}
+Incident Description: {incident_description}
+Accused (if known): {accused_details}
+
+Include:
+1. Proper FIR format
+2. Relevant sections under BNS/IPC
+3. Detailed statement of facts
+4. Prayer/Relief sought
+5. Declaration by complainant
+""",
+    "translator": """
+Translate the following legal text from {source_lang_name} 
+to {target_lang_name}:
+
+{text}
+
+Requirements:
+1. Preserve legal terminology precisely
+2. Maintain formal legal register
+3. Keep formatting intact
+4. Note any terms that have no direct equivalent
+""",
+    "judgment_simplifier": """
+Simplify this court judgment for a layperson:
+
+{judgment_text}
+
+Provide:
+1. Case Summary (2-3 sentences)
+2. Key Facts
+3. Legal Questions Involved
+4. Court's Decision (in simple terms)
+5. What This Means for You (practical implications)
+6. Key Legal Terms Explained
+""",
+    "section_finder": """
+Situation: {query}
+
+Find and explain:
+1. All Applicable BNS Sections (with section numbers)
+2. Corresponding Old IPC Sections (for reference)
+3. Procedural Sections under BNSS
+4. Any Special Law Provisions (POCSO, IT Act, etc.)
+5. Maximum Punishment for each offense
+6. Whether offense is Bailable/Non-bailable
+7. Whether offense is Cognizable/Non-cognizable
+""",
+    "cost_estimator": """
+Estimate legal costs for:
+Case Type: {case_type}
+Court Level: {court_level}
+Complexity: {complexity}
+
+Provide estimates for:
+1. Advocate Fees (range)
+2. Court Fees
+3. Stamp Duty (if applicable)
+4. Documentation Costs
+5. Miscellaneous Expenses
+6. Total Estimated Cost Range
+7. Time Frame for Resolution
+8. Tips to Reduce Costs
+9. Free Legal Aid Options
+""",
+    "precedent_matcher": """
+Find precedents for:
+Case Facts: {case_facts}
+Legal Issue: {legal_issue}
+
+Provide:
+1. Top 5 Relevant Supreme Court Judgments
+2. Top 3 Relevant High Court Judgments
+3. Brief of Each Judgment
+4. How Each Precedent Applies
+5. Distinguishing Factors (if any)
+6. Search Keywords for Further Research
+""",
+    "consumer_complaint": """
+Draft a consumer complaint for:
+Product/Service: {product_service}
+Company: {company_name}
+Issue: {issue_description}
+Purchase Date: {purchase_date}
+Amount: ₹{amount_involved}
+
+Include:
+1. Proper complaint format
+2. Facts chronologically
+3. Deficiency in service/product defect
+4. Consumer Protection Act provisions
+5. Relief/Compensation sought
+6. Relevant documents to attach
+7. Filing procedure
+""",
+    "rti_generator": """
+Generate RTI Application for:
+Department: {department}
+Information Sought: {information_sought}
+Applicant: {applicant_name}
+
+Include:
+1. Proper RTI application format
+2. Specific questions to ask
+3. Relevant RTI Act sections
+4. Fee details
+5. Timeline for response
+6. Appeal process (if denied)
+""",
+    "cyber_complaint": """
+Cyber Crime Complaint for:
+Type: {incident_type}
+Description: {incident_description}
+Evidence: {evidence_details}
+
+Provide:
+1. Applicable IT Act Sections
+2. Applicable BNS/IPC Sections
+3. Complaint Draft
+4. Evidence to Preserve
+5. Step-by-step Filing Process
+6. Expected Timeline
+7. Immediate Protective Measures
+""",
+    "property_verifier": """
+Verify Property Document:
+Type: {document_type}
+Location: {property_location}
+Content: {document_text}
+
+Check:
+1. Essential Clauses Present/Missing
+2. Red Flags/Warning Signs
+3. Stamp Duty Compliance
+4. Registration Status Requirements
+5. Title Chain Issues
+6. Encumbrance Concerns
+7. Recommendations
+""",
+    "marriage_guide": """
+Marriage Registration Guide for:
+State: {state}
+Marriage Type: {marriage_type}
+
+Provide:
+1. Applicable Act
+2. Required Documents
+3. Eligibility Conditions
+4. Step-by-step Process
+5. Fees
+6. Timeline
+7. Where to Apply
+8. Common Issues and Solutions
+""",
+    "divorce_guide": """
+Divorce Procedure Guide for:
+Marriage Type: {marriage_type}
+Divorce Type: {divorce_type}
+
+Explain:
+1. Grounds for Divorce
+2. Mutual vs Contested Divorce
+3. Required Documents
+4. Court Jurisdiction
+5. Step-by-step Procedure
+6. Cooling-off Period
+7. Alimony/Maintenance Considerations
+8. Child Custody Considerations
+9. Timeline
+10. Estimated Costs
+""",
+    "labor_advisor": """
+Labor Law Advice for:
+Issue Type: {issue_type}
+Employment Type: {employment_type}
+Description: {issue_description}
+
+Provide:
+1. Applicable Labor Laws
+2. Employee Rights
+3. Employer Obligations
+4. Available Remedies
+5. Complaint Procedure
+6. Where to File Complaint
+7. Documentation Needed
+8. Important Deadlines
+""",
+    "news_summarizer": """
+Summarize this legal news/development:
+{news_text}
+
+Provide:
+1. Key Headline (simple language)
+2. What Happened
+3. Who is Affected
+4. Practical Impact
+5. What Citizens Should Know
+6. Action Items (if any)
+""",
+    "court_scheduler": """
+Court Procedure Information for:
+Case Type: {case_type}
+Court: {court}
+Location: {location}
+
+Provide:
+1. Typical Hearing Schedule
+2. First Hearing Procedure
+3. Documents Required
+4. Court Fees
+5. Dress Code
+6. What to Expect
+7. How to Check Case Status
+8. Tips for Court Appearance
+""",
+    "jargon_explainer": """
+Explain this legal term/concept: {term}
+
+Provide:
+1. Simple Definition (one line)
+2. Detailed Explanation (plain language)
+3. Hindi Equivalent (if applicable)
+4. Real-life Example
+5. Where This Term is Used
+6. Related Terms
+""",
+    "multi_doc_analyzer": """
+Analyze these documents together for: {analysis_type}
+
+Documents:
+{combined_docs}
+
+Provide:
+1. Document Overview/Summary
+2. Key Similarities
+3. Key Differences/Conflicts
+4. Missing Elements
+5. Legal Issues Identified
+6. Recommendations
+7. Priority Actions
+"""
+}
 
 
 # ==================== 20+ AI FEATURES ====================
+# Results are plain dicts assembled from our own LLM output. They are trusted,
+# so they are returned without a response model and skip output validation.
 
 async def case_outcome_predictor(request: CasePredictionRequest) -> Dict[str, Any]:
     """
     Feature 1: Predict likely case outcome based on facts
     """
-    system_prompt = """You are a Senior Advocate and Judicial Analyst at the Supreme Court of India.
-    CRITICAL RULE: You MUST use the Bharatiya Nyaya Sanhita (BNS) for criminal offenses. 
-    Do NOT use IPC sections as primary references.
-    Analyze the case facts provided and predict the likely outcome by considering:
-    1. Statutory provisions (BNS/BSA/BNSS) exclusively. Mention the equivalent legacy IPC/CrPC sections ONLY for historical mapping.
-    2. Ratio Decidendi of recent Apex Court precedents.
-    3. Constitutional safeguards (Part III) and procedural fairness.
-    Provide a balanced, objective jurisdictional analysis with confidence scores."""
+    system_prompt = SYSTEM_PROMPTS["case_predictor"]
     
-    prompt = f"""
-    Case Type: {request.case_type}
-    Jurisdiction: {request.jurisdiction}
+    prompt = PROMPT_TEMPLATES["case_predictor"].format(
+        case_type=request.case_type,
+        jurisdiction=request.jurisdiction,
+        case_facts=request.case_facts
+    )
     
-    Case Facts:
-    {request.case_facts}
-    
-    Please provide:
-    1. Predicted Outcome (Favorable/Unfavorable/Uncertain)
-    2. Confidence Level (percentage)
-    3. Key Factors Affecting Outcome
-    4. Relevant Precedents/Case Laws
-    5. Recommended Legal Strategy
-    6. Risk Assessment
-    """
-    
-    result = await call_groq(prompt, system_prompt=system_prompt)
+    result = await call_groq(prompt, system_prompt=system_prompt, max_tokens=1024)
     
     return {
         "prediction": result,
@@ -140,26 +801,12 @@ async def legal_risk_analyzer(document_text: str, document_type: str) -> Dict[st
     """
     Feature 2: Analyze legal risks in contracts/agreements
     """
-    system_prompt = """You are an expert Corporate Counsel specializing in Indian Business Law (Indian Contract Act 1872, Companies Act 2013). 
-    CRITICAL: Analyze the document with respect to the CURRENT Indian legal landscape (2024-2025). 
-    Identify risks under the Indian Contract Act, Consumer Protection Act 2019, 
-    Digital Personal Data Protection (DPDP) Act 2023, and Stamp Duty laws.
-    Provide realistic, actionable insights for real-life scenario situations."""
-    
-    prompt = f"""
-    Document Type: {document_type}
+    system_prompt = SYSTEM_PROMPTS["risk_analyzer"]
     
-    Document Content:
-    {document_text}
-    
-    Analyze for:
-    1. High-Risk Clauses (with severity rating 1-10)
-    2. Missing Essential Clauses
-    3. Compliance Issues
-    4. Unfair Terms (under Consumer Protection Act)
-    5. Stamp Duty & Registration Requirements
-    6. Recommendations for Improvement
-    """
+    prompt = PROMPT_TEMPLATES["risk_analyzer"].format(
+        document_type=document_type,
+        document_text=document_text
+    )
     
     result = await call_groq(prompt, system_prompt=system_prompt)
     
@@ -174,26 +821,13 @@ async def bail_eligibility_checker(request: BailCheckRequest) -> Dict[str, Any]:
     """
     Feature 3: Check bail eligibility for an offense
     """
-    system_prompt = """You are a Senior Criminal Law Expert. 
-    CRITICAL: The Bharatiya Nagarik Suraksha Sanhita (BNSS), Bharatiya Nyaya Sanhita (BNS), and Bharatiya Sakshya Adhiniyam (BSA) ARE THE CURRENT LAWS OF INDIA as of July 1, 2024.
-    Analyze bail eligibility under the BNSS (formerly CrPC). Consider Section 436-455 BNSS grounds, 
-    Constitutional safeguards under Article 21 (Personal Liberty), and jurisdictional bail benchmarks 
-    set by the Supreme Court in recent landmark judgments."""
-    
-    prompt = f"""
-    Offense: {request.offense}
-    Section: {request.section}
-    Accused Details: {request.accused_details or "Not provided"}
+    system_prompt = SYSTEM_PROMPTS["bail_checker"]
     
-    Determine:
-    1. Is the offense bailable or non-bailable?
-    2. Bail provisions under BNSS (Bharatiya Nagarik Suraksha Sanhita)
-    3. Conditions for bail grant
-    4. Likely bail amount (if bailable)
-    5. Recommended approach for bail application
-    6. Relevant case laws for bail in similar offenses
-    7. Time frame for bail hearing
-    """
+    prompt = PROMPT_TEMPLATES["bail_checker"].format(
+        offense=request.offense,
+        section=request.section,
+        accused_details=request.accused_details or "Not provided"
+    )
     
     result = await call_groq(prompt, system_prompt=system_prompt)
     
@@ -207,31 +841,22 @@ async def bail_eligibility_checker(request: BailCheckRequest) -> Dict[str, Any]:
     }
 
 
-async def fir_complaint_generator(request: FIRRequest) -> Dict[str, Any]:
+async def fir_complaint_generator(request: FIRRequest, stream: bool = False) -> Any:
     """
     Feature 4: Generate FIR complaint draft
     """
-    system_prompt = """You are an expert in drafting FIRs and Complaints under the Bharatiya Nagarik Suraksha Sanhita (BNSS). 
-    CRITICAL: The BNSS and BNS are the CURRENT AND ACTIVE laws of India (effective July 1, 2024).
-    Ensure the draft is legally sound for Indian Police Stations, correctly mapping incidents to BNS sections 
-    and ensuring all jurisdictional and evidentiary basics required by Section 173 BNSS are covered."""
+    system_prompt = SYSTEM_PROMPTS["fir_generator"]
     
-    prompt = f"""
-    Generate an FIR complaint draft with the following details:
+    prompt = PROMPT_TEMPLATES["fir_generator"].format(
+        complainant_name=request.complainant_name,
+        incident_date=request.incident_date,
+        incident_location=request.incident_location,
+        incident_description=request.incident_description,
+        accused_details=request.accused_details or "Unknown"
+    )
     
-    Complainant: {request.complainant_name}
-    Incident Date: {request.incident_date}
-    Incident Location: {request.incident_location}
-    Incident Description: {request.incident_description}
-    Accused (if known): {request.accused_details or "Unknown"}
-    
-    Include:
-    1. Proper FIR format
-    2. Relevant sections under BNS/IPC
-    3. Detailed statement of facts
-    4. Prayer/Relief sought
-    5. Declaration by complainant
-    """
+    if stream:
+        return StreamingResponse(await stream_groq(prompt, system_prompt=system_prompt), media_type="text/plain")
     
     result = await call_groq(prompt, system_prompt=system_prompt)
     
@@ -250,24 +875,15 @@ async def legal_translation(request: LegalTranslationRequest) -> Dict[str, Any]:
     """
     lang_names = {"en": "English", "hi": "Hindi"}
     
-    system_prompt = f"""You are a Senior Legal Translator specializing in Indian Judicial English and Hindi. 
-    Maintain absolute statutory accuracy, especially for terms in the Constitution of India and 
-    Bharatiya Nyaya Sanhita. Ensure the translation adheres to the legal register of District/High Courts."""
+    system_prompt = SYSTEM_PROMPTS["translator"]
     
-    prompt = f"""
-    Translate the following legal text from {lang_names.get(request.source_lang, request.source_lang)} 
-    to {lang_names.get(request.target_lang, request.target_lang)}:
+    prompt = PROMPT_TEMPLATES["translator"].format(
+        source_lang_name=lang_names.get(request.source_lang, request.source_lang),
+        target_lang_name=lang_names.get(request.target_lang, request.target_lang),
+        text=request.text
+    )
     
-    {request.text}
-    
-    Requirements:
-    1. Preserve legal terminology precisely
-    2. Maintain formal legal register
-    3. Keep formatting intact
-    4. Note any terms that have no direct equivalent
-    """
-    
-    result = await call_groq(prompt, system_prompt=system_prompt)
+    result = await call_groq(prompt, system_prompt=system_prompt, tier="fast", max_tokens=min(max(len(request.text) * 2, 256), 4000))
     
     return {
         "translated_text": result,
@@ -276,27 +892,18 @@ async def legal_translation(request: LegalTranslationRequest) -> Dict[str, Any]:
     }
 
 
-async def judgment_simplifier(judgment_text: str) -> Dict[str, Any]:
+async def judgment_simplifier(judgment_text: str, stream: bool = False) -> Any:
     """
     Feature 6: Simplify complex court judgments
     """
-    system_prompt = """You are a Legal Rapporteur and Court Clerking expert. 
-    Simplify complex Indian judgments by clearly extracting the 'Ratio Decidendi' (Reason for Decision) 
-    and 'Obiter Dicta' in plain language while maintaining citations and judicial rigor."""
-    
-    prompt = f"""
-    Simplify this court judgment for a layperson:
+    system_prompt = SYSTEM_PROMPTS["judgment_simplifier"]
     
-    {judgment_text}
+    prompt = PROMPT_TEMPLATES["judgment_simplifier"].format(
+        judgment_text=judgment_text
+    )
     
-    Provide:
-    1. Case Summary (2-3 sentences)
-    2. Key Facts
-    3. Legal Questions Involved
-    4. Court's Decision (in simple terms)
-    5. What This Means for You (practical implications)
-    6. Key Legal Terms Explained
-    """
+    if stream:
+        return StreamingResponse(await stream_groq(prompt, system_prompt=system_prompt), media_type="text/plain")
     
     result = await call_groq(prompt, system_prompt=system_prompt)
     
@@ -313,24 +920,13 @@ async def section_finder(query: str) -> Dict[str, Any]:
     """
     Feature 7: Find relevant IPC/BNS sections for a situation
     """
-    system_prompt = """You are a Legal Statutory Specialist. Find specific sections in the 
-    Bharatiya Nyaya Sanhita (BNS) [Replacement for IPC] and Bharatiya Nagarik Suraksha Sanhita (BNSS) [formerly CrPC]. 
-    Always provide the BNS-to-IPC mapping for historical reference and statutory continuity."""
+    system_prompt = SYSTEM_PROMPTS["section_finder"]
     
-    prompt = f"""
-    Situation: {query}
+    prompt = PROMPT_TEMPLATES["section_finder"].format(
+        query=query
+    )
     
-    Find and explain:
-    1. All Applicable BNS Sections (with section numbers)
-    2. Corresponding Old IPC Sections (for reference)
-    3. Procedural Sections under BNSS
-    4. Any Special Law Provisions (POCSO, IT Act, etc.)
-    5. Maximum Punishment for each offense
-    6. Whether offense is Bailable/Non-bailable
-    7. Whether offense is Cognizable/Non-cognizable
-    """
-    
-    result = await call_groq(prompt, system_prompt=system_prompt)
+    result = await call_groq(prompt, system_prompt=system_prompt, max_tokens=512)
     
     return {
         "sections": result,
@@ -346,27 +942,13 @@ async def legal_cost_estimator(case_type: str, court_level: str, complexity: str
     """
     Feature 8: Estimate legal fees and costs
     """
-    system_prompt = """You are a Legal Auditor. Provide cost estimates for litigation in India 
-    considering Advocate Fee Rules of various High Courts, the Court Fees Act 1870, 
-    and standard Bar Council of India benchmarks for civil, criminal, and corporate matters."""
+    system_prompt = SYSTEM_PROMPTS["cost_estimator"]
     
-    prompt = f"""
-    Estimate legal costs for:
-    Case Type: {case_type}
-    Court Level: {court_level}
-    Complexity: {complexity}
-    
-    Provide estimates for:
-    1. Advocate Fees (range)
-    2. Court Fees
-    3. Stamp Duty (if applicable)
-    4. Documentation Costs
-    5. Miscellaneous Expenses
-    6. Total Estimated Cost Range
-    7. Time Frame for Resolution
-    8. Tips to Reduce Costs
-    9. Free Legal Aid Options
-    """
+    prompt = PROMPT_TEMPLATES["cost_estimator"].format(
+        case_type=case_type,
+        court_level=court_level,
+        complexity=complexity
+    )
     
     result = await call_groq(prompt, system_prompt=system_prompt)
     
@@ -381,23 +963,12 @@ async def precedent_matcher(case_facts: str, legal_issue: str) -> Dict[str, Any]
     """
     Feature 9: Find similar case precedents
     """
-    system_prompt = """You are a Senior Legal Researcher specializing in the Apex Court and High Courts of India. 
-    Find precedents focusing on landmark judgments that set 'Stare Decisis' for the legal issue provided. 
-    Identify key 'Ingredients of the Offense' or 'Points for Determination' from relevant case laws."""
-    
-    prompt = f"""
-    Find precedents for:
-    Case Facts: {case_facts}
-    Legal Issue: {legal_issue}
+    system_prompt = SYSTEM_PROMPTS["precedent_matcher"]
     
-    Provide:
-    1. Top 5 Relevant Supreme Court Judgments
-    2. Top 3 Relevant High Court Judgments
-    3. Brief of Each Judgment
-    4. How Each Precedent Applies
-    5. Distinguishing Factors (if any)
-    6. Search Keywords for Further Research
-    """
+    prompt = PROMPT_TEMPLATES["precedent_matcher"].format(
+        case_facts=case_facts,
+        legal_issue=legal_issue
+    )
     
     result = await call_groq(prompt, system_prompt=system_prompt)
     
@@ -412,27 +983,15 @@ async def consumer_complaint_helper(request: ConsumerComplaintRequest) -> Dict[s
     """
     Feature 10: Generate consumer complaint
     """
-    system_prompt = """You are an expert in the Consumer Protection Act, 2019. 
-    Draft detailed Consumer Complaints for the District/State Commission, highlighting 'Deficiency of Service', 
-    'Unfair Trade Practice', and ensuring compliance with Section 35 of the Act."""
+    system_prompt = SYSTEM_PROMPTS["consumer_complaint"]
     
-    prompt = f"""
-    Draft a consumer complaint for:
-    Product/Service: {request.product_service}
-    Company: {request.company_name}
-    Issue: {request.issue_description}
-    Purchase Date: {request.purchase_date}
-    Amount: ₹{request.amount_involved}
-    
-    Include:
-    1. Proper complaint format
-    2. Facts chronologically
-    3. Deficiency in service/product defect
-    4. Consumer Protection Act provisions
-    5. Relief/Compensation sought
-    6. Relevant documents to attach
-    7. Filing procedure
-    """
+    prompt = PROMPT_TEMPLATES["consumer_complaint"].format(
+        product_service=request.product_service,
+        company_name=request.company_name,
+        issue_description=request.issue_description,
+        purchase_date=request.purchase_date,
+        amount_involved=request.amount_involved
+    )
     
     result = await call_groq(prompt, system_prompt=system_prompt)
     
@@ -456,24 +1015,13 @@ async def rti_application_generator(department: str, information_sought: str, ap
     """
     Feature 11: Generate RTI application
     """
-    system_prompt = """You are a Senior RTI Consultant. Draft RTI Applications under 
-    Section 6(1) of the Right to Information Act, 2005. Frame questions to avoid Section 8 exemptions 
-    and ensure the application is addressed properly to the Central/State Public Information Officer."""
+    system_prompt = SYSTEM_PROMPTS["rti_generator"]
     
-    prompt = f"""
-    Generate RTI Application for:
-    Department: {department}
-    Information Sought: {information_sought}
-    Applicant: {applicant_name}
-    
-    Include:
-    1. Proper RTI application format
-    2. Specific questions to ask
-    3. Relevant RTI Act sections
-    4. Fee details
-    5. Timeline for response
-    6. Appeal process (if denied)
-    """
+    prompt = PROMPT_TEMPLATES["rti_generator"].format(
+        department=department,
+        information_sought=information_sought,
+        applicant_name=applicant_name
+    )
     
     result = await call_groq(prompt, system_prompt=system_prompt)
     
@@ -489,25 +1037,13 @@ async def cyber_complaint_helper(request: CyberComplaintRequest) -> Dict[str, An
     """
     Feature 12: Help with cyber crime complaints
     """
-    system_prompt = """You are a Cyber Law Expert specializing in the IT Act, 2000, and the Digital Personal Data Protection Act (DPDP) 2023. 
-    Analyze cyber crimes and draft complaints for the National Cyber Crime Reporting Portal (NCRP), 
-    citing specific sections like 66A, 66E, or 67A as applicable."""
-    
-    prompt = f"""
-    Cyber Crime Complaint for:
-    Type: {request.incident_type}
-    Description: {request.incident_description}
-    Evidence: {request.evidence_details or "Not specified"}
+    system_prompt = SYSTEM_PROMPTS["cyber_complaint"]
     
-    Provide:
-    1. Applicable IT Act Sections
-    2. Applicable BNS/IPC Sections
-    3. Complaint Draft
-    4. Evidence to Preserve
-    5. Step-by-step Filing Process
-    6. Expected Timeline
-    7. Immediate Protective Measures
-    """
+    prompt = PROMPT_TEMPLATES["cyber_complaint"].format(
+        incident_type=request.incident_type,
+        incident_description=request.incident_description,
+        evidence_details=request.evidence_details or "Not specified"
+    )
     
     result = await call_groq(prompt, system_prompt=system_prompt)
     
@@ -523,25 +1059,13 @@ async def property_document_verifier(request: PropertyVerifyRequest) -> Dict[str
     """
     Feature 13: Verify property documents
     """
-    system_prompt = """You are a Real Estate Attorney and Property Auditor. 
-    Analyze documents like Sale Deeds, Allotment Letters, and Khata extracts under the 
-    Registration Act 1908, RERA 2016, and the Transfer of Property Act 1882."""
+    system_prompt = SYSTEM_PROMPTS["property_verifier"]
     
-    prompt = f"""
-    Verify Property Document:
-    Type: {request.document_type}
-    Location: {request.property_location}
-    Content: {request.document_text}
-    
-    Check:
-    1. Essential Clauses Present/Missing
-    2. Red Flags/Warning Signs
-    3. Stamp Duty Compliance
-    4. Registration Status Requirements
-    5. Title Chain Issues
-    6. Encumbrance Concerns
-    7. Recommendations
-    """
+    prompt = PROMPT_TEMPLATES["property_verifier"].format(
+        document_type=request.document_type,
+        property_location=request.property_location,
+        document_text=request.document_text
+    )
     
     result = await call_groq(prompt, system_prompt=system_prompt)
     
@@ -556,27 +1080,14 @@ async def marriage_registration_guide(state: str, marriage_type: str) -> Dict[st
     """
     Feature 14: Marriage registration guidance
     """
-    system_prompt = """You are a Family Law Attorney specialized in the Hindu Marriage Act, 1955, 
-    the Special Marriage Act, 1954, and Muslim Personal Law procedures. Guide users through 
-    civil and religious registration requirements in various Indian states."""
+    system_prompt = SYSTEM_PROMPTS["marriage_guide"]
     
-    prompt = f"""
-    Marriage Registration Guide for:
-    State: {state}
-    Marriage Type: {marriage_type}
+    prompt = PROMPT_TEMPLATES["marriage_guide"].format(
+        state=state,
+        marriage_type=marriage_type
+    )
     
-    Provide:
-    1. Applicable Act
-    2. Required Documents
-    3. Eligibility Conditions
-    4. Step-by-step Process
-    5. Fees
-    6. Timeline
-    7. Where to Apply
-    8. Common Issues and Solutions
-    """
-    
-    result = await call_groq(prompt, system_prompt=system_prompt)
+    result = await call_groq(prompt, system_prompt=system_prompt, tier="fast")
     
     return {
         "guide": result,
@@ -588,29 +1099,14 @@ async def divorce_procedure_guide(marriage_type: str, divorce_type: str) -> Dict
     """
     Feature 15: Divorce procedure guidance
     """
-    system_prompt = """You are a Senior Family Law Counsel. Provide guidance on divorce proceedings 
-    under HMA, SMA, and other Personal Laws. Focus on Section 13/13B (Mutual Consent) grounds, 
-    Interim Maintenance (Section 24), and Child Custody guidelines set by the Supreme Court."""
+    system_prompt = SYSTEM_PROMPTS["divorce_guide"]
     
-    prompt = f"""
-    Divorce Procedure Guide for:
-    Marriage Type: {marriage_type}
-    Divorce Type: {divorce_type}
-    
-    Explain:
-    1. Grounds for Divorce
-    2. Mutual vs Contested Divorce
-    3. Required Documents
-    4. Court Jurisdiction
-    5. Step-by-step Procedure
-    6. Cooling-off Period
-    7. Alimony/Maintenance Considerations
-    8. Child Custody Considerations
-    9. Timeline
-    10. Estimated Costs
-    """
+    prompt = PROMPT_TEMPLATES["divorce_guide"].format(
+        marriage_type=marriage_type,
+        divorce_type=divorce_type
+    )
     
-    result = await call_groq(prompt, system_prompt=system_prompt)
+    result = await call_groq(prompt, system_prompt=system_prompt, tier="fast")
     
     return {
         "procedure": result,
@@ -623,26 +1119,13 @@ async def labor_law_advisor(request: LaborAdviceRequest) -> Dict[str, Any]:
     """
     Feature 16: Workplace rights advisor
     """
-    system_prompt = """You are an Industrial Relations and Labor Law Authority. 
-    Analyze issues under the new Labor Codes (2020), the Industrial Disputes Act, 
-    and state-specific Shops & Establishments Acts. Advise on statutory compliance and worker rights."""
-    
-    prompt = f"""
-    Labor Law Advice for:
-    Issue Type: {request.issue_type}
-    Employment Type: {request.employment_type}
-    Description: {request.issue_description}
+    system_prompt = SYSTEM_PROMPTS["labor_advisor"]
     
-    Provide:
-    1. Applicable Labor Laws
-    2. Employee Rights
-    3. Employer Obligations
-    4. Available Remedies
-    5. Complaint Procedure
-    6. Where to File Complaint
-    7. Documentation Needed
-    8. Important Deadlines
-    """
+    prompt = PROMPT_TEMPLATES["labor_advisor"].format(
+        issue_type=request.issue_type,
+        employment_type=request.employment_type,
+        issue_description=request.issue_description
+    )
     
     result = await call_groq(prompt, system_prompt=system_prompt)
     
@@ -657,24 +1140,13 @@ async def legal_news_summarizer(news_text: str) -> Dict[str, Any]:
     """
     Feature 17: Summarize legal news and developments
     """
-    system_prompt = """You are a Legal Correspondent and Legislative Analyst. 
-    Analyze Indian legal developments and statutory shifts to explain their practical impact 
-    on citizens with constitutional and jurisprudential context."""
+    system_prompt = SYSTEM_PROMPTS["news_summarizer"]
     
-    prompt = f"""
-    Summarize this legal news/development:
-    {news_text}
+    prompt = PROMPT_TEMPLATES["news_summarizer"].format(
+        news_text=news_text
+    )
     
-    Provide:
-    1. Key Headline (simple language)
-    2. What Happened
-    3. Who is Affected
-    4. Practical Impact
-    5. What Citizens Should Know
-    6. Action Items (if any)
-    """
-    
-    result = await call_groq(prompt, system_prompt=system_prompt)
+    result = await call_groq(prompt, system_prompt=system_prompt, tier="fast")
     
     return {
         "summary": result,
@@ -686,28 +1158,15 @@ async def court_hearing_scheduler(case_type: str, court: str, location: str) ->
     """
     Feature 18: Court dates and procedures info
     """
-    system_prompt = """You are a Court Administrative Specialist. Explain court procedures, 
-    filing formalities, and hearing protocols (High Courts, District Courts, NCLT, DRT) 
-    in line with the latest judicial notifications and the BNSS guidelines."""
+    system_prompt = SYSTEM_PROMPTS["court_scheduler"]
     
-    prompt = f"""
-    Court Procedure Information for:
-    Case Type: {case_type}
-    Court: {court}
-    Location: {location}
+    prompt = PROMPT_TEMPLATES["court_scheduler"].format(
+        case_type=case_type,
+        court=court,
+        location=location
+    )
     
-    Provide:
-    1. Typical Hearing Schedule
-    2. First Hearing Procedure
-    3. Documents Required
-    4. Court Fees
-    5. Dress Code
-    6. What to Expect
-    7. How to Check Case Status
-    8. Tips for Court Appearance
-    """
-    
-    result = await call_groq(prompt, system_prompt=system_prompt)
+    result = await call_groq(prompt, system_prompt=system_prompt, tier="fast")
     
     return {
         "information": result,
@@ -720,23 +1179,13 @@ async def legal_jargon_explainer(term: str) -> Dict[str, Any]:
     """
     Feature 19: Explain legal terms in simple language
     """
-    system_prompt = """You are a Legal Educator specializing in Jurisprudence. 
-    Explain Indian legal maxims and terms (like Res Judicata, Caveat Emptor, Writ) 
-    in both English and the official Hindi 'Vidhi' terminology."""
-    
-    prompt = f"""
-    Explain this legal term/concept: {term}
+    system_prompt = SYSTEM_PROMPTS["jargon_explainer"]
     
-    Provide:
-    1. Simple Definition (one line)
-    2. Detailed Explanation (plain language)
-    3. Hindi Equivalent (if applicable)
-    4. Real-life Example
-    5. Where This Term is Used
-    6. Related Terms
-    """
+    prompt = PROMPT_TEMPLATES["jargon_explainer"].format(
+        term=term
+    )
     
-    result = await call_groq(prompt, system_prompt=system_prompt)
+    result = await call_groq(prompt, system_prompt=system_prompt, tier="fast", max_tokens=256)
     
     return {
         "explanation": result,
@@ -744,33 +1193,38 @@ async def legal_jargon_explainer(term: str) -> Dict[str, Any]:
     }
 
 
-async def multi_document_analyzer(documents: List[str], analysis_type: str) -> Dict[str, Any]:
+async def multi_document_analyzer(documents: List[str], analysis_type: str, stream: bool = False) -> Any:
     """
     Feature 20: Analyze multiple documents together
     """
-    system_prompt = """You are a Lead Legal Auditor and Analysis Specialist. 
-    Compare multiple Indian legal documents for cross-statutory consistency, 
-    conflict with BNS/BNSS, or violation of constitutional basic structures."""
+    system_prompt = SYSTEM_PROMPTS["multi_doc_analyzer"]
     
-    combined_docs = "\n\n---DOCUMENT SEPARATOR---\n\n".join(documents)
+    # Map: summarize each document independently (batched, fast tier)
+    summary_system_prompt = SYSTEM_PROMPTS["multi_doc_summary"]
     
-    prompt = f"""
-    Analyze these documents together for: {analysis_type}
+    # The batcher groups calls but still sends them all; cap how many run at once
+    semaphore = asyncio.Semaphore(MAX_PARALLEL)
     
-    Documents:
-    {combined_docs}
+    async def summarize(doc: str) -> str:
+        async with semaphore:
+            return await call_groq(f"Summarize this document for a later {analysis_type} review:\n\n{doc}", system_prompt=summary_system_prompt, tier="fast", max_tokens=512)
     
-    Provide:
-    1. Document Overview/Summary
-    2. Key Similarities
-    3. Key Differences/Conflicts
-    4. Missing Elements
-    5. Legal Issues Identified
-    6. Recommendations
-    7. Priority Actions
-    """
+    summaries = await asyncio.gather(*(summarize(doc) for doc in documents))
     
-    result = await call_groq(prompt, system_prompt=system_prompt)
+    # Reduce: cross-document analysis over the summaries only
+    combined_docs = "\n\n---DOCUMENT SEPARATOR---\n\n".join(
+        f"Document {i + 1} (summary):\n{summary}" for i, summary in enumerate(summaries)
+    )
+    
+    prompt = PROMPT_TEMPLATES["multi_doc_analyzer"].format(
+        analysis_type=analysis_type,
+        combined_docs=combined_docs
+    )
+    
+    if stream:
+        return StreamingResponse(await stream_groq(prompt, system_prompt=system_prompt, max_tokens=2048), media_type="text/plain")
+    
+    result = await call_groq(prompt, system_prompt=system_prompt, max_tokens=2048)
     
     return {
         "analysis": result,
@@ -785,45 +1239,47 @@ async def get_government_links(category: str) -> Dict[str, Any]:
     """
     Get relevant government portal links for a category
     """
-    categories = {
-        "legal": ["indian_kanoon", "ecourts", "nalsa"],
-        "consumer": ["consumer_helpline"],
-        "cyber": ["cybercrime"],
-        "rti": ["rti"],
-        "tax": ["income_tax", "gst"],
-        "corporate": ["mca"],
-        "labour": ["labour"],
-        "all": list(GOVT_PORTALS.keys())
-    }
-    
-    selected_keys = categories.get(category.lower(), categories["all"])
-    
     return {
         "category": category,
-        "portals": {key: GOVT_PORTALS[key] for key in selected_keys if key in GOVT_PORTALS}
+        "portals": CATEGORY_PORTALS.get(category.lower(), CATEGORY_PORTALS["all"])
     }
 
 
 # Feature summary for frontend directory
-AI_FEATURES_DIRECTORY = [
-    {"id": "case_predictor", "name": "Case Outcome Predictor", "icon": "Scale", "description": "Predict likely case outcomes based on facts"},
-    {"id": "risk_analyzer", "name": "Legal Risk Analyzer", "icon": "Shield", "description": "Analyze legal risks in contracts"},
-    {"id": "bail_checker", "name": "Bail Eligibility Checker", "icon": "Unlock", "description": "Check bail eligibility for offenses"},
-    {"id": "fir_generator", "name": "FIR Complaint Generator", "icon": "FileWarning", "description": "Generate FIR complaint drafts"},
-    {"id": "translator", "name": "Legal Translation", "icon": "Languages", "description": "Translate legal docs EN↔HI"},
-    {"id": "judgment_simplifier", "name": "Judgment Simplifier", "icon": "BookOpen", "description": "Simplify complex judgments"},
-    {"id": "section_finder", "name": "Section Finder", "icon": "Search", "description": "Find relevant IPC/BNS sections"},
-    {"id": "cost_estimator", "name": "Legal Cost Estimator", "icon": "IndianRupee", "description": "Estimate legal proceedings costs"},
-    {"id": "precedent_matcher", "name": "Precedent Matcher", "icon": "GitCompare", "description": "Find similar case precedents"},
-    {"id": "consumer_complaint", "name": "Consumer Complaint Helper", "icon": "ShoppingBag", "description": "Generate consumer complaints"},
-    {"id": "rti_generator", "name": "RTI Application Generator", "icon": "FileQuestion", "description": "Generate RTI applications"},
-    {"id": "cyber_complaint", "name": "Cyber Crime Reporter", "icon": "Shield", "description": "Help with cyber crime complaints"},
-    {"id": "property_verifier", "name": "Property Document Verifier", "icon": "Home", "description": "Verify property documents"},
-    {"id": "marriage_guide", "name": "Marriage Registration Guide", "icon": "Heart", "description": "Marriage registration guidance"},
-    {"id": "divorce_guide", "name": "Divorce Procedure Guide", "icon": "HeartCrack", "description": "Divorce procedure guidance"},
-    {"id": "labor_advisor", "name": "Labor Law Advisor", "icon": "Briefcase", "description": "Workplace rights advisor"},
-    {"id": "news_summarizer", "name": "Legal News Summarizer", "icon": "Newspaper", "description": "Summarize legal developments"},
-    {"id": "court_scheduler", "name": "Court Hearing Info", "icon": "Calendar", "description": "Court procedures and timelines"},
-    {"id": "jargon_explainer", "name": "Legal Jargon Explainer", "icon": "HelpCircle", "description": "Explain legal terms simply"},
-    {"id": "multi_doc_analyzer", "name": "Multi-Document Analyzer", "icon": "Files", "description": "Analyze multiple docs together"},
-]
+class FeatureInfo(msgspec.Struct, frozen=True):
+    id: str
+    name: str
+    icon: str
+    description: str
+
+
+AI_FEATURES_DIRECTORY = (
+    FeatureInfo("case_predictor", "Case Outcome Predictor", "Scale", "Predict likely case outcomes based on facts"),
+    FeatureInfo("risk_analyzer", "Legal Risk Analyzer", "Shield", "Analyze legal risks in contracts"),
+    FeatureInfo("bail_checker", "Bail Eligibility Checker", "Unlock", "Check bail eligibility for offenses"),
+    FeatureInfo("fir_generator", "FIR Complaint Generator", "FileWarning", "Generate FIR complaint drafts"),
+    FeatureInfo("translator", "Legal Translation", "Languages", "Translate legal docs EN↔HI"),
+    FeatureInfo("judgment_simplifier", "Judgment Simplifier", "BookOpen", "Simplify complex judgments"),
+    FeatureInfo("section_finder", "Section Finder", "Search", "Find relevant IPC/BNS sections"),
+    FeatureInfo("cost_estimator", "Legal Cost Estimator", "IndianRupee", "Estimate legal proceedings costs"),
+    FeatureInfo("precedent_matcher", "Precedent Matcher", "GitCompare", "Find similar case precedents"),
+    FeatureInfo("consumer_complaint", "Consumer Complaint Helper", "ShoppingBag", "Generate consumer complaints"),
+    FeatureInfo("rti_generator", "RTI Application Generator", "FileQuestion", "Generate RTI applications"),
+    FeatureInfo("cyber_complaint", "Cyber Crime Reporter", "Shield", "Help with cyber crime complaints"),
+    FeatureInfo("property_verifier", "Property Document Verifier", "Home", "Verify property documents"),
+    FeatureInfo("marriage_guide", "Marriage Registration Guide", "Heart", "Marriage registration guidance"),
+    FeatureInfo("divorce_guide", "Divorce Procedure Guide", "HeartCrack", "Divorce procedure guidance"),
+    FeatureInfo("labor_advisor", "Labor Law Advisor", "Briefcase", "Workplace rights advisor"),
+    FeatureInfo("news_summarizer", "Legal News Summarizer", "Newspaper", "Summarize legal developments"),
+    FeatureInfo("court_scheduler", "Court Hearing Info", "Calendar", "Court procedures and timelines"),
+    FeatureInfo("jargon_explainer", "Legal Jargon Explainer", "HelpCircle", "Explain legal terms simply"),
+    FeatureInfo("multi_doc_analyzer", "Multi-Document Analyzer", "Files", "Analyze multiple docs together"),
+)
+
+# The directory never changes at runtime, so its JSON is encoded once
+AI_FEATURES_DIRECTORY_JSON: bytes = msgspec.json.encode(AI_FEATURES_DIRECTORY)
+
+
+def features_directory_response() -> Response:
+    """Serve the pre-encoded feature directory without per-request serialization"""
+    return Response(content=AI_FEATURES_DIRECTORY_JSON, media_type="application/json")
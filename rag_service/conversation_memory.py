@@ -3,19 +3,35 @@ Conversation Memory Module for Session-Aware RAG
 Implements conversation buffer memory and history-aware query reformulation
 """
 
-from typing import List, Dict, Optional
+from typing import Deque, List, Dict, Optional
+from collections import deque
 from datetime import datetime
+from itertools import islice
+import os
+import re
 import uuid
+from log_utils import get_logger
+
+logger = get_logger("ConversationMemory")
+
+# Section references used to recover the topic of the previous answer
+SECTION_REF_RE = re.compile(r'(bns|ipc)\s+section\s+\d+')
+
+# Follow-up markers (pronouns, continuations), matched as whole words in one pass
+FOLLOW_UP_RE = re.compile(r'\b(?:it|this|that|they|what about|how about|and)\b', re.IGNORECASE)
+
+# Messages kept per session; older ones fall off the front as new ones are appended
+MAX_HISTORY_MESSAGES = int(os.getenv("MAX_HISTORY_MESSAGES", "50"))
 
 class ConversationMemory:
     """Manages conversation history and context for RAG queries"""
     
     def __init__(self):
-        # session_id -> conversation history
-        self.sessions: Dict[str, List[Dict]] = {}
+        # session_id -> conversation history (bounded window, O(1) append and trim)
+        self.sessions: Dict[str, Deque[Dict]] = {}
         # session_id -> metadata
         self.session_metadata: Dict[str, Dict] = {}
-        print("[ConversationMemory] Initialized")
+        logger.info("Initialized")
     
     def create_session(self) -> str:
         """
@@ -25,13 +41,8 @@ class ConversationMemory:
             session_id: Unique session identifier
         """
         session_id = str(uuid.uuid4())
-        self.sessions[session_id] = []
-        self.session_metadata[session_id] = {
-            "created_at": datetime.now().isoformat(),
-            "last_activity": datetime.now().isoformat(),
-            "message_count": 0
-        }
-        print(f"[ConversationMemory] Created session: {session_id}")
+        self._init_session(session_id)
+        logger.debug("Created session: %s", session_id)
         return session_id
     
     def add_message(self, session_id: str, role: str, content: str):
@@ -44,23 +55,30 @@ class ConversationMemory:
             content: Message content
         """
         if session_id not in self.sessions:
-            print(f"[ConversationMemory] Session {session_id} not found, creating new session")
-            self.sessions[session_id] = []
-            self.session_metadata[session_id] = {
-                "created_at": datetime.now().isoformat(),
-                "last_activity": datetime.now().isoformat(),
-                "message_count": 0
-            }
+            logger.debug("Session %s not found, creating new session", session_id)
+            self._init_session(session_id)
         
+        now = datetime.now().isoformat()
         message = {
             "role": role,
             "content": content,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": now
         }
         
         self.sessions[session_id].append(message)
-        self.session_metadata[session_id]["last_activity"] = datetime.now().isoformat()
-        self.session_metadata[session_id]["message_count"] += 1
+        metadata = self.session_metadata[session_id]
+        metadata["last_activity"] = now
+        metadata["message_count"] += 1
+    
+    def _init_session(self, session_id: str):
+        """Create empty history and metadata for a session"""
+        now = datetime.now().isoformat()
+        self.sessions[session_id] = deque(maxlen=MAX_HISTORY_MESSAGES)
+        self.session_metadata[session_id] = {
+            "created_at": now,
+            "last_activity": now,
+            "message_count": 0
+        }
     
     def get_history(self, session_id: str, max_messages: int = 10) -> List[Dict]:
         """
@@ -73,11 +91,12 @@ class ConversationMemory:
         Returns:
             List of message dictionaries
         """
-        if session_id not in self.sessions:
+        history = self.sessions.get(session_id)
+        if not history:
             return []
         
         # Return most recent messages
-        return self.sessions[session_id][-max_messages:]
+        return list(islice(history, max(len(history) - max_messages, 0), None))
     
     def get_context_string(self, session_id: str, max_messages: int = 6) -> str:
         """
@@ -120,8 +139,7 @@ class ConversationMemory:
             return current_query
         
         # Check if query is a follow-up (contains pronouns, short, etc.)
-        follow_up_indicators = ['it', 'this', 'that', 'they', 'what about', 'how about', 'and']
-        is_follow_up = any(indicator in current_query.lower() for indicator in follow_up_indicators)
+        is_follow_up = FOLLOW_UP_RE.search(current_query) is not None
         
         if not is_follow_up and len(current_query.split()) > 5:
             return current_query
@@ -136,15 +154,16 @@ class ConversationMemory:
             if msg["role"] == "assistant" and not last_topic:
                 # Extract main topic from assistant response
                 content = msg["content"].lower()
-                # Look for BNS/IPC sections
-                import re
-                bns_match = re.search(r'bns\s+section\s+\d+', content)
-                ipc_match = re.search(r'ipc\s+section\s+\d+', content)
-                
-                if bns_match:
-                    last_topic = bns_match.group(0).upper()
-                elif ipc_match:
-                    last_topic = ipc_match.group(0).upper()
+                # Look for BNS/IPC sections in a single pass, preferring BNS
+                ipc_topic = None
+                for match in SECTION_REF_RE.finditer(content):
+                    if match.group(1) == "bns":
+                        last_topic = match.group(0).upper()
+                        break
+                    if ipc_topic is None:
+                        ipc_topic = match.group(0).upper()
+                else:
+                    last_topic = ipc_topic
         
         # Reformulate query with context
         if last_topic:
@@ -154,7 +173,7 @@ class ConversationMemory:
         else:
             reformulated = current_query
         
-        print(f"[ConversationMemory] Reformulated query: '{current_query}' -> '{reformulated}'")
+        logger.debug("Reformulated query: '%s' -> '%s'", current_query, reformulated)
         return reformulated
     
     def clear_session(self, session_id: str):
@@ -165,10 +184,10 @@ class ConversationMemory:
             session_id: Session identifier
         """
         if session_id in self.sessions:
-            self.sessions[session_id] = []
+            self.sessions[session_id].clear()
             self.session_metadata[session_id]["last_activity"] = datetime.now().isoformat()
             self.session_metadata[session_id]["message_count"] = 0
-            print(f"[ConversationMemory] Cleared session: {session_id}")
+            logger.info("Cleared session: %s", session_id)
     
     def delete_session(self, session_id: str):
         """
@@ -180,7 +199,7 @@ class ConversationMemory:
         if session_id in self.sessions:
             del self.sessions[session_id]
             del self.session_metadata[session_id]
-            print(f"[ConversationMemory] Deleted session: {session_id}")
+            logger.info("Deleted session: %s", session_id)
     
     def get_session_info(self, session_id: str) -> Optional[Dict]:
         """
@@ -215,4 +234,4 @@ class ConversationMemory:
             self.delete_session(session_id)
         
         if sessions_to_delete:
-            print(f"[ConversationMemory] Cleaned up {len(sessions_to_delete)} old sessions")
+            logger.info("Cleaned up %s old sessions", len(sessions_to_delete))
@@ -1,6 +1,114 @@
+import asyncio
 import os
+import random
+import time
+import aiohttp
+import msgspec
 import requests
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, AsyncIterator
+from log_utils import get_logger
+
+logger = get_logger("GroqClient")
+
+# Shared aiohttp session for every async Groq caller in the process (RAGEngine and
+# ai_features), so they draw on one connection pool (created lazily, closed on app shutdown)
+_session: Optional[aiohttp.ClientSession] = None
+
+# Pool bounds for the shared session; tune to the deployment's request concurrency
+POOL_LIMIT = int(os.getenv("GROQ_POOL_LIMIT", "1000"))
+POOL_LIMIT_PER_HOST = int(os.getenv("GROQ_POOL_PER_HOST", "200"))
+# Connecting (TCP + TLS) is bounded separately so a stalled connect fails fast
+# instead of consuming a whole generation timeout
+CONNECT_TIMEOUT = 10
+
+
+def request_timeout(total: float) -> aiohttp.ClientTimeout:
+    """Per-request timeout: total budget for the call, with the connect phase capped"""
+    return aiohttp.ClientTimeout(total=total, connect=CONNECT_TIMEOUT)
+
+
+def get_session() -> aiohttp.ClientSession:
+    """Return the module-level ClientSession, creating it on first use"""
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=POOL_LIMIT,
+                limit_per_host=POOL_LIMIT_PER_HOST,
+                ttl_dns_cache=600,
+                keepalive_timeout=60,
+                enable_cleanup_closed=True
+            ),
+            timeout=request_timeout(60)
+        )
+    return _session
+
+
+# Retry policy for the async calls: full-jitter exponential backoff on transient failures
+RETRY_ATTEMPTS = 2
+RETRY_BACKOFF_CAP = 8.0  # seconds
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class CircuitOpenError(Exception):
+    """Raised without touching the network while the breaker is open"""
+
+
+class CircuitBreaker:
+    """
+    Fails calls fast after repeated upstream failures. Opens after `threshold`
+    consecutive failures; once `cooldown` seconds pass, calls go through again
+    and the next failure re-opens it, the next success closes it.
+    """
+
+    def __init__(self, threshold: int = 5, cooldown: float = 30.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def is_open(self) -> bool:
+        return self.failures >= self.threshold and time.monotonic() - self.opened_at < self.cooldown
+
+    def check(self) -> None:
+        """Raise CircuitOpenError if calls should fail fast"""
+        if self.is_open():
+            raise CircuitOpenError(f"Groq unavailable after {self.failures} consecutive failures; retrying after cooldown")
+
+    def record_success(self) -> None:
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+
+
+# One breaker for the Groq endpoint, shared by every async caller like the session
+breaker = CircuitBreaker(
+    threshold=int(os.getenv("GROQ_BREAKER_THRESHOLD", "5")),
+    cooldown=float(os.getenv("GROQ_BREAKER_COOLDOWN", "30"))
+)
+
+
+def is_transient(error: Exception) -> bool:
+    """Connection failures, timeouts and retryable HTTP statuses (not bad requests)"""
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status in RETRYABLE_STATUSES
+    return isinstance(error, (aiohttp.ClientConnectionError, asyncio.TimeoutError))
+
+
+def backoff_delay(attempt: int) -> float:
+    """Full jitter: uniform in [0, min(2**attempt, cap)] so retries don't synchronize"""
+    return random.uniform(0, min(2 ** attempt, RETRY_BACKOFF_CAP))
+
+
+async def close_session() -> None:
+    """Close the shared ClientSession and release pooled connections"""
+    global _session
+    if _session is not None:
+        await _session.close()
+        _session = None
 
 class GroqClient:
     def __init__(self, api_key: str = None, model: str = None):
@@ -35,18 +143,127 @@ class GroqClient:
         last_error: Optional[Exception] = None
         for attempt in range(attempts):
             try:
-                response = requests.post(self.base_url, headers=headers, json=payload, timeout=timeout)
+                response = requests.post(self.base_url, headers=headers, data=msgspec.json.encode(payload), timeout=timeout)
                 response.raise_for_status()
-                result = response.json()
+                result = msgspec.json.decode(response.content)
                 return result["choices"][0]["message"]["content"]
             except Exception as e:
                 last_error = e
                 if attempt == attempts - 1:
                     break
 
-        print(f"[GroqClient] Error: {last_error}")
+        logger.warning("Error: %s", last_error)
+        raise last_error
+
+    async def achat_completion(
+        self,
+        messages: List[Dict],
+        temperature: float = 0.5,
+        max_tokens: int = 2000,
+        model: Optional[str] = None,
+        timeout: int = 30,
+    ) -> str:
+        """Async variant of chat_completion over the shared keep-alive session."""
+        payload = {
+            "model": model or self.model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+        return await self.apost_completion(msgspec.json.encode(payload), timeout=timeout)
+
+    async def apost_completion(self, body: bytes, timeout: int = 30) -> str:
+        """Send an already JSON-encoded chat completion body and return the content."""
+        if not self.api_key:
+            raise ValueError("Groq API Key not found in environment or constructor.")
+
+        headers = {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
+
+        breaker.check()
+        last_error: Optional[Exception] = None
+        for attempt in range(RETRY_ATTEMPTS):
+            try:
+                async with get_session().post(
+                    self.base_url,
+                    headers=headers,
+                    data=body,
+                    timeout=request_timeout(timeout)
+                ) as response:
+                    response.raise_for_status()
+                    result = msgspec.json.decode(await response.read())
+                breaker.record_success()
+                return result["choices"][0]["message"]["content"]
+            except Exception as e:
+                last_error = e
+                if not is_transient(e):
+                    break
+                breaker.record_failure()
+                if attempt == RETRY_ATTEMPTS - 1 or breaker.is_open():
+                    break
+                await asyncio.sleep(backoff_delay(attempt))
+
+        logger.warning("Error: %s", last_error)
         raise last_error
 
+    async def astream_chat_completion(
+        self,
+        messages: List[Dict],
+        temperature: float = 0.5,
+        max_tokens: int = 2000,
+        model: Optional[str] = None,
+        timeout: int = 60,
+    ) -> AsyncIterator[str]:
+        """Stream a chat completion, yielding content deltas as they arrive (no retry once started)."""
+        payload = {
+            "model": model or self.model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": True
+        }
+        async for delta in self.astream_completion(msgspec.json.encode(payload), timeout=timeout):
+            yield delta
+
+    async def astream_completion(self, body: bytes, timeout: int = 60) -> AsyncIterator[str]:
+        """Stream an already JSON-encoded chat completion body (which must set "stream": true)."""
+        if not self.api_key:
+            raise ValueError("Groq API Key not found in environment or constructor.")
+
+        headers = {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
+
+        breaker.check()
+        # Entered by hand so the breaker sees connect/status failures but not mid-stream ones
+        response = None
+        try:
+            response = await get_session().post(
+                self.base_url,
+                headers=headers,
+                data=body,
+                timeout=request_timeout(timeout)
+            )
+            response.raise_for_status()
+        except Exception as e:
+            if response is not None:
+                response.release()
+            if is_transient(e):
+                breaker.record_failure()
+            raise
+        breaker.record_success()
+
+        async with response:
+            async for raw_line in response.content:
+                # Server-sent events: "data: {...}" lines, terminated by "data: [DONE]".
+                # Kept as bytes: msgspec parses them directly, no str decode per chunk
+                line = raw_line.strip()
+                if not line.startswith(b"data: "):
+                    continue
+                data = line[6:]
+                if data == b"[DONE]":
+                    break
+                delta = msgspec.json.decode(data)["choices"][0].get("delta", {}).get("content")
+                if delta:
+                    yield delta
+
     def generate_legal_content(self, prompt: str, system_prompt: str = "You are a helpful Indian Legal Assistant.") -> str:
         messages = [
             {"role": "system", "content": system_prompt},
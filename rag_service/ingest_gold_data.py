@@ -73,11 +73,17 @@ def main():
     # Batch Upsert (Scale Handling)
     batch_size = 200
     print(f"\n[Ready] Preparing to insert {len(all_docs)} high-quality legal vectors.")
+
+    # Embed everything up front with the same model RAGEngine queries with, in one
+    # batched pass, instead of letting each add() fall back to the collection default
+    print("-> Precomputing embeddings (all-MiniLM-L6-v2)...")
+    all_embeddings = sentence_transformer_ef(all_docs) if all_docs else []
     
     for i in range(0, len(all_docs), batch_size):
         end = min(i + batch_size, len(all_docs))
         collection.add(
             ids=all_ids[i:end],
+            embeddings=all_embeddings[i:end],
             documents=all_docs[i:end],
             metadatas=all_metas[i:end]
         )
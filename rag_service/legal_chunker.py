@@ -8,9 +8,25 @@ Implements semantic chunking strategy that respects legal document structure:
 - Context overlap for continuity
 """
 
+import os
 import re
-from typing import List, Dict, Optional, Tuple
-from dataclasses import dataclass
+from collections import ChainMap
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Optional, Tuple, Iterable, Iterator, Mapping
+from dataclasses import dataclass, asdict
+
+from token_utils import count_tokens, count_tokens_batch
+
+# Whitespace following sentence-ending punctuation
+SENTENCE_BREAK_RE = re.compile(r'(?<=[.!?])\s+')
+
+# Every section boundary contains one of these, so text with none of them can
+# skip the regex pass (covers the usual casings of the IGNORECASE keywords)
+BOUNDARY_KEYWORDS = tuple(
+    variant
+    for keyword in ("Section", "Article", "Clause", "Chapter", "Part")
+    for variant in (keyword, keyword.upper(), keyword.lower())
+) + ("(",)
 
 
 @dataclass
@@ -22,13 +38,22 @@ class LegalChunk:
     chunk_type: str = "general"  # "statute" | "judgment" | "commentary" | "general"
     start_char: int = 0
     end_char: int = 0
-    metadata: Dict = None
+    metadata: Mapping = None  # per-chunk fields layered over the shared document metadata
     
     def __post_init__(self):
         if self.metadata is None:
             self.metadata = {}
 
 
+@dataclass(frozen=True)
+class ChunkerConfig:
+    """Picklable LegalChunker settings, shipped to worker processes"""
+    target_chunk_size: int = 600
+    min_chunk_size: int = 400
+    max_chunk_size: int = 900
+    overlap_tokens: int = 50
+
+
 class LegalChunker:
     """
     Chunks legal documents at semantic boundaries while preserving structure
@@ -56,28 +81,28 @@ class LegalChunker:
         self.overlap_tokens = overlap_tokens
         
         # Approximate: 1 token ≈ 4 characters for English legal text
+        # (only used to size overlap windows; chunk sizes use real token counts)
         self.chars_per_token = 4
         
-        # Section patterns for Indian legal documents
-        self.section_patterns = [
-            # IPC/BNS style: "Section 302", "Section 123A"
-            r'(?:^|\n)\s*Section\s+(\d+[A-Z]?)\s*[.:\-]',
-            # Article style: "Article 21", "Article 14A"
-            r'(?:^|\n)\s*Article\s+(\d+[A-Z]?)\s*[.:\-]',
+        # Section patterns for Indian legal documents, fused into one alternation
+        # so a single pass yields every boundary already in source order
+        self.section_pattern = re.compile(
+            r'(?:^|\n)\s*(?:'
+            # IPC/BNS style: "Section 302", "Section 123A"; Article style: "Article 21", "Article 14A"
+            r'(?:Section|Article)\s+(?P<section>\d+[A-Z]?)\s*[.:\-]'
             # Clause style: "Clause 5", "Clause (a)"
-            r'(?:^|\n)\s*Clause\s+(\d+|\([a-z]\))\s*[.:\-]',
+            r'|Clause\s+(?P<clause>\d+|\([a-z]\))\s*[.:\-]'
             # Subsection: "(1)", "(2)", "(a)", "(b)"
-            r'(?:^|\n)\s*\((\d+|[a-z])\)\s+',
+            r'|\((?P<subsection>\d+|[a-z])\)\s+'
             # Chapter/Part: "Chapter III", "Part IV"
-            r'(?:^|\n)\s*(Chapter|Part)\s+([IVX]+|\d+)\s*[.:\-]'
-        ]
-        
-        # Compile patterns
-        self.compiled_patterns = [re.compile(p, re.MULTILINE | re.IGNORECASE) for p in self.section_patterns]
+            r'|(?:Chapter|Part)\s+(?P<chapter>[IVX]+|\d+)\s*[.:\-]'
+            r')',
+            re.MULTILINE | re.IGNORECASE
+        )
     
     def _estimate_tokens(self, text: str) -> int:
-        """Estimate token count from character count"""
-        return len(text) // self.chars_per_token
+        """Count tokens with the shared tokenizer (byte-length estimate as fallback)"""
+        return count_tokens(text)
     
     def _detect_section_boundaries(self, text: str) -> List[Tuple[int, str, str]]:
         """
@@ -86,24 +111,17 @@ class LegalChunker:
         Returns:
             List of (position, section_type, section_number) tuples
         """
-        boundaries = []
+        # Cheap substring scans before the regex engine walks the whole text
+        if not any(keyword in text for keyword in BOUNDARY_KEYWORDS):
+            return []
         
-        for pattern in self.compiled_patterns:
-            for match in pattern.finditer(text):
-                pos = match.start()
-                section_type = "section"
-                
-                # Extract section number
-                if "Chapter" in match.group(0) or "Part" in match.group(0):
-                    section_type = "chapter"
-                    section_number = match.group(2) if match.lastindex >= 2 else match.group(1)
-                else:
-                    section_number = match.group(1)
-                
-                boundaries.append((pos, section_type, section_number))
+        boundaries = []
         
-        # Sort by position
-        boundaries.sort(key=lambda x: x[0])
+        for match in self.section_pattern.finditer(text):
+            # Exactly one named group matches per alternative
+            kind = match.lastgroup
+            section_type = "chapter" if kind == "chapter" else "section"
+            boundaries.append((match.start(), section_type, match.group(kind)))
         
         return boundaries
     
@@ -119,7 +137,8 @@ class LegalChunker:
             List of segment dicts with text and metadata
         """
         if not boundaries:
-            return [{"text": text, "section": None, "type": "general"}]
+            start, end = self._stripped_span(text, 0, len(text))
+            return [{"text": text[start:end], "section": None, "type": "general", "start": start, "end": end}]
         
         segments = []
         
@@ -130,166 +149,187 @@ class LegalChunker:
             else:
                 end_pos = len(text)
             
-            segment_text = text[pos:end_pos].strip()
+            start, end = self._stripped_span(text, pos, end_pos)
             
-            if segment_text:
+            if start < end:
                 segments.append({
-                    "text": segment_text,
+                    "text": text[start:end],
                     "section": sec_num,
                     "type": sec_type,
-                    "start": pos,
-                    "end": end_pos
+                    "start": start,
+                    "end": end
                 })
         
         # Add any text before first boundary
         if boundaries[0][0] > 0:
-            preamble = text[:boundaries[0][0]].strip()
-            if preamble:
+            start, end = self._stripped_span(text, 0, boundaries[0][0])
+            if start < end:
                 segments.insert(0, {
-                    "text": preamble,
+                    "text": text[start:end],
                     "section": None,
                     "type": "preamble",
-                    "start": 0,
-                    "end": boundaries[0][0]
+                    "start": start,
+                    "end": end
                 })
         
         return segments
     
-    def _merge_small_segments(self, segments: List[Dict]) -> List[Dict]:
+    @staticmethod
+    def _stripped_span(text: str, start: int, end: int) -> Tuple[int, int]:
+        """Narrow text[start:end] to exclude leading and trailing whitespace"""
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        return start, end
+    
+    def _merge_small_segments(self, segments: Iterable[Dict]) -> Iterator[Dict]:
         """
         Merge segments that are too small
         
         Args:
-            segments: List of segment dicts
+            segments: Iterable of segment dicts
             
-        Returns:
+        Yields:
             Merged segments
         """
-        if not segments:
-            return []
-        
-        merged = []
-        current = segments[0].copy()
+        current = None
         
-        for next_seg in segments[1:]:
-            current_tokens = self._estimate_tokens(current["text"])
-            next_tokens = self._estimate_tokens(next_seg["text"])
+        for next_seg in segments:
+            if current is None:
+                current = next_seg.copy()
+                continue
+            
+            current_tokens = current["tokens"]
+            next_tokens = next_seg["tokens"]
             
             # Merge if current is too small and combined is not too large
             if current_tokens < self.min_chunk_size and (current_tokens + next_tokens) <= self.max_chunk_size:
                 current["text"] += "\n\n" + next_seg["text"]
                 current["end"] = next_seg["end"]
+                current["tokens"] = current_tokens + next_tokens
                 # Keep first section number
             else:
-                merged.append(current)
+                yield current
                 current = next_seg.copy()
         
-        merged.append(current)
-        return merged
+        if current is not None:
+            yield current
     
-    def _split_large_segments(self, segments: List[Dict]) -> List[Dict]:
+    def _split_large_segments(self, segments: Iterable[Dict]) -> Iterator[Dict]:
         """
         Split segments that are too large
         
         Args:
-            segments: List of segment dicts
+            segments: Iterable of segment dicts
             
-        Returns:
-            Split segments
+        Yields:
+            Split segments, with start/end as absolute offsets into the source text
         """
-        result = []
-        
         for seg in segments:
-            tokens = self._estimate_tokens(seg["text"])
+            if seg["tokens"] <= self.max_chunk_size:
+                yield seg
+                continue
             
-            if tokens <= self.max_chunk_size:
-                result.append(seg)
-            else:
-                # Split by sentences
-                sentences = re.split(r'(?<=[.!?])\s+', seg["text"])
-                
-                current_chunk = ""
-                current_start = seg["start"]
-                
-                for sentence in sentences:
-                    test_chunk = current_chunk + " " + sentence if current_chunk else sentence
-                    
-                    if self._estimate_tokens(test_chunk) > self.target_chunk_size and current_chunk:
-                        # Save current chunk
-                        result.append({
-                            "text": current_chunk.strip(),
-                            "section": seg["section"],
-                            "type": seg["type"],
-                            "start": current_start,
-                            "end": current_start + len(current_chunk)
-                        })
-                        current_chunk = sentence
-                        current_start += len(current_chunk)
-                    else:
-                        current_chunk = test_chunk
+            # Split by sentences, remembering where each one starts in the segment
+            seg_text = seg["text"]
+            sentences = []
+            sentence_offsets = []
+            prev_end = 0
+            for match in SENTENCE_BREAK_RE.finditer(seg_text):
+                sentences.append(seg_text[prev_end:match.start()])
+                sentence_offsets.append(prev_end)
+                prev_end = match.end()
+            sentences.append(seg_text[prev_end:])
+            sentence_offsets.append(prev_end)
+            
+            # Count every sentence in one batch and keep a running total instead of
+            # re-joining and re-measuring the growing chunk for every sentence
+            sentence_tokens = count_tokens_batch(sentences)
+            current_parts = []
+            current_tokens = 0
+            chunk_start_idx = 0
+            
+            for i, sentence in enumerate(sentences):
+                new_tokens = current_tokens + sentence_tokens[i]
                 
-                # Add remaining
-                if current_chunk.strip():
-                    result.append({
-                        "text": current_chunk.strip(),
+                if new_tokens > self.target_chunk_size and current_parts:
+                    # Save current chunk (sentences chunk_start_idx .. i-1)
+                    yield {
+                        "text": " ".join(current_parts).strip(),
                         "section": seg["section"],
                         "type": seg["type"],
-                        "start": current_start,
-                        "end": seg["end"]
-                    })
-        
-        return result
+                        "start": seg["start"] + sentence_offsets[chunk_start_idx],
+                        "end": seg["start"] + sentence_offsets[i - 1] + len(sentences[i - 1])
+                    }
+                    current_parts = [sentence]
+                    current_tokens = sentence_tokens[i]
+                    chunk_start_idx = i
+                else:
+                    current_parts.append(sentence)
+                    current_tokens = new_tokens
+            
+            # Add remaining
+            remaining = " ".join(current_parts).strip()
+            if remaining:
+                yield {
+                    "text": remaining,
+                    "section": seg["section"],
+                    "type": seg["type"],
+                    "start": seg["start"] + sentence_offsets[chunk_start_idx],
+                    "end": seg["end"]
+                }
     
-    def _add_overlap(self, chunks: List[LegalChunk]) -> List[LegalChunk]:
+    def _add_overlap(self, chunks: List[LegalChunk], source_text: str) -> List[LegalChunk]:
         """
-        Add overlapping context between chunks
+        Add overlapping context between chunks, in place
+        
+        Overlap windows are read from the source text through each chunk's
+        start/end offsets, so neighbours already extended in this pass are
+        never re-read and no intermediate strings are built per boundary.
         
         Args:
             chunks: List of LegalChunk objects
+            source_text: Document text the chunk offsets refer to
             
         Returns:
-            Chunks with overlap added
+            The same chunks, with overlap added
         """
         if len(chunks) <= 1:
             return chunks
         
-        overlapped = []
         overlap_chars = self.overlap_tokens * self.chars_per_token
+        last = len(chunks) - 1
         
         for i, chunk in enumerate(chunks):
-            text = chunk.text
+            prefix = suffix = ""
             
             # Add suffix from previous chunk
             if i > 0:
-                prev_text = chunks[i - 1].text
-                overlap_prefix = prev_text[-overlap_chars:] if len(prev_text) > overlap_chars else prev_text
+                prev = chunks[i - 1]
+                window_start = max(prev.start_char, prev.end_char - overlap_chars)
                 # Find sentence boundary
-                last_period = overlap_prefix.rfind('.')
-                if last_period > 0:
-                    overlap_prefix = overlap_prefix[last_period + 1:].strip()
-                text = overlap_prefix + " " + text
+                last_period = source_text.rfind('.', window_start, prev.end_char)
+                if last_period > window_start:
+                    prefix = source_text[last_period + 1:prev.end_char].strip()
+                else:
+                    prefix = source_text[window_start:prev.end_char]
             
             # Add prefix from next chunk
-            if i < len(chunks) - 1:
-                next_text = chunks[i + 1].text
-                overlap_suffix = next_text[:overlap_chars] if len(next_text) > overlap_chars else next_text
+            if i < last:
+                nxt = chunks[i + 1]
+                window_end = min(nxt.end_char, nxt.start_char + overlap_chars)
                 # Find sentence boundary
-                first_period = overlap_suffix.find('.')
-                if first_period > 0:
-                    overlap_suffix = overlap_suffix[:first_period + 1].strip()
-                text = text + " " + overlap_suffix
+                first_period = source_text.find('.', nxt.start_char, window_end)
+                if first_period > nxt.start_char:
+                    suffix = source_text[nxt.start_char:first_period + 1].strip()
+                else:
+                    suffix = source_text[nxt.start_char:window_end]
             
-            overlapped.append(LegalChunk(
-                text=text.strip(),
-                section_number=chunk.section_number,
-                parent_section=chunk.parent_section,
-                chunk_type=chunk.chunk_type,
-                start_char=chunk.start_char,
-                end_char=chunk.end_char,
-                metadata=chunk.metadata
-            ))
+            if prefix or suffix:
+                chunk.text = f"{prefix} {chunk.text} {suffix}".strip()
         
-        return overlapped
+        return chunks
     
     def chunk_legal_document(
         self,
@@ -311,35 +351,36 @@ class LegalChunker:
         if not text or not text.strip():
             return []
         
-        metadata = metadata or {}
+        # One private copy per document, shared by reference under every chunk
+        # (a plain dict rather than a read-only proxy so chunks stay picklable)
+        metadata = dict(metadata or {})
         
         # 1. Detect section boundaries
         boundaries = self._detect_section_boundaries(text)
         
-        # 2. Split at boundaries
+        # 2. Split at boundaries, counting tokens for all segments in one batch
         segments = self._split_at_boundaries(text, boundaries)
+        for seg, tokens in zip(segments, count_tokens_batch([seg["text"] for seg in segments])):
+            seg["tokens"] = tokens
         
-        # 3. Merge small segments
-        segments = self._merge_small_segments(segments)
+        # 3-4. Merge small segments, then split large ones (lazily, in one pass)
+        segments = self._split_large_segments(self._merge_small_segments(segments))
         
-        # 4. Split large segments
-        segments = self._split_large_segments(segments)
+        # Determine chunk type from metadata
+        chunk_type = "general"
+        if metadata.get("type") == "statute":
+            chunk_type = "statute"
+        elif metadata.get("type") == "judgment":
+            chunk_type = "judgment"
         
         # 5. Convert to LegalChunk objects
         chunks = []
         for seg in segments:
-            chunk_metadata = metadata.copy()
-            chunk_metadata.update({
+            # Only the per-chunk fields are stored; lookups fall through to the document metadata
+            chunk_metadata = ChainMap({
                 "section": seg.get("section"),
                 "segment_type": seg.get("type")
-            })
-            
-            # Determine chunk type from metadata
-            chunk_type = "general"
-            if metadata.get("type") == "statute":
-                chunk_type = "statute"
-            elif metadata.get("type") == "judgment":
-                chunk_type = "judgment"
+            }, metadata)
             
             chunks.append(LegalChunk(
                 text=seg["text"],
@@ -353,7 +394,7 @@ class LegalChunker:
         
         # 6. Add overlap if requested
         if add_overlap and len(chunks) > 1:
-            chunks = self._add_overlap(chunks)
+            chunks = self._add_overlap(chunks, text)
         
         return chunks
     
@@ -391,3 +432,49 @@ def chunk_legal_text(
     """
     chunker = LegalChunker(target_chunk_size=target_size)
     return chunker.chunk_legal_document(text, metadata)
+
+
+# Per-process chunker for chunk_documents_parallel workers
+_worker_chunker: Optional[LegalChunker] = None
+
+
+def _init_worker(config: ChunkerConfig):
+    global _worker_chunker
+    _worker_chunker = LegalChunker(**asdict(config))
+
+
+def _chunk_in_worker(doc: Tuple[str, Optional[Dict]]) -> List[LegalChunk]:
+    text, metadata = doc
+    return _worker_chunker.chunk_legal_document(text, metadata)
+
+
+def chunk_documents_parallel(
+    docs: List[Tuple[str, Optional[Dict]]],
+    config: Optional[ChunkerConfig] = None,
+    max_workers: Optional[int] = None
+) -> List[List[LegalChunk]]:
+    """
+    Chunk many legal documents across CPU cores (for bulk ingestion)
+    
+    Args:
+        docs: (text, metadata) pairs
+        config: Chunker settings (defaults to LegalChunker defaults)
+        max_workers: Worker processes (defaults to CPU count)
+        
+    Returns:
+        List of LegalChunk lists, one per document, in input order
+    """
+    config = config or ChunkerConfig()
+    
+    # Process startup costs more than chunking a single document
+    if len(docs) <= 1:
+        chunker = LegalChunker(**asdict(config))
+        return [chunker.chunk_legal_document(text, metadata) for text, metadata in docs]
+    
+    max_workers = min(max_workers or os.cpu_count() or 1, len(docs))
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_init_worker,
+        initargs=(config,)
+    ) as executor:
+        return list(executor.map(_chunk_in_worker, docs, chunksize=4))
@@ -0,0 +1,67 @@
+"""
+Logging Utilities
+Component loggers that hand records to a background thread through a queue,
+so request handlers never block the event loop on stdout writes
+"""
+
+import atexit
+import logging
+import os
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_FORMAT = "[%(name)s] %(message)s"
+
+_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_queue_handler = QueueHandler(_queue)
+_listener = None
+
+
+def _console_stream():
+    """
+    stderr re-opened so characters the console encoding can't represent are
+    escaped (e.g. Hindi on a cp1252 Windows console) instead of raising
+    """
+    try:
+        return open(
+            sys.stderr.fileno(), "w",
+            encoding=sys.stderr.encoding or "utf-8",
+            errors="backslashreplace",
+            buffering=1,
+            closefd=False
+        )
+    except (AttributeError, OSError, ValueError):
+        return sys.stderr
+
+
+def _start_listener() -> None:
+    """Start the single background writer on first use"""
+    global _listener
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler(_console_stream())
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    _listener = QueueListener(_queue, stream_handler)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+def get_logger(component: str) -> logging.Logger:
+    """
+    Get a logger whose records are written off the calling thread
+
+    Args:
+        component: Name shown in the log prefix, e.g. "RAGEngine"
+
+    Returns:
+        Configured logger (level from LOG_LEVEL, default INFO)
+    """
+    _start_listener()
+    logger = logging.getLogger(component)
+    if _queue_handler not in logger.handlers:
+        logger.addHandler(_queue_handler)
+        logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+        logger.propagate = False
+    return logger
@@ -3,20 +3,51 @@ LegalAi RAG Service - Groq Powered
 """
 from fastapi import FastAPI, HTTPException, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
 import uvicorn
 import os
-from typing import Optional, List
+import sys
+import asyncio
+import shutil
+import tempfile
+import msgspec
+from typing import Optional, List, Mapping
 from rag_engine import RAGEngine
+from summary_batches import SummaryBatchQueue
+from groq_client import close_session
 from dotenv import load_dotenv
+from log_utils import get_logger
+
+logger = get_logger("API")
 
 # Load environment variables
 load_dotenv()
 
-app = FastAPI(title="LegalAi RAG Service - Groq Powered")
+def _encode_extra(obj):
+    # Cached engine responses are read-only MappingProxyType views
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    raise NotImplementedError(f"Cannot JSON-encode {type(obj).__name__}")
+
+_json_encoder = msgspec.json.Encoder(enc_hook=_encode_extra)
+
+class MsgspecJSONResponse(JSONResponse):
+    """JSON response rendered by msgspec: writes UTF-8 directly instead of ASCII-escaping Hindi text"""
+
+    def render(self, content) -> bytes:
+        return _json_encoder.encode(content)
+
+app = FastAPI(title="LegalAi RAG Service - Groq Powered", default_response_class=MsgspecJSONResponse)
 
 # Initialize RAG Engine
 rag = RAGEngine()
+summary_batches = SummaryBatchQueue(
+    rag,
+    output_dir=os.getenv("SUMMARY_BATCH_DIR", os.path.join(os.path.dirname(__file__), "outputs")),
+    workers=int(os.getenv("SUMMARY_BATCH_WORKERS", "2")),
+    ttl_seconds=float(os.getenv("SUMMARY_BATCH_TTL_SECONDS", str(24 * 60 * 60)))
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -33,23 +64,67 @@ class QueryRequest(BaseModel):
     arguments_mode: bool = False
     analysis_mode: bool = False
 
+class DraftRequest(BaseModel):
+    draft_type: str
+    details: str
+    language: str = "en"
+
+def _finish_background_task(task: asyncio.Task) -> None:
+    app.state.background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Background task %s failed: %s", task.get_coro().__qualname__, task.exception())
+
 @app.on_event("startup")
 async def startup_event():
-    print("\n" + "="*60)
-    print("LEGAL AI SERVICE - INITIALIZED (GROQ POWERED)")
-    print("="*60 + "\n")
+    logger.info("LEGAL AI SERVICE - INITIALIZED (GROQ POWERED)")
+    # Throughput scales with in-flight LLM calls up to the provider's rate limit; tune per deployment
+    logger.info(
+        "Concurrency: GROQ_CONCURRENCY=%s (in-flight LLM calls), GROQ_MAX_PARALLEL=%s (batch fan-out), "
+        "WORKERS=%s (processes)",
+        rag.llm_concurrency, rag.max_parallel, os.getenv("WORKERS") or os.getenv("WEB_CONCURRENCY", "1")
+    )
+    # Warm the shared engine in the background so the port binds immediately; the loop
+    # only holds tasks weakly, so keep them referenced until they finish
+    app.state.background_tasks = set()
+    jobs = [rag.warmup_async()]
+    if os.getenv("PREWARM_DRAFT_PROMPTS", "0") == "1":
+        jobs.append(rag.prewarm_drafts())
+    for job in jobs:
+        task = asyncio.create_task(job)
+        app.state.background_tasks.add(task)
+        task.add_done_callback(_finish_background_task)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    for task in list(app.state.background_tasks):
+        task.cancel()
+    await summary_batches.stop()
+    await asyncio.to_thread(rag.save_semantic_cache)
+    # ai_features is not mounted on this app, so it is not imported at startup;
+    # close its shared session only if something loaded the module
+    features = sys.modules.get("ai_features")
+    if features is not None:
+        await features.close_client()
+    await close_session()
+
+# Uploads are copied to disk in chunks of this size rather than read into memory
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+# Constant status payloads, JSON-encoded once at import
+ROOT_JSON = msgspec.json.encode({"status": "ok", "service": "LegalAi Service", "mode": "Groq-RAG"})
+HEALTH_JSON = msgspec.json.encode({
+    "status": "healthy",
+    "engine": "RAG-ready",
+    "llm": "Groq (llama-3.3-70b)"
+})
 
 @app.get("/")
-def read_root():
-    return {"status": "ok", "service": "LegalAi Service", "mode": "Groq-RAG"}
+async def read_root():
+    return Response(content=ROOT_JSON, media_type="application/json")
 
 @app.get("/health")
-def health_check():
-    return {
-        "status": "healthy",
-        "engine": "RAG-ready",
-        "llm": "Groq (llama-3.3-70b)"
-    }
+async def health_check():
+    return Response(content=HEALTH_JSON, media_type="application/json")
 
 @app.post("/query")
 async def query_rag(request: QueryRequest):
@@ -61,31 +136,131 @@ async def query_rag(request: QueryRequest):
             analysis_mode=request.analysis_mode,
             session_id=request.session_id
         )
-        return result
+        # Returning a Response skips FastAPI's jsonable_encoder pass over the answer and citations
+        return MsgspecJSONResponse(result)
     except Exception as e:
-        print(f"[API] Query Error: {e}")
+        logger.error("Query Error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/query/stream")
+async def query_rag_stream(request: QueryRequest):
+    async def events():
+        try:
+            async for event in rag.stream_query(
+                request.query,
+                language=request.language,
+                arguments_mode=request.arguments_mode,
+                analysis_mode=request.analysis_mode,
+                session_id=request.session_id
+            ):
+                yield msgspec.json.encode(event) + b"\n"
+        except Exception as e:
+            logger.error("Query Stream Error: %s", e)
+            yield msgspec.json.encode({"error": str(e)}) + b"\n"
+
+    # Newline-delimited JSON: answer text deltas, then a final event with citations and parsed sections
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+def _copy_to_temp(source, suffix: str) -> str:
+    """Copy a file object to a named temp file in fixed-size chunks; the caller deletes it"""
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            shutil.copyfileobj(source, out, UPLOAD_CHUNK_SIZE)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+async def spool_upload(file: UploadFile) -> str:
+    """Stream an upload to disk without buffering it whole; returns the temp file path"""
+    suffix = os.path.splitext(file.filename or "")[1]
+    return await asyncio.to_thread(_copy_to_temp, file.file, suffix)
+
 @app.post("/summarize")
 async def summarize_document(file: UploadFile = File(...)):
+    path = None
     try:
-        content = await file.read()
-        summary = await rag.summarize(content, file.filename)
+        path = await spool_upload(file)
+        summary = await rag.summarize(path, file.filename)
         return {"summary": summary, "filename": file.filename}
     except Exception as e:
-        print(f"[API] Summarize Error: {e}")
+        logger.error("Summarize Error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if path:
+            os.remove(path)
+
+@app.post("/summarize/batch")
+async def summarize_documents_batch(files: List[UploadFile] = File(...)):
+    documents = []
+    try:
+        for file in files:
+            documents.append((file.filename, await spool_upload(file)))
+    except Exception:
+        # The queue deletes files it accepts; these were never handed over
+        for _, path in documents:
+            os.remove(path)
+        raise
+    batch_id = await summary_batches.submit(documents)
+    return {"batch_id": batch_id, "total": len(documents), "status": "queued"}
+
+@app.get("/summarize/batch/{batch_id}")
+async def summarize_batch_status(batch_id: str):
+    status = await summary_batches.status(batch_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Unknown batch_id")
+    return status
 
 @app.post("/draft")
 async def draft_document(draft_type: str = Form(...), details: str = Form(...), language: str = Form("en")):
     try:
-        draft = rag.generate_draft(draft_type, details, language=language)
+        draft = await rag.generate_draft(draft_type, details, language=language)
         return {"draft": draft}
     except Exception as e:
-        print(f"[API] Drafting Error: {e}")
+        logger.error("Drafting Error: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/draft/stream")
+async def draft_document_stream(draft_type: str = Form(...), details: str = Form(...), language: str = Form("en")):
+    async def events():
+        try:
+            async for event in rag.stream_draft(draft_type, details, language=language):
+                yield msgspec.json.encode(event) + b"\n"
+        except Exception as e:
+            logger.error("Draft Stream Error: %s", e)
+            yield msgspec.json.encode({"error": str(e)}) + b"\n"
+
+    # Newline-delimited JSON: token deltas with citations, then a final summary event
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+@app.post("/draft/batch")
+async def draft_documents_batch(requests: List[DraftRequest]):
+    try:
+        drafts = await rag.generate_drafts_batch([
+            {"draft_type": r.draft_type, "details": r.details, "language": r.language}
+            for r in requests
+        ])
+        return {"drafts": drafts}
+    except Exception as e:
+        logger.error("Batch Drafting Error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 if __name__ == "__main__":
     # Get port from env for deployment compatibility
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    # WEB_CONCURRENCY is the conventional name PaaS hosts set for the worker count
+    workers = int(os.getenv("WORKERS") or os.getenv("WEB_CONCURRENCY", "1"))
+    # "auto" selects uvloop and httptools when installed (uvloop is not available on Windows).
+    # Keep-alive outlasts typical proxy idle timeouts so clients reuse connections.
+    # Extra workers need the import string; batch summary status is read back from
+    # SUMMARY_BATCH_DIR, so any worker can answer it.
+    uvicorn.run(
+        "main:app" if workers > 1 else app,
+        host="0.0.0.0",
+        port=port,
+        loop="auto",
+        http="auto",
+        timeout_keep_alive=int(os.getenv("KEEP_ALIVE_SECONDS", "75")),
+        workers=workers
+    )
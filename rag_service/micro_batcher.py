@@ -0,0 +1,71 @@
+"""
+Micro-batching
+Background worker that coalesces requests arriving within a short window,
+shared by the embedding, retrieval and feature-call batchers
+"""
+
+import abc
+import asyncio
+from typing import Any, List, Optional, Tuple
+
+from log_utils import get_logger
+
+logger = get_logger("MicroBatcher")
+
+
+class MicroBatcher(abc.ABC):
+    """
+    Coalesces requests arriving within a short window into one batch call.
+    Batches form while the previous one is still running, so they grow
+    with load and a lone request waits at most max_latency.
+    """
+
+    def __init__(self, max_batch_size: int, max_latency: float):
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def _submit(self, item: Any) -> Any:
+        """Queue an item and wait for its result"""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def stop(self) -> None:
+        """Cancel the background worker"""
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_latency
+
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                await self._flush(batch)
+            except Exception as e:
+                # Keep the worker alive and fail whatever the flush left unresolved
+                logger.warning("%s flush failed: %s", type(self).__name__, e)
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    @abc.abstractmethod
+    async def _flush(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        """Resolve every future in the batch"""
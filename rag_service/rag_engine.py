@@ -1,15 +1,501 @@
 
 import os
-import json
 import re
-from typing import List, Dict, Any, Optional
-import chromadb
-from chromadb.utils import embedding_functions
-import requests
-import io
+import asyncio
+import hashlib
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from types import MappingProxyType
+from typing import List, Dict, Any, Callable, Iterable, Mapping, Optional, AsyncIterator, Set, Tuple, Union
+import msgspec
+import numpy as np
 from text_processor import TextProcessor
 from conversation_memory import ConversationMemory
+from semantic_cache import SemanticCache
+from micro_batcher import MicroBatcher
 from groq_client import GroqClient
+from token_utils import count_tokens, get_tokenizer, truncate_tokens
+from log_utils import get_logger
+
+logger = get_logger("RAGEngine")
+
+# Retrieved context limits for the answer prompt
+MAX_CONTEXT_DOCS = 4
+CONTEXT_TOKEN_BUDGET = 2000
+# Citations and related judgments returned with an answer
+MAX_RESPONSE_CITATIONS = 3
+# Embedder warmup input: long enough to hit all-MiniLM-L6-v2's 256-token truncation
+EMBED_WARMUP_TEXT = " ".join(["section"] * 256)
+EMBED_WARMUP_BATCH = 8
+# Retrieved docs whose word 5-gram Jaccard similarity with a kept doc reaches this are dropped
+CONTEXT_DUP_JACCARD = 0.8
+
+# Bounded pool for blocking document extraction (PyMuPDF, OCR); excess uploads queue here
+EXTRACT_POOL = ThreadPoolExecutor(
+    max_workers=int(os.getenv("EXTRACT_WORKERS", "4")),
+    thread_name_prefix="extract"
+)
+
+# Generation budgets: max_tokens tracks an EMA of past output lengths per task,
+# with headroom, never exceeding the task's ceiling
+DRAFT_MAX_TOKENS = 2000
+OUTPUT_EMA_ALPHA = 0.1
+OUTPUT_HEADROOM = 1.25
+MIN_OUTPUT_TOKENS = 256
+
+# Greetings/basic questions that don't need RAG. Whole words only, so "this" or
+# "which" no longer count as "hi"; longer inputs are treated as real questions.
+# Greeting/meta phrases; an input is simple only if it consists of them (fullmatch), so
+# "can you help me get bail" or "hi, what is the punishment for murder" are not
+_SIMPLE_QUERY_RE = re.compile(
+    r"(?:(?:hello|hi|hey|thanks|thank you|what is your name|who are you|what can you do"
+    r"|help|how to use|what are you)(?: (?:there|so much|a lot|this|this app|legalai))?[\s.,!?।]*)+"
+)
+SIMPLE_QUERY_MAX_CHARS = 60
+# Short inputs opening with one of these, followed only by fillers, are greetings. Checked as
+# whole tokens: Devanagari vowel signs are not \w, so \b can't delimit "नमस्ते" inside the regex above.
+GREETING_WORDS = frozenset({"hello", "hi", "hey", "namaste", "namaskar", "नमस्ते", "नमस्कार"})
+GREETING_FILLERS = GREETING_WORDS | {"there", "ji", "sir", "madam", "all", "everyone", "legalai", "जी"}
+GREETING_MAX_TOKENS = 4
+
+# Statute names and core legal terms; queries containing one skip the LLM router.
+# Devanagari terms are matched without \b (vowel signs are not \w).
+_LEGAL_QUERY_RE = re.compile(
+    r"\b(?:section|sec|article|bns|bnss|bsa|ipc|crpc|cpc|sanhita|adhiniyam|constitution|fir"
+    r"|bail|punishment|penalty|offen[cs]e|court|judgment|petition|writ|appeal)\b"
+    r"|धारा|अनुच्छेद|कानून|अदालत|जमानत|सजा"
+)
+
+_DEVANAGARI_RE = re.compile(r"[\u0900-\u097F]")
+
+# Phrases asking for a long-form answer (prefix match, so "details"/"explained" count)
+_LONG_ANSWER_RE = re.compile(r'explain|detail|elaborate|analysis|ingredients', re.IGNORECASE)
+GREETING_CACHE_SIZE = 2048
+# Replies to small deterministic prompts (routing, query translation), reused for repeat queries
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "512"))
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", "300"))
+
+# Answer post-processing patterns, compiled once
+_WHITESPACE_RE = re.compile(r'\s+')
+_SPECIAL_TAG_RE = re.compile(r'\[/?(FACTORS|INTERPRETATIONS|FOR|AGAINST|ARGUMENTS FOR|ARGUMENTS AGAINST)\]', re.IGNORECASE)
+_EXCESS_NEWLINES_RE = re.compile(r'\n{3,}')
+# Markdown code fences (```json / ```) an LLM may wrap JSON output in
+_CODE_FENCE_RE = re.compile(r'```(?:json)?')
+_SECTION_SPLIT_RE = re.compile(
+    r'\[(FACTORS|INTERPRETATIONS|FOR|AGAINST|ARGUMENTS FOR|ARGUMENTS AGAINST|NEUTRAL ANALYSIS|BALANCED ARGUMENTS)\]',
+    re.IGNORECASE
+)
+
+# Statute references in generated text, e.g. "Section 303(2), BNS" or "Section 173 of the BNSS".
+# Spaces only (no newlines) so a citation never straddles the line cursor in stream_draft.
+_CITATION_SECTION_RE = re.compile(
+    r'\bSection[ \t]+(\d+[A-Z]?(?:\(\d+\))?)(?:,?[ \t]*(?:of[ \t]+(?:the[ \t]+)?)?(BNSS|BNS|BSA|IPC|CrPC)\b)?',
+    re.IGNORECASE
+)
+
+
+# Section/article numbers and statute names in a query; paraphrase embeddings barely move
+# between "section 302 ipc" and "section 304 ipc", so these must match exactly for a cache hit
+_QUERY_REFERENCE_RE = re.compile(r'\b\d+[a-z]?\b|\b(?:bnss|bns|bsa|ipc|crpc|cpc|constitution)\b')
+
+
+def _query_references(normalized_query: str) -> str:
+    """Sorted, space-joined section numbers and statute names found in a normalized query."""
+    return " ".join(sorted(set(_QUERY_REFERENCE_RE.findall(normalized_query))))
+
+
+def _extract_section_citations(text: str, seen: Set[Tuple[str, str]]) -> List[Dict[str, Any]]:
+    """Citations in text not already in seen (seen is updated in place)."""
+    found = []
+    for match in _CITATION_SECTION_RE.finditer(text):
+        law = (match.group(2) or "").upper()
+        key = (match.group(1), law)
+        if key in seen:
+            continue
+        seen.add(key)
+        found.append({"source": law or "Statute", "section": f"Section {match.group(1)}"})
+    return found
+
+
+def _law_priority(meta: Dict[str, Any]) -> int:
+    """0 for the new Sanhitas (BNS/BNSS/BSA), 1 for other sources."""
+    law = (meta.get('law') or '').upper()
+    return 0 if 'BNS' in law or 'BSA' in law else 1
+
+
+def _shingles(text: str, n: int = 5) -> Set[Tuple[str, ...]]:
+    """Word n-grams of whitespace/case-normalized text."""
+    words = text.lower().split()
+    return {tuple(words[i:i + n]) for i in range(max(len(words) - n + 1, 1))}
+
+
+def _dedupe_retrieved(docs: List[str], candidates: Iterable[int]) -> List[int]:
+    """Indices from candidates (in order) whose doc doesn't duplicate or nearly duplicate an earlier kept one."""
+    kept = []
+    kept_signatures = set()
+    kept_shingles = []
+    for index in candidates:
+        doc = docs[index]
+        # Exact duplicates (after normalization) are caught without building shingles
+        signature = hash(" ".join(doc[:200].lower().split()))
+        if signature in kept_signatures:
+            continue
+        shingles = _shingles(doc)
+        if any(len(shingles & other) >= CONTEXT_DUP_JACCARD * len(shingles | other) for other in kept_shingles):
+            continue
+        kept.append(index)
+        kept_signatures.add(signature)
+        kept_shingles.append(shingles)
+    return kept
+
+
+@lru_cache(maxsize=None)
+def _tag_pattern(start_tag: str, end_tag: str) -> "re.Pattern":
+    """Compiled pattern capturing the content between a start and end tag."""
+    return re.compile(f"{re.escape(start_tag)}\\s*(.*?)\\s*{re.escape(end_tag)}", re.DOTALL | re.IGNORECASE)
+
+
+def _extract_tag(text: str, start_tag: str, end_tag: str) -> List[str]:
+    """Bullet items between a start and end tag in a generated answer."""
+    # Try exact tag first
+    match = _tag_pattern(start_tag, end_tag).search(text)
+    
+    if not match and "ARGUMENTS" in start_tag:
+        # Fallback for "ARGUMENTS FOR" variations
+        alt_start = start_tag.replace("FOR", "ARGUMENTS FOR").replace("AGAINST", "ARGUMENTS AGAINST")
+        match = _tag_pattern(alt_start, end_tag).search(text)
+
+    if match:
+        content = match.group(1).strip()
+        return [item.strip("- *").strip() for item in content.split("\n") if item.strip()]
+    return []
+
+
+def _parse_answer(raw_answer: str, analysis_mode: bool, arguments_mode: bool) -> Tuple[str, Optional[Dict], Optional[Dict]]:
+    """Split a raw LLM answer into (answer, neutral_analysis, arguments)."""
+    neutral_analysis = None
+    arguments = None
+
+    if analysis_mode:
+        factors = _extract_tag(raw_answer, "[FACTORS]", "[/FACTORS]")
+        interpretations = _extract_tag(raw_answer, "[INTERPRETATIONS]", "[/INTERPRETATIONS]")
+        if factors or interpretations:
+            neutral_analysis = {"factors": factors or ["Analysis pending"], "interpretations": interpretations or ["Further research required"]}
+    
+    if arguments_mode:
+        for_args = _extract_tag(raw_answer, "[FOR]", "[/FOR]")
+        against_args = _extract_tag(raw_answer, "[AGAINST]", "[/AGAINST]")
+        if for_args or against_args:
+            arguments = {"for": for_args or ["N/A"], "against": against_args or ["N/A"]}
+
+    # Remove the special sections from the main answer to avoid duplication
+    # Expanded regex to catch variations like [ARGUMENTS FOR]
+    answer = _SPECIAL_TAG_RE.sub('', raw_answer).strip()
+    
+    # Robust approach: Split by the first occurrence of any special tag
+    # Added NEUTRAL ANALYSIS and BALANCED ARGUMENTS which the LLM was using
+    # One case-insensitive scan finds the earliest tag of any kind
+    split_match = _SECTION_SPLIT_RE.search(answer)
+    if split_match:
+        answer = answer[:split_match.start()].strip()
+
+    # Cleanup
+    answer = _EXCESS_NEWLINES_RE.sub('\n\n', answer).strip()
+    return answer, neutral_analysis, arguments
+
+
+def _direct_answer_response(answer: str) -> Mapping[str, Any]:
+    """Read-only response for answers given without retrieval; cached greetings return it as-is."""
+    return MappingProxyType({
+        "answer": answer,
+        "citations": (),
+        "related_judgments": (),
+        "neutral_analysis": None,
+        "arguments": None
+    })
+
+
+@lru_cache(maxsize=GREETING_CACHE_SIZE)
+def _classify_query_text(query_lower: str) -> str:
+    """
+    'simple' for short greetings/meta questions, 'statute' when the query names a
+    statute or core legal term (no routing needed), otherwise 'legal' (the safe default).
+    """
+    # A legal term anywhere outranks a greeting: "hi, what is bail?" needs retrieval
+    if _LEGAL_QUERY_RE.search(query_lower):
+        return 'statute'
+    if len(query_lower) <= SIMPLE_QUERY_MAX_CHARS:
+        tokens = [token.strip(".,!?।") for token in query_lower.split()]
+        if (tokens and len(tokens) <= GREETING_MAX_TOKENS and tokens[0] in GREETING_WORDS
+                and all(token in GREETING_FILLERS for token in tokens[1:])):
+            return 'simple'
+        if _SIMPLE_QUERY_RE.fullmatch(query_lower):
+            return 'simple'
+    return 'legal'
+
+
+@lru_cache(maxsize=16)
+def _build_router_system_prompt(language: str) -> str:
+    """Static router instructions for one language; the user's input goes in its own message."""
+    return (
+        "You are a Router. Classify the user input.\n"
+        "- If it is a greeting, general chat, or a question NOT about Indian Law, answer it directly and politely. DO NOT say 'I am a router'. Act as LegalAi.\n"
+        "- If it is a specific legal question, OR a request for 'details', 'explanation', 'elaboration', or a follow-up to a previous topic, reply ONLY with the word 'SEARCH'.\n"
+        "- If the input is ambiguous, reply 'SEARCH'.\n"
+        f"- User Language: {language}\n"
+    )
+
+
+# Static instruction text for per-call prompts, built once; only the trailing input varies,
+# so every call shares the same leading bytes
+TRANSLATION_PROMPT_PREFIX = (
+    "Translate the following Hindi legal query to precise English legal terms for a database search. "
+    "Output ONLY the English translation.\nHindi: "
+)
+CHUNK_SUMMARY_PROMPT_PREFIX = (
+    "You are a legal AI assistant. Summarize the following legal text clearly and accurately. "
+    "Preserve legal meaning, mention important sections/clauses, do NOT hallucinate. "
+    "Keep language formal.\n\n"
+    "Text:\n"
+)
+FINAL_SUMMARY_SYSTEM_PROMPT = (
+    "You are an expert Legal Architect AI. "
+    "Using the provided summaries of a legal document, create a single, Master Structured Summary. "
+    "Format strictly in Markdown with the following sections:\n"
+    "### 📌 Executive Summary\n(A concise overview)\n\n"
+    "### 📑 Key Legal Sections Referenced\n(List specific Acts and Sections)\n\n"
+    "### ⚖️ Critical Observations & Findings\n(Key points, obligations, facts)\n\n"
+    "### 📚 Citations & Case Law\n(If any mentioned)\n\n"
+    "### 🔮 Legal Implications\n(What this means for the parties)"
+)
+
+# Byte-identical per language across requests, so provider-side prompt caching can reuse the prefix
+ROUTER_SYSTEM_PROMPTS = {language: _build_router_system_prompt(language) for language in ("en", "hi")}
+
+
+def _build_answer_system_prompt(language: str, is_long: bool, analysis_mode: bool, arguments_mode: bool) -> str:
+    """Assemble the answer system prompt for one combination of language and modes."""
+    system_prompt = (
+        "You are LegalAi, a Senior Advocate of the Supreme Court of India and a Constitutional Scholar.\n\n"
+        "Your expertise covers the Constitution of India, Bharatiya Nyaya Sanhita (BNS), BNSS, BSA, and all major Central/State Acts.\n\n"
+        "CRITICAL KNOWLEDGE (MUST FOLLOW):\n"
+        "1. The Bharatiya Nyaya Sanhita (BNS), Bharatiya Nagarik Suraksha Sanhita (BNSS), and Bharatiya Sakshya Adhiniyam (BSA) ARE THE CURRENT LAWS OF INDIA. They came into effect on July 1, 2024, replacing the IPC, CrPC, and IEA respectively.\n"
+        "2. DO NOT refer to them as 'proposed', 'upcoming', or 'bills'. They are the ACTIVE STATUTES.\n"
+        "3. Use BNS-first logic. For every criminal query, identify the relevant BNS section immediately. Mention IPC ONLY as a secondary historical reference if necessary.\n"
+        "4. Answer REAL-LIFE SCENARIOS by applying the current law to the facts provided. Maintain a objective, analytical tone.\n"
+        "5. CITE YOUR SOURCES. Always include inline citations to the Acts and Sections you reference (e.g., [Section 303(2), BNS]).\n"
+        "6. Always check if the Constitutional Fundamental Rights (Part III) apply to the scenario.\n"
+        "7. If sufficient legal context is not available, say: \"Insufficient verified legal context available.\"\n"
+        "8. Do NOT invent section numbers, punishments, or provisions. Always ensure section references are legally accurate for Indian jurisdiction.\n\n"
+        "STRUCTURE YOUR ANSWER:\n"
+        "1. Direct Answer (1–2 sentences)\n"
+        "2. Constitutional Perspective (if applicable)\n"
+        "3. Relevant Provisions (BNS/BNSS/BSA with citations)\n"
+        "4. Real-life Application/Scenario Analysis\n"
+        "5. Punishment & Consequences\n"
+        "6. Verifiable Source & Citations\n\n"
+        "FORMATTING:\n- Use Markdown with clear headings & bullets.\n- Bold section numbers and Act names.\n"
+        "DISCLAIMER: For informational purposes only. Not legal advice."
+    )
+    if language == "hi":
+        system_prompt += (
+            "\n\nLANGUAGE RULE:\n- Respond fully in Hindi (Devanagari).\n- Section numbers and Act names may remain in English characters.\n"
+            "- Translate legal terms to Hindi where appropriate. Do NOT reply in English."
+        )
+
+    if is_long:
+        system_prompt += (
+            "\n\nLONG-FORM REQUEST:\n"
+            "- Provide a detailed explanation with additional context when possible."
+        )
+
+    if analysis_mode:
+        system_prompt += (
+            "\n[NEUTRAL ANALYSIS REQUESTED]\n"
+            "You must also provide a Neutral Analysis section at the end.\n"
+            "Strictly use this format:\n"
+            "[FACTORS]\n- Factor 1\n- Factor 2\n[/FACTORS]\n"
+            "[INTERPRETATIONS]\n- Interpretation 1\n- Interpretation 2\n[/INTERPRETATIONS]"
+        )
+    
+    if arguments_mode:
+        system_prompt += (
+            "\n[ARGUMENTS REQUESTED]\n"
+            "You must also provide Balanced Arguments at the end.\n"
+            "Strictly use this format:\n"
+            "[FOR]\n- Argument For 1\n- Argument For 2\n[/FOR]\n"
+            "[AGAINST]\n- Argument Against 1\n- Argument Against 2\n[/AGAINST]"
+        )
+    return system_prompt
+
+
+# Every (language, long-form, analysis, arguments) combination, built once at import so
+# repeated queries send a byte-identical system prompt that the provider can cache.
+ANSWER_SYSTEM_PROMPTS = {
+    flags: _build_answer_system_prompt(*flags)
+    for flags in itertools.product(("en", "hi"), (False, True), (False, True), (False, True))
+}
+
+# Cache-augmented generation (opt-in via CAG_CORPUS_PATH): a small curated statute corpus is
+# preloaded into every answer system prompt instead of retrieving per query. The prompt prefix is
+# then identical across requests, so the provider's prompt cache keeps its prefill warm.
+# Corpora above the token limit stay on retrieval.
+CAG_MAX_CORPUS_TOKENS = int(os.getenv("CAG_MAX_CORPUS_TOKENS", "16000"))
+
+
+def _load_cag_corpus(path: str) -> str:
+    """Statute reference text from a provisions JSON file (the ingest_vector.py input format)."""
+    with open(path, "rb") as f:
+        items = msgspec.json.decode(f.read())
+    return "".join([
+        f"---\nSource: {item.get('act', 'General Law')}\n"
+        f"Content: {item.get('act', 'General Law')} - Section {item.get('section', 'N/A')}: "
+        f"{item.get('title', '')}.\n{item.get('description', '')}\n"
+        for item in items
+    ])
+
+
+# Drafting templates (static, shared by every request)
+DOCUMENT_TEMPLATES = {
+    "legal_notice": "## LEGAL NOTICE\nThrough Registered Post / Speed Post / Email\nDate: [Date]\n\nTo,\n[Recipient Name]\n[Recipient Address]\n\n### Subject:\n**Legal Notice under [Applicable Law] regarding [Issue Brief]**\n\nSir/Madam,\n\nUnder instructions and on behalf of my client **[Sender Name]**, residing at [Sender Address], I hereby serve upon you the present legal notice as follows:\n\n### 1. Facts of the Case\nThat my client [Brief Background].\nThat despite requests, you have [Breach Description].\n\n### 2. Legal Provisions\nYour actions amount to violation of:\n- **[Section Name] of [Act Name]**\n- Other applicable provisions of law\n\n### 3. Cause of Action\nThat the cause of action arose on [Date] and continues to subsist.\n\n### 4. Demand\nYou are hereby called upon to:\n- [Specific Demand]\nwithin **[Time Limit] days** from receipt of this notice.\n\n### 5. Consequences\nFailing compliance, my client shall initiate legal proceedings at your risk.\n\nYours faithfully,\n**[Advocate Name]**\nAdvocate for [Sender Name]",
+    
+    "nda": "## NON-DISCLOSURE AGREEMENT (NDA)\n\nThis Agreement is entered into on [Date] between:\n\n**Party A:** [Party A Name], at [Address A]\n**Party B:** [Party B Name], at [Address B]\n\n### 1. Purpose\nThe parties wish to exchange confidential information for [Purpose].\n\n### 2. Definition of Confidential Information\n'Confidential Information' includes all written, oral, electronic information disclosed.\n\n### 3. Obligations\nThe Receiving Party shall:\n- Not disclose confidential information to third parties\n- Use the information solely for the stated purpose\n\n### 4. Exclusions\nInformation publicly available or required by law is excluded.\n\n### 5. Term\nValid for [Duration] years.\n\n### 6. Governing Law\nGoverned by laws of **India**.\n\n### 7. Jurisdiction\nCourts at [City] shall have exclusive jurisdiction.\n\nIN WITNESS WHEREOF, the parties have signed.\n\n**Party A Signature:** __________\n**Party B Signature:** __________",
+    
+    "rent_agreement": "## RENT AGREEMENT\n\nThis Agreement is made on [Date] between:\n\n**Landlord:** [Landlord Name]\n**Tenant:** [Tenant Name]\n\n### 1. Property\nThe Landlord lets out the premises located at [Property Address].\n\n### 2. Rent\nMonthly rent shall be ₹[Rent Amount], payable on or before [Due Date].\n\n### 3. Security Deposit\nTenant shall pay ₹[Security Deposit] as refundable security deposit.\n\n### 4. Term\nValid for [Duration] months.\n\n### 5. Maintenance\nTenant shall maintain the premises and not sublet without permission.\n\n### 6. Termination\nEither party may terminate with [Notice Period] days’ notice.\n\nSigned on [Date].\n\n**Landlord Signature:** _______\n**Tenant Signature:** _______",
+    
+    "affidavit": "## AFFIDAVIT\n\nI, [Deponent Name], aged [Age], residing at [Address], do hereby solemnly affirm:\n\n1. That I am the deponent herein and competent to swear this affidavit.\n2. That [Statement of Facts].\n3. That the statements made herein are true to my knowledge.\n\nVerified at [Place] on [Date].\n\n**DEPONENT SIGNATURE**\n\nSolemnly affirmed before me on [Date].\n\n**Notary / Oath Commissioner**",
+    
+    "employment_contract": "## EMPLOYMENT AGREEMENT\n\nThis Agreement is entered on [Date] between:\n\n**Employer:** [Company Name]\n**Employee:** [Employee Name]\n\n### 1. Designation\nEmployee shall serve as [Designation].\n\n### 2. Duties\nEmployee shall perform duties assigned from time to time.\n\n### 3. Salary\nMonthly remuneration shall be ₹[Salary].\n\n### 4. Confidentiality\nEmployee shall maintain confidentiality during and after employment.\n\n### 5. Termination\nEither party may terminate with [Notice Period] days’ notice.\n\nSigned:\n\nEmployer: _______\nEmployee: _______",
+    
+    "posh_complaint": "## COMPLAINT UNDER POSH ACT, 2013\n\nTo,\nThe Internal Complaints Committee\n[Organization Name]\n\n### Subject:\nComplaint under **Sexual Harassment of Women at Workplace Act, 2013**\n\nI, [Complainant Name], employed as [Designation], submit the following:\n\n### 1. Incident Details\nOn [Date], at [Place], the respondent [Respondent Name] [Description of Harassment].\n\n### 2. Evidence\n[List of Evidence]\n\n### 3. Relief Sought\nI request appropriate inquiry and action under POSH Act.\n\nI affirm the above facts are true.\n\nSignature: ______\nDate: ______",
+    
+    "rti_application": "## APPLICATION UNDER RTI ACT, 2005\n\nTo,\nThe Public Information Officer\n[Department Name]\n\nSubject: Information under RTI Act, 2005\n\nSir/Madam,\n\nKindly provide the following information:\n\n1. [Question 1]\n2. [Question 2]\n\nI have enclosed the application fee of ₹10.\n\nAddress for correspondence: [Address]\n\nDate: [Date]\nApplicant Signature: _______"
+}
+
+DEFAULT_DRAFT_TEMPLATE = "Generate a formal legal document for the user."
+
+
+def _build_draft_system_prompt(template: str, language: str) -> str:
+    """Assemble the static drafting system prompt for one (template, language) pair."""
+    system_prompt = (
+        "You are an Indian Legal Drafting Assistant.\n\n"
+        "TASK:\n"
+        "Fill in the following template based on the user's details. Do not change the legal structure unless necessary.\n\n"
+        f"TEMPLATE:\n{template}\n\n"
+        "RULES:\n"
+        "- Replace placeholders like [Name], [Date] with actual info from user input.\n"
+        "- If info is missing, keep the placeholder or make a reasonable inference (e.g., 'Date: Today').\n"
+        "- OUTPUT ONLY THE DOCUMENT CONTENT.\n"
+        "- Add a disclaimer at the very bottom.\n\n"
+    )
+
+    if language == 'hi':
+        system_prompt += (
+            "CRITICAL LANGUAGE RULE: Respond FULLY in Hindi (Devanagari script).\n"
+            "Use formal legal Hindi (Vidhi Hindi).\n"
+        )
+    else:
+        system_prompt += "Respond in English."
+    return system_prompt
+
+
+# Precomputed drafting system prompts keyed by (draft_type, language). The prompt is
+# identical across calls for a key, so provider-side prefix caching can reuse it.
+DRAFT_SYSTEM_PROMPTS = {
+    (draft_type, language): _build_draft_system_prompt(template, language)
+    for draft_type, template in DOCUMENT_TEMPLATES.items()
+    for language in ("en", "hi")
+}
+
+DRAFT_DETAILS_PREFIX = "Details for draft:\n"
+# Closes the user message and the body; filled with max_tokens and stream per request
+_DRAFT_BODY_TAIL = b'"}],"max_tokens":%d,"stream":%b}'
+
+
+def _encode_draft_body_prefix(model: str, system_prompt: str) -> bytes:
+    """JSON request body for a draft, cut off where the user's details are spliced in."""
+    head = msgspec.json.encode({
+        "model": model,
+        "temperature": 0.5,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": DRAFT_DETAILS_PREFIX}
+        ]
+    })
+    # Drop the closing quote of the user content and the closing '}]}'
+    return head[:-4]
+
+
+def _encode_draft_body(prefix: bytes, details: str, max_tokens: int, stream: bool = False) -> bytes:
+    """Complete a pre-encoded draft body; only the user's details are encoded per call."""
+    return prefix + msgspec.json.encode(details)[1:-1] + _DRAFT_BODY_TAIL % (max_tokens, b"true" if stream else b"false")
+
+
+class EmbeddingBatcher(MicroBatcher):
+    """Coalesces query embeddings requested within a short window into one embedder call."""
+
+    def __init__(self, embed_batch: Callable[[List[str]], Optional[list]], max_batch_size: int = 32, max_latency: float = 0.005):
+        super().__init__(max_batch_size, max_latency)
+        self.embed_batch = embed_batch
+
+    async def embed(self, text: str):
+        """Queue a text and wait for its embedding (None if embedding is unavailable)"""
+        return await self._submit(text)
+
+    async def _flush(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        # Identical texts in a batch are encoded once
+        texts = list(dict.fromkeys(text for text, _ in batch))
+        try:
+            embeddings = await asyncio.to_thread(self.embed_batch, texts)
+        except Exception as e:
+            logger.warning("Batch embedding failed: %s", e)
+            embeddings = None
+        by_text = dict(zip(texts, embeddings)) if embeddings is not None else {}
+
+        for text, future in batch:
+            if not future.done():
+                future.set_result(by_text.get(text))
+
+
+class RetrievalBatcher(MicroBatcher):
+    """
+    Coalesces vector searches requested within a short window into one
+    Chroma query over several embeddings, then hands each request its row.
+    """
+
+    def __init__(self, search_batch: Callable[[List[Any]], Optional[Dict[str, Any]]], max_batch_size: int = 16, max_latency: float = 0.008):
+        super().__init__(max_batch_size, max_latency)
+        self.search_batch = search_batch
+
+    async def search(self, embedding) -> Optional[Dict[str, Any]]:
+        """Queue a query embedding and wait for its Chroma-shaped single-query result (None if the DB is unavailable)"""
+        return await self._submit(embedding)
+
+    async def _flush(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        try:
+            results = await asyncio.to_thread(self.search_batch, [embedding for embedding, _ in batch])
+        except Exception as e:
+            # Each caller handles the failure as it did its own query's
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for row, (_, future) in enumerate(batch):
+            if future.done():
+                continue
+            if results is None:
+                future.set_result(None)
+            else:
+                future.set_result({
+                    key: [(results.get(key) or [])[row]]
+                    for key in ("documents", "metadatas", "distances")
+                })
+
 
 class RAGEngine:
     def __init__(self):
@@ -20,10 +506,10 @@ class RAGEngine:
         
         if self.api_key:
             self.groq = GroqClient(self.api_key, self.model_name)
-            print(f"[RAGEngine] Groq Key Found. Using Model: {self.model_name}")
+            logger.info("Groq Key Found. Using Model: %s", self.model_name)
         else:
             self.groq = None
-            print("[RAGEngine] ⚠️ Warning: GROQ_API_KEY not found. LLM features disabled.")
+            logger.warning("GROQ_API_KEY not found. LLM features disabled.")
 
         # Initialize Enhanced Text Processor
         self.text_processor = TextProcessor()
@@ -32,62 +518,194 @@ class RAGEngine:
         self.conversation_memory = ConversationMemory()
         # Simple in-memory response cache
         self._cache: Dict[str, Dict[str, Any]] = {}
+        # LRU of (expiry, reply) for _acall_llm(cache=True), keyed by model, budget and prompt digest
+        self._llm_cache: "OrderedDict[Tuple[Optional[str], int, bytes], Tuple[float, str]]" = OrderedDict()
+        # Calls currently running for those keys, awaited by every identical request
+        self._llm_inflight: Dict[Tuple[Optional[str], int, bytes], asyncio.Future] = {}
+        # Exact-match LRU of greeting replies keyed by (normalized query, language)
+        self._greeting_cache: "OrderedDict[Tuple[str, str], Mapping[str, Any]]" = OrderedDict()
+        # Embedding-keyed cache so paraphrased queries reuse earlier answers
+        self.semantic_cache = SemanticCache(
+            threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95")),
+            ttl_seconds=float(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", str(24 * 60 * 60)))
+        )
+        # Optional file prefix; the cache is reloaded here and saved on shutdown
+        self.semantic_cache_path = os.getenv("SEMANTIC_CACHE_PATH")
+        if self.semantic_cache_path:
+            try:
+                loaded = self.semantic_cache.load(self.semantic_cache_path)
+                logger.info("Semantic cache restored: %s entries", loaded)
+            except Exception as e:
+                logger.warning("Semantic cache restore failed: %s", e)
+        # Upper bound on concurrent LLM calls from batch helpers
+        self.max_parallel = int(os.getenv("GROQ_MAX_PARALLEL", "4"))
+        # Concurrent queries share batched embedder calls
+        self._embedding_batcher = EmbeddingBatcher(
+            self._embed_queries,
+            max_batch_size=int(os.getenv("EMBED_BATCH_SIZE", "32")),
+            max_latency=float(os.getenv("EMBED_BATCH_WINDOW_MS", "5")) / 1000
+        )
+        # Concurrent queries share one Chroma search over all their embeddings
+        self._retrieval_batcher = RetrievalBatcher(
+            self._search_embeddings,
+            max_batch_size=int(os.getenv("RETRIEVAL_BATCH_SIZE", "16")),
+            max_latency=float(os.getenv("RETRIEVAL_BATCH_WINDOW_MS", "8")) / 1000
+        )
+        # Upper bound on in-flight Groq calls across all requests served by this engine
+        self.llm_concurrency = int(os.getenv("GROQ_CONCURRENCY", "8"))
+        self._llm_semaphore = asyncio.Semaphore(self.llm_concurrency)
+        # Running average of output tokens per task (draft type / answer mode)
+        self._output_length_ema: Dict[tuple, float] = {}
+        # Static part of every draft request body, JSON-encoded once per (draft_type, language)
+        self._draft_body_prefixes: Dict[Tuple[str, str], bytes] = {
+            key: _encode_draft_body_prefix(self.model_simple, system_prompt)
+            for key, system_prompt in DRAFT_SYSTEM_PROMPTS.items()
+        }
+
+        # Answer system prompts with the preloaded statute corpus; None keeps the RAG path
+        self._cag_system_prompts = self._load_cag_prompts(os.getenv("CAG_CORPUS_PATH"))
 
         # Lazy initialization placeholders
         self.db_client = None
         self.ef = None
         self.collection = None
+        self._collection_lock = threading.Lock()
         
         # Determine Chroma path
         base_dir = os.path.dirname(os.path.abspath(__file__))
         self.chroma_path = os.path.join(base_dir, "chroma_db")
 
+    def _load_cag_prompts(self, path: Optional[str]) -> Optional[Dict[tuple, str]]:
+        """Answer system prompts carrying the CAG corpus, or None if CAG is off or the corpus is too large."""
+        if not path:
+            return None
+        try:
+            corpus = _load_cag_corpus(path)
+        except Exception as e:
+            logger.warning("CAG corpus unavailable (%s). Using retrieval.", e)
+            return None
+        corpus_tokens = count_tokens(corpus)
+        if corpus_tokens > CAG_MAX_CORPUS_TOKENS:
+            logger.warning("CAG corpus is %s tokens (limit %s). Using retrieval.", corpus_tokens, CAG_MAX_CORPUS_TOKENS)
+            return None
+        logger.info("CAG enabled: %s-token statute corpus preloaded from %s", corpus_tokens, path)
+        return {
+            flags: f"{prompt}\n\nStatute reference (answer from these provisions):\n{corpus}"
+            for flags, prompt in ANSWER_SYSTEM_PROMPTS.items()
+        }
+
     def _get_collection(self):
         """Lazy load the vector database collection."""
         if self.collection is not None:
             return self.collection
-            
-        print(f"[RAGEngine] Initializing Vector DB connection (Lazy Mode)...")
+
+        # Warmup and early requests call this from different worker threads; without the
+        # lock each would open its own client and load its own copy of the embedding model
+        with self._collection_lock:
+            if self.collection is not None:
+                return self.collection
+
+            logger.info("Initializing Vector DB connection (Lazy Mode)...")
+            try:
+                # Imported here so workers bind their port before paying for chromadb/sentence-transformers
+                import chromadb
+                from chromadb.utils import embedding_functions
+
+                if self.db_client is None:
+                    self.db_client = chromadb.PersistentClient(path=self.chroma_path)
+                
+                if self.ef is None:
+                    logger.info("Loading Embedding Model: all-MiniLM-L6-v2")
+                    self.ef = embedding_functions.SentenceTransformerEmbeddingFunction(model_name="all-MiniLM-L6-v2")
+                
+                self.collection = self.db_client.get_collection(name="legal_knowledge", embedding_function=self.ef)
+                logger.info("Connected to Vector DB. (%s docs)", self.collection.count())
+                return self.collection
+            except Exception as e:
+                 logger.warning("Vector DB Error: %s", e)
+                 return None
+
+    def warmup(self):
+        """Load the vector DB and embedding model ahead of the first query."""
+        collection = self._get_collection()
+        if collection is None:
+            return
         try:
-            if self.db_client is None:
-                self.db_client = chromadb.PersistentClient(path=self.chroma_path)
-            
-            if self.ef is None:
-                print(f"[RAGEngine] Loading Embedding Model: all-MiniLM-L6-v2")
-                self.ef = embedding_functions.SentenceTransformerEmbeddingFunction(model_name="all-MiniLM-L6-v2")
-            
-            self.collection = self.db_client.get_collection(name="legal_knowledge", embedding_function=self.ef)
-            print(f"[RAGEngine] Connected to Vector DB. ({self.collection.count()} docs)")
-            return self.collection
+            # One tiny query forces the embedding model weights into memory
+            collection.query(query_texts=["warmup"], n_results=1)
+            if os.getenv("WARMUP_EMBEDDINGS", "1") == "1" and self.ef is not None:
+                # A batch of max-length inputs, so the first real batch doesn't pay for
+                # first-use allocation and kernel selection at a new input shape
+                start = time.perf_counter()
+                self.ef([EMBED_WARMUP_TEXT] * EMBED_WARMUP_BATCH)
+                logger.info("Embedding warmup: %.2fs", time.perf_counter() - start)
+            logger.info("Warmup complete.")
+        except Exception as e:
+            logger.warning("Warmup Error: %s", e)
+
+    async def warmup_async(self):
+        """
+        warmup() and the tokenizer load side by side in worker threads. They
+        touch disjoint state, so cold start costs the slower of the two
+        rather than their sum.
+        """
+        await asyncio.gather(asyncio.to_thread(self.warmup), asyncio.to_thread(get_tokenizer))
+
+    def save_semantic_cache(self) -> None:
+        """Persist the semantic cache to SEMANTIC_CACHE_PATH, if configured."""
+        if not self.semantic_cache_path:
+            return
+        try:
+            saved = self.semantic_cache.save(self.semantic_cache_path)
+            logger.info("Semantic cache saved: %s entries", saved)
+        except Exception as e:
+            logger.warning("Semantic cache save failed: %s", e)
+
+    def _search_embeddings(self, embeddings: List[Any]) -> Optional[Dict[str, Any]]:
+        """Top statute/judgment chunks for several query embeddings in one Chroma call (None if unavailable)."""
+        collection = self._get_collection()
+        if collection is None:
+            return None
+        return collection.query(
+            query_embeddings=[list(map(float, embedding)) for embedding in embeddings],
+            n_results=5,
+            include=["documents", "metadatas", "distances"]
+        )
+
+    def _embed_queries(self, texts: List[str]) -> Optional[list]:
+        """Embed queries in one call with the retrieval embedding model (None if unavailable)."""
+        if self._get_collection() is None or self.ef is None:
+            return None
+        try:
+            return list(self.ef(texts))
         except Exception as e:
-             print(f"[RAGEngine] ⚠️ Vector DB Error: {e}")
-             return None
+            logger.warning("Query embedding failed: %s", e)
+            return None
+
+    async def prewarm_drafts(self):
+        """
+        Send one 1-token request per (draft_type, language) system prompt so the
+        connection pool is open and the provider has seen each static prefix
+        before the first real draft. Costs prompt tokens, so it is opt-in.
+        """
+        if not self.groq:
+            return
+        semaphore = asyncio.Semaphore(self.max_parallel)
+
+        async def prewarm(key: Tuple[str, str], prefix: bytes):
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    await self.groq.apost_completion(_encode_draft_body(prefix, "", 1))
+                    logger.info("Prewarmed draft prompt %s in %.2fs", key, time.perf_counter() - start)
+                except Exception as e:
+                    logger.warning("Prewarm failed for %s: %s", key, e)
+
+        await asyncio.gather(*(prewarm(key, prefix) for key, prefix in self._draft_body_prefixes.items()))
 
     def _classify_query(self, query: str) -> str:
-        """Classify query as 'simple' or 'legal' for optimization."""
-        query_lower = query.lower()
-        
-        # Simple greetings/basic questions that don't need RAG
-        simple_patterns = [
-            'hello', 'hi', 'hey', 'thanks', 'thank you',
-            'what is your name', 'who are you', 'what can you do',
-            'help', 'how to use', 'what are you'
-        ]
-        
-        if any(pattern in query_lower for pattern in simple_patterns):
-            return 'simple'
-        
-        # Legal queries need full RAG pipeline
-        legal_patterns = [
-            'section', 'ipc', 'bns', 'law', 'legal', 'penalty', 'punishment',
-            'act', 'case', 'judgment', 'court', 'crime', 'offence', 'right'
-        ]
-        
-        if any(pattern in query_lower for pattern in legal_patterns):
-            return 'legal'
-        
-        # Default to legal for safety
-        return 'legal'
+        """Classify query as 'simple', 'statute' or 'legal' for optimization."""
+        return _classify_query_text(query.lower())
     
     def _call_llm(self, messages: List[Dict], max_tokens: int = 1500, timeout: int = 30, model_override: Optional[str] = None) -> str:
         """Helper to call Groq API with timeout."""
@@ -102,12 +720,75 @@ class RAGEngine:
                 timeout=timeout,
             )
         except Exception as e:
-            print(f"[RAGEngine] Groq request failed: {e}")
+            logger.warning("Groq request failed: %s", e)
+            raise e
+
+    async def _acall_llm(self, messages: List[Dict], max_tokens: int = 1500, timeout: int = 30, model_override: Optional[str] = None, cache: bool = False) -> str:
+        """
+        Async helper to call Groq API over the pooled session without blocking the event loop.
+        With cache=True, an identical request made within LLM_CACHE_TTL_SECONDS is answered
+        from memory and identical concurrent requests share one upstream call; use it only
+        where any earlier reply to the same prompt is acceptable.
+        """
+        if not self.groq:
+            raise Exception("Groq Client not initialized (API Key missing)")
+
+        if not cache:
+            return await self._post_llm(messages, max_tokens, timeout, model_override)
+
+        digest = hashlib.blake2b(msgspec.json.encode(messages), digest_size=16).digest()
+        cache_key = (model_override, max_tokens, digest)
+        entry = self._llm_cache.get(cache_key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._llm_cache.move_to_end(cache_key)
+                return entry[1]
+            del self._llm_cache[cache_key]
+
+        pending = self._llm_inflight.get(cache_key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._post_llm(messages, max_tokens, timeout, model_override))
+            self._llm_inflight[cache_key] = pending
+            pending.add_done_callback(lambda task: self._store_llm_reply(cache_key, task))
+        # Shielded so one caller being cancelled doesn't cancel the call for the others
+        return await asyncio.shield(pending)
+
+    async def _post_llm(self, messages: List[Dict], max_tokens: int, timeout: int, model_override: Optional[str]) -> str:
+        try:
+            async with self._llm_semaphore:
+                return await self.groq.achat_completion(
+                    messages,
+                    max_tokens=max_tokens,
+                    model=model_override,
+                    timeout=timeout,
+                )
+        except Exception as e:
+            logger.warning("Groq request failed: %s", e)
             raise e
 
+    def _store_llm_reply(self, cache_key: Tuple[Optional[str], int, bytes], task: asyncio.Future) -> None:
+        """Done callback for a shared call: drop it from the in-flight map and cache a successful reply."""
+        self._llm_inflight.pop(cache_key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        self._llm_cache[cache_key] = (time.monotonic() + LLM_CACHE_TTL_SECONDS, task.result())
+        self._llm_cache.move_to_end(cache_key)
+        if len(self._llm_cache) > LLM_CACHE_SIZE:
+            self._llm_cache.popitem(last=False)
+
+    def _adaptive_max_tokens(self, key: tuple, ceiling: int) -> int:
+        """Generation budget for a task: EMA of past output lengths plus headroom, capped at ceiling."""
+        ema = self._output_length_ema.get(key, ceiling)
+        return min(ceiling, max(MIN_OUTPUT_TOKENS, int(ema * OUTPUT_HEADROOM)))
+
+    def _record_output_length(self, key: tuple, text: str, ceiling: int) -> None:
+        """Fold a finished generation's length into the task's EMA (seeded at the ceiling)."""
+        ema = self._output_length_ema.get(key, ceiling)
+        self._output_length_ema[key] = (1 - OUTPUT_EMA_ALPHA) * ema + OUTPUT_EMA_ALPHA * count_tokens(text)
+
     def _clean_text(self, text: str) -> str:
         """Cleans extracted text by normalizing whitespace."""
-        return re.sub(r'\s+', ' ', text).strip()
+        return _WHITESPACE_RE.sub(' ', text).strip()
 
     def _chunk_text(self, text: str, chunk_size: int = 4000) -> List[str]:
         """Splits text into chunks of approx chunk_size characters (roughly 1000 tokens)."""
@@ -116,93 +797,97 @@ class RAGEngine:
             chunks.append(text[i:i + chunk_size])
         return chunks
 
-    async def summarize(self, file_content: bytes, filename: str) -> str:
+    def _extract_document(self, file_content: Union[bytes, str], filename: str):
+        """
+        Extract and clean document text (blocking; run in EXTRACT_POOL).
+        file_content is the raw bytes or a path to the uploaded file on disk.
+        Returns (cleaned_text, extraction_method, detected_lang), or an error message string.
+        """
+        # 1. Extract Text (Enhanced with multi-modal support)
+        if filename.lower().endswith(".pdf"):
+            full_text, extraction_method = self.text_processor.extract_text_from_pdf(
+                file_content, filename, max_ocr_pages=100
+            )
+            
+            if extraction_method == "failed":
+                return full_text  # Error message
+        else:
+            if isinstance(file_content, str):
+                with open(file_content, "rb") as f:
+                    file_content = f.read()
+            full_text = file_content.decode("utf-8", errors="ignore")
+            extraction_method = "text"
+
+        if not full_text.strip():
+            return "Error: Could not extract text from document."
+
+        # 2. Clean with 12-stage pipeline
+        cleaned_text = self.text_processor.clean_text(full_text)
+        
+        # 3. Detect language
+        detected_lang = self.text_processor.detect_language(cleaned_text)
+        return cleaned_text, extraction_method, detected_lang
+
+    async def summarize(self, file_content: Union[bytes, str], filename: str) -> str:
         """
         Advanced Summarization Pipeline: Extract -> Clean -> Chunk -> Summarize Parts -> Combine.
         Uses enhanced text processor with multi-modal extraction and 12-stage cleaning.
+        file_content may be the document bytes or a path to it on disk, which keeps
+        large uploads out of memory until the extractor reads them.
         """
-        print(f"[RAGEngine] Processing file: {filename} ({len(file_content)} bytes)")
-        
-        full_text = ""
-        extraction_method = "unknown"
+        logger.info("Processing file: %s", filename)
         
         try:
-            # 1. Extract Text (Enhanced with multi-modal support)
-            if filename.lower().endswith(".pdf"):
-                full_text, extraction_method = self.text_processor.extract_text_from_pdf(
-                    file_content, filename, max_ocr_pages=100
-                )
-                
-                if extraction_method == "failed":
-                    return full_text  # Error message
-            else:
-                full_text = file_content.decode("utf-8", errors="ignore")
-                extraction_method = "text"
-
-            if not full_text.strip():
-                return "Error: Could not extract text from document."
-
-            # 2. Clean with 12-stage pipeline
-            cleaned_text = self.text_processor.clean_text(full_text)
-            print(f"[RAGEngine] Extracted {len(cleaned_text)} characters using {extraction_method}.")
-            
-            # 3. Detect language
-            detected_lang = self.text_processor.detect_language(cleaned_text)
-            print(f"[RAGEngine] Detected language: {detected_lang}")
+            # 1-3. Extract, clean and detect language in the extraction pool: PDF parsing
+            # and OCR are CPU-bound and would otherwise stall every other request
+            loop = asyncio.get_running_loop()
+            extracted = await loop.run_in_executor(EXTRACT_POOL, self._extract_document, file_content, filename)
+            if isinstance(extracted, str):
+                return extracted  # Error message
+            cleaned_text, extraction_method, detected_lang = extracted
+            logger.info("Extracted %s characters using %s.", len(cleaned_text), extraction_method)
+            logger.info("Detected language: %s", detected_lang)
 
             # 3. Chunk
             chunks = self._chunk_text(cleaned_text, chunk_size=8000) # ~ 2000 tokens
-            print(f"[RAGEngine] Created {len(chunks)} chunks.")
+            logger.info("Created %s chunks.", len(chunks))
 
             if not self.api_key:
                 return f"LLM not configured. Extracted {len(cleaned_text)} chars. Start: {cleaned_text[:500]}..."
 
-            # 4. Summarize Chunks
-            chunk_summaries = []
-            
+            # 4. Summarize Chunks (independent calls, fanned out under the LLM semaphore)
             # Limit chunks to avoid timeouts (MVP limit: first 5 chunks)
             max_chunks = 5
-            for i, chunk in enumerate(chunks[:max_chunks]):
-                print(f"[RAGEngine] Summarizing chunk {i+1}/{min(len(chunks), max_chunks)}...")
-                prompt = (
-                    "You are a legal AI assistant. Summarize the following legal text clearly and accurately. "
-                    "Preserve legal meaning, mention important sections/clauses, do NOT hallucinate. "
-                    "Keep language formal.\n\n"
-                    f"Text:\n{chunk}"
-                )
+            selected = chunks[:max_chunks]
+
+            async def summarize_chunk(i: int, chunk: str) -> Optional[str]:
+                logger.debug("Summarizing chunk %s/%s...", i+1, len(selected))
                 try:
-                    summary = self._call_llm([{"role": "user", "content": prompt}], max_tokens=600)
-                    chunk_summaries.append(summary)
+                    return await self._acall_llm([{"role": "user", "content": CHUNK_SUMMARY_PROMPT_PREFIX + chunk}], max_tokens=600)
                 except Exception as e:
-                    print(f"[RAGEngine] Chunk {i+1} failed: {e}")
+                    logger.warning("Chunk %s failed: %s", i+1, e)
+                    return None
+
+            results = await asyncio.gather(*(summarize_chunk(i, chunk) for i, chunk in enumerate(selected)))
+            # Keep document order; drop failed chunks
+            chunk_summaries = [summary for summary in results if summary is not None]
             
             if not chunk_summaries:
                 return "Error: Failed to generate any summaries."
 
             # 5. Combine -> Final Structured Summary
-            print("[RAGEngine] Generating Final Structured Summary...")
+            logger.info("Generating Final Structured Summary...")
             combined_text = "\n\n".join(chunk_summaries)
             
-            final_system_prompt = (
-                "You are an expert Legal Architect AI. "
-                "Using the provided summaries of a legal document, create a single, Master Structured Summary. "
-                "Format strictly in Markdown with the following sections:\n"
-                "### 📌 Executive Summary\n(A concise overview)\n\n"
-                "### 📑 Key Legal Sections Referenced\n(List specific Acts and Sections)\n\n"
-                "### ⚖️ Critical Observations & Findings\n(Key points, obligations, facts)\n\n"
-                "### 📚 Citations & Case Law\n(If any mentioned)\n\n"
-                "### 🔮 Legal Implications\n(What this means for the parties)"
-            )
-
-            final_summary = self._call_llm([
-                {"role": "system", "content": final_system_prompt},
+            final_summary = await self._acall_llm([
+                {"role": "system", "content": FINAL_SUMMARY_SYSTEM_PROMPT},
                 {"role": "user", "content": f"Summaries:\n{combined_text}"}
             ], max_tokens=1500)
 
             return final_summary
 
         except Exception as e:
-            print(f"[RAGEngine] Summarization Pipeline Error: {e}")
+            logger.warning("Summarization Pipeline Error: %s", e)
             return f"Failed to summarize document: {str(e)}"
 
     async def compare_clauses(self, text1: str, text2: str) -> dict:
@@ -229,21 +914,20 @@ class RAGEngine:
         user_query = f"Clause A (Old/IPC): {text1}\n\nClause B (New/BNS): {text2}"
 
         try:
-            response_text = self._call_llm([
+            response_text = await self._acall_llm([
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_query}
             ])
             
             # Clean up potential markdown code blocks if the LLM ignores instructions
-            cleaned_text = response_text.replace("```json", "").replace("```", "").strip()
+            cleaned_text = _CODE_FENCE_RE.sub("", response_text).strip()
             
-            import json
             try:
                 # Attempt to parse JSON
-                analysis_json = json.loads(cleaned_text)
+                analysis_json = msgspec.json.decode(cleaned_text)
                 return analysis_json
-            except json.JSONDecodeError:
-                print(f"[RAGEngine] JSON Parse Error. Raw: {cleaned_text}")
+            except msgspec.DecodeError:
+                logger.warning("JSON Parse Error. Raw: %s", cleaned_text)
                 # Fallback to simple text if JSON fails
                 return {
                     "change_type": "Analysis Generated",
@@ -254,86 +938,14 @@ class RAGEngine:
                 }
 
         except Exception as e:
-            print(f"[RAGEngine] Compare Error: {e}")
+            logger.warning("Compare Error: %s", e)
             return {"error": str(e)}
 
-    async def query(self, query: str, language: str = "en", arguments_mode: bool = False, analysis_mode: bool = False, session_id: Optional[str] = None) -> Dict[str, Any]:
+    async def _retrieve(self, query: str, language: str, query_embedding=None) -> Tuple[str, List[Dict], List[Dict]]:
         """
-        Semantic Search + LLM Generation with Conversation Memory.
-        
-        Args:
-            query: User's question
-            language: 'en' or 'hi'
-            arguments_mode: Generate balanced arguments
-            analysis_mode: Generate neutral analysis
-            session_id: Optional session ID for conversation memory
+        Translate (for Hindi) and search the vector DB for a query.
+        Returns (context_text, citations, related_judgments); never raises.
         """
-        # Handle conversation memory and query reformulation
-        original_query = query
-        if session_id:
-            self.conversation_memory.add_message(session_id, "user", original_query)
-
-        if session_id:
-            query = self.conversation_memory.reformulate_query(session_id, query)
-            if query != original_query:
-                print(f"[RAGEngine] Query reformulated: '{original_query}' -> '{query}'")
-        
-        # Safe print for Windows consoles (handles Hindi chars)
-        safe_query = query.encode('ascii', 'replace').decode('ascii')
-        print(f"[RAGEngine] Semantic Query: {safe_query} (Lang: {language})")
-
-        LONG_TRIGGERS = ["explain", "detail", "elaborate", "analysis", "ingredients"]
-        is_long = any(t in query.lower() for t in LONG_TRIGGERS)
-
-        # 0. Smart Routing: rule-based first, LLM as optional fallback
-        query_type = self._classify_query(query)
-        if query_type == 'simple':
-            # Use lightweight model for general chat
-            try:
-                greeting_prompt = (
-                    "You are LegalAi. Answer the user's general question or greeting briefly and politely."
-                )
-                routing_response = self._call_llm([
-                    {"role": "system", "content": greeting_prompt},
-                    {"role": "user", "content": query}
-                ], max_tokens=200, model_override=self.model_simple).strip()
-                if routing_response:
-                    print(f"[RAGEngine] Rule router DIRECT ANSWER: {routing_response[:50]}...")
-                    return {
-                        "answer": routing_response,
-                        "citations": [],
-                        "related_judgments": [],
-                        "neutral_analysis": None,
-                        "arguments": None
-                    }
-            except Exception as e:
-                print(f"[RAGEngine] Simple route error: {e}. Proceeding with search.")
-        else:
-            # Optional LLM router as fallback when ambiguous
-            try:
-                router_prompt = (
-                    "You are a Router. Classify the user input.\n"
-                    "- If it is a greeting, general chat, or a question NOT about Indian Law, answer it directly and politely. DO NOT say 'I am a router'. Act as LegalAi.\n"
-                    "- If it is a specific legal question, OR a request for 'details', 'explanation', 'elaboration', or a follow-up to a previous topic, reply ONLY with the word 'SEARCH'.\n"
-                    "- If the input is ambiguous, reply 'SEARCH'.\n"
-                    f"- User Language: {language}\n"
-                    "User Input: " + query
-                )
-                routing_response = self._call_llm([{"role": "user", "content": router_prompt}], max_tokens=150, model_override=self.model_simple).strip()
-                if "SEARCH" not in routing_response and len(routing_response) > 5:
-                    print(f"[RAGEngine] LLM router DIRECT ANSWER: {routing_response[:50]}...")
-                    return {
-                        "answer": routing_response,
-                        "citations": [],
-                        "related_judgments": [],
-                        "neutral_analysis": None,
-                        "arguments": None
-                    }
-                print(f"[RAGEngine] Router chose SEARCH.")
-            except Exception as e:
-                print(f"[RAGEngine] Router Error: {e}. Falling back to Search.")
-
-        
         context_text = ""
         citations = []
         related_judgments = []
@@ -341,315 +953,483 @@ class RAGEngine:
         # 0.5 Cross-Lingual Search Optimization
         # If language is Hindi, translate query to English for better Vector Search recall
         search_query = query
-        if language == 'hi':
+        # Hindi-mode queries typed in English legal terms (no Devanagari) already embed well;
+        # only the rest wait on an LLM translation before the search can start
+        if language == 'hi' and (_DEVANAGARI_RE.search(query) or not _LEGAL_QUERY_RE.search(query.lower())):
             try:
-                print(f"[RAGEngine] Translating query to English for Search...")
-                translation_prompt = f"Translate the following Hindi legal query to precise English legal terms for a database search. Output ONLY the English translation.\nHindi: {query}"
-                translated_query = self._call_llm([{"role": "user", "content": translation_prompt}], max_tokens=100).strip()
-                safe_translated = translated_query.encode('ascii', 'replace').decode('ascii')
-                safe_original = query.encode('ascii', 'replace').decode('ascii')
-                print(f"[RAGEngine] Translated: '{safe_original}' -> '{safe_translated}'")
+                logger.debug("Translating query to English for Search...")
+                translation_prompt = TRANSLATION_PROMPT_PREFIX + query
+                translated_query = (await self._acall_llm([{"role": "user", "content": translation_prompt}], max_tokens=100, cache=True)).strip()
+                logger.debug("Translated: '%s' -> '%s'", query, translated_query)
                 search_query = translated_query
             except Exception as e:
-                print(f"[RAGEngine] Translation failed: {e}. Using original query.")
+                logger.warning("Translation failed: %s. Using original query.", e)
 
         # 1. Retrieve from Vector DB
         try:
-            print(f"[RAGEngine] Starting Vector Search for '{search_query}'...", flush=True)
-            collection = self._get_collection()
+            logger.debug("Starting Vector Search for '%s'...", search_query)
+            collection = await asyncio.to_thread(self._get_collection)
             if collection:
-                results = collection.query(
-                    query_texts=[search_query], # Use the (potentially) translated query
-                    n_results=5,
-                    include=["documents", "metadatas", "distances"]
-                )
+                # Reuse the embedding computed for the semantic cache; a translated query is embedded here
+                search_embedding = query_embedding if search_query == query else None
+                if search_embedding is None:
+                    search_embedding = await self._embedding_batcher.embed(search_query)
+                if search_embedding is not None:
+                    results = await self._retrieval_batcher.search(search_embedding)
+                else:
+                    results = await asyncio.to_thread(
+                        collection.query,
+                        query_texts=[search_query],
+                        n_results=5,
+                        include=["documents", "metadatas", "distances"]
+                    )
                 docs = (results.get('documents') or [[]])[0] if results else []
                 metas = (results.get('metadatas') or [[]])[0] if results else []
                 dists = (results.get('distances') or [[]])[0] if results else []
 
-                print(f"[RAGEngine] Vector Search Complete. Found: {len(docs)} docs", flush=True)
+                logger.debug("Vector Search Complete. Found: %s docs", len(docs))
+                
+                # Distances and law priorities as arrays: the cutoff is one vectorized
+                # comparison and the ordering one lexsort, however many results come back
+                dist_arr = np.asarray(dists, dtype=np.float64)
+                priorities = np.fromiter((_law_priority(meta) for meta in metas), dtype=np.int8, count=len(metas))
+                min_dist = float(dist_arr.min()) if dist_arr.size else 1.0
                 
-                min_dist = min(dists) if dists else 1.0
+                # Relevance Cutoff tightened: dynamic + absolute guard
+                keep = dist_arr <= min(min_dist + 0.15, 0.4)
                 
-                # Group results and sort to prioritize new Sanhitas
-                retrieved_items = list(zip(docs, metas, dists))
+                # Sort to prioritize new Sanhitas, then by distance
+                order = np.lexsort((dist_arr, priorities))
+                candidates = [int(i) for i in order if keep[i]]
+                # Drop near-duplicate docs before they take a slot and cost prompt tokens twice.
+                # Docs are carried as indices into Chroma's parallel result lists from here on
+                selected = _dedupe_retrieved(docs, candidates)[:MAX_CONTEXT_DOCS]
+                # Lay the chosen docs out in a fixed order (Sanhitas first, then by source and text)
+                # rather than by distance, so every query that retrieves the same statutes sends a
+                # byte-identical prompt prefix and the provider's prompt cache can reuse its prefill
+                selected.sort(key=lambda i: (priorities[i], metas[i].get('source') or '', docs[i]))
                 
-                def sort_key(item):
-                    doc, meta, dist = item
-                    law = (meta.get('law') or '').upper()
-                    # Priority 0 for new Sanhitas, Priority 1 for others
-                    if 'BNS' in law or 'BNSS' in law or 'BSA' in law:
-                        return (0, dist)
-                    return (1, dist)
+                # Split the token budget evenly across the docs actually used
+                per_doc_tokens = CONTEXT_TOKEN_BUDGET // max(len(selected), 1)
                 
-                retrieved_items.sort(key=sort_key)
+                # Parallel per-field lists, formatted into the context with a single join
+                metas_used = [metas[i] for i in selected]
+                snippets = [truncate_tokens(docs[i], per_doc_tokens) for i in selected]
+                sources = [meta.get('source', 'Unknown') for meta in metas_used]
+                context_text = "".join([
+                    f"---\nSource: {src}\nContent: {snippet}\n"
+                    for src, snippet in zip(sources, snippets)
+                ])
                 
-                for doc, meta, dist in retrieved_items:
-                    
-                    # Relevance Cutoff tightened: dynamic + absolute guard
-                    if dist > (min_dist + 0.15) or dist > 0.4:
-                        continue
-                    # Limit context size: max 4 docs, ~2000 chars per doc
-                    if len(context_text.split('---\n')) > 4:
+                for meta, snippet in zip(metas_used, snippets):
+                    # Only the first few reach the response; don't build dicts that are sliced off
+                    if len(citations) >= MAX_RESPONSE_CITATIONS:
                         break
-                    snippet = doc[:2000]
-                    src = meta.get('source', 'Unknown')
-                    law = meta.get('law')
-                    section = meta.get('section') or meta.get('bns_section') or meta.get('ipc_section')
-                    context_text += f"---\nSource: {src}\nContent: {snippet}\n"
-                    
-                    if meta.get("type") == "statute":
+                    doc_type = meta.get("type")
+                    if doc_type == "statute":
+                         section = meta.get('section') or meta.get('bns_section') or meta.get('ipc_section')
                          citations.append({
-                             "source": (law or "Statute"),
+                             "source": (meta.get('law') or "Statute"),
                              "section": f"Section {section}" if section else None,
                              "url": meta.get("url"),
                              "text": snippet[:200] + "..."
                          })
-                    elif meta.get("type") == "judgment":
+                    elif doc_type == "judgment":
                          title = meta.get("title", "Unknown Case")
                          if title and title != "Unknown Case":
+                             preview = snippet[:200] + "..."
                              citations.append({
                                  "source": "Supreme Court Judgment", 
                                  "section": title, 
-                                 "text": snippet[:200] + "..."
+                                 "text": preview
                              })
                              related_judgments.append({
                                  "title": title,
-                                 "summary": snippet[:200] + "...",
+                                 "summary": preview,
                                  "case_id": meta.get("case_id", "")
                              })
             else:
                 context_text = "Database not available. Answer generically."
         except Exception as e:
-             print(f"[RAGEngine] ⚠️ Vector Search Error: {e}")
+             logger.warning("Vector Search Error: %s", e)
              context_text = "Search unavailable."
 
-        # 2. Generate Answer with LLM
-        answer = "I apologize, but I cannot generate an answer at this moment."
-        neutral_analysis = None
-        arguments = None
+        return context_text, citations, related_judgments
+
+    async def _prepare_query(self, query: str, language: str, arguments_mode: bool, analysis_mode: bool, session_id: Optional[str]) -> Tuple[Optional[Mapping[str, Any]], Optional[Dict[str, Any]]]:
+        """
+        Everything query() does before answer generation: memory, reformulation,
+        caches, routing, retrieval and prompt building.
         
-        print(f"[RAGEngine] Preparing LLM request...", flush=True)
-        if self.api_key:
-            system_prompt = (
-                "You are LegalAi, a Senior Advocate of the Supreme Court of India and a Constitutional Scholar.\n\n"
-                "Your expertise covers the Constitution of India, Bharatiya Nyaya Sanhita (BNS), BNSS, BSA, and all major Central/State Acts.\n\n"
-                "CRITICAL KNOWLEDGE (MUST FOLLOW):\n"
-                "1. The Bharatiya Nyaya Sanhita (BNS), Bharatiya Nagarik Suraksha Sanhita (BNSS), and Bharatiya Sakshya Adhiniyam (BSA) ARE THE CURRENT LAWS OF INDIA. They came into effect on July 1, 2024, replacing the IPC, CrPC, and IEA respectively.\n"
-                "2. DO NOT refer to them as 'proposed', 'upcoming', or 'bills'. They are the ACTIVE STATUTES.\n"
-                "3. Use BNS-first logic. For every criminal query, identify the relevant BNS section immediately. Mention IPC ONLY as a secondary historical reference if necessary.\n"
-                "4. Answer REAL-LIFE SCENARIOS by applying the current law to the facts provided. Maintain a objective, analytical tone.\n"
-                "5. CITE YOUR SOURCES. Always include inline citations to the Acts and Sections you reference (e.g., [Section 303(2), BNS]).\n"
-                "6. Always check if the Constitutional Fundamental Rights (Part III) apply to the scenario.\n"
-                "7. If sufficient legal context is not available, say: \"Insufficient verified legal context available.\"\n"
-                "8. Do NOT invent section numbers, punishments, or provisions. Always ensure section references are legally accurate for Indian jurisdiction.\n\n"
-                "STRUCTURE YOUR ANSWER:\n"
-                "1. Direct Answer (1–2 sentences)\n"
-                "2. Constitutional Perspective (if applicable)\n"
-                "3. Relevant Provisions (BNS/BNSS/BSA with citations)\n"
-                "4. Real-life Application/Scenario Analysis\n"
-                "5. Punishment & Consequences\n"
-                "6. Verifiable Source & Citations\n\n"
-                "FORMATTING:\n- Use Markdown with clear headings & bullets.\n- Bold section numbers and Act names.\n"
-                "DISCLAIMER: For informational purposes only. Not legal advice."
-            )
-            if language == "hi":
-                system_prompt += (
-                    "\n\nLANGUAGE RULE:\n- Respond fully in Hindi (Devanagari).\n- Section numbers and Act names may remain in English characters.\n"
-                    "- Translate legal terms to Hindi where appropriate. Do NOT reply in English."
-                )
+        Returns:
+            (response, None) when the query is answered without generation
+            (cache hit, greeting, router answer), otherwise (None, plan) where
+            plan holds the prompts and bookkeeping for _finish_query()
+        """
+        # Handle conversation memory and query reformulation
+        original_query = query
+        if session_id:
+            self.conversation_memory.add_message(session_id, "user", original_query)
 
-            if is_long:
-                system_prompt += (
-                    "\n\nLONG-FORM REQUEST:\n"
-                    "- Provide a detailed explanation with additional context when possible."
-                )
+        if session_id:
+            query = self.conversation_memory.reformulate_query(session_id, query)
+            if query != original_query:
+                logger.debug("Query reformulated: '%s' -> '%s'", original_query, query)
+        
+        logger.debug("Semantic Query: %s (Lang: %s)", query, language)
 
-            if analysis_mode:
-                system_prompt += (
-                    "\n[NEUTRAL ANALYSIS REQUESTED]\n"
-                    "You must also provide a Neutral Analysis section at the end.\n"
-                    "Strictly use this format:\n"
-                    "[FACTORS]\n- Factor 1\n- Factor 2\n[/FACTORS]\n"
-                    "[INTERPRETATIONS]\n- Interpretation 1\n- Interpretation 2\n[/INTERPRETATIONS]"
-                )
-            
-            if arguments_mode:
-                system_prompt += (
-                    "\n[ARGUMENTS REQUESTED]\n"
-                    "You must also provide Balanced Arguments at the end.\n"
-                    "Strictly use this format:\n"
-                    "[FOR]\n- Argument For 1\n- Argument For 2\n[/FOR]\n"
-                    "[AGAINST]\n- Argument Against 1\n- Argument Against 2\n[/AGAINST]"
-                )
+        is_long = _LONG_ANSWER_RE.search(query) is not None
 
-            user_query = f"Context:\n{context_text}\n\nQuery: {query}\n"
-            
-            # Append instructions to User Prompt for Recency Bias
-            if analysis_mode:
-                user_query += (
-                    "\n\nIMPORTANT: You MUST also provide a Neutral Analysis at the very end.\n"
-                    "Use this EXACT format:\n"
-                    "[FACTORS]\n- Factor 1\n- Factor 2\n[/FACTORS]\n"
-                    "[INTERPRETATIONS]\n- Interpretation 1\n- Interpretation 2\n[/INTERPRETATIONS]"
-                )
+        # Lowercased, whitespace-collapsed form shared by routing and the cache keys
+        normalized = " ".join(query.lower().split())
+
+        # 0. Smart Routing: rule-based first, LLM as optional fallback
+        query_type = _classify_query_text(normalized)
+        retrieval = None
+        if query_type == 'simple':
+            # Use lightweight model for general chat; repeat greetings are served from the LRU
+            try:
+                greeting_key = (normalized, language)
+                cached_greeting = self._greeting_cache.get(greeting_key)
+                if cached_greeting is not None:
+                    self._greeting_cache.move_to_end(greeting_key)
+                    return cached_greeting, None
 
-            if arguments_mode:
-                 user_query += (
-                    "\n\nIMPORTANT: You MUST also provide Balanced Arguments at the very end.\n"
-                    "Use this EXACT format:\n"
-                    "[FOR]\n- Argument For 1\n[/FOR]\n"
-                    "[AGAINST]\n- Argument Against 1\n[/AGAINST]"
+                greeting_prompt = (
+                    "You are LegalAi. Answer the user's general question or greeting briefly and politely."
                 )
+                routing_response = (await self._acall_llm([
+                    {"role": "system", "content": greeting_prompt},
+                    {"role": "user", "content": query}
+                ], max_tokens=200, model_override=self.model_simple)).strip()
+                if routing_response:
+                    logger.debug("Rule router DIRECT ANSWER: %s...", routing_response[:50])
+                    response = _direct_answer_response(routing_response)
+                    self._greeting_cache[greeting_key] = response
+                    if len(self._greeting_cache) > GREETING_CACHE_SIZE:
+                        self._greeting_cache.popitem(last=False)
+                    return response, None
+            except Exception as e:
+                logger.warning("Simple route error: %s. Proceeding with search.", e)
 
+        # Semantic cache: paraphrases of answered questions skip routing, retrieval and generation.
+        # Greetings never reach it, so they don't pay for an embedding.
+        cache_bucket = (language, arguments_mode, analysis_mode, _query_references(normalized))
+        query_embedding = await self._embedding_batcher.embed(query)
+        if query_embedding is not None:
+            cached = self.semantic_cache.get(cache_bucket, query_embedding)
+            if cached is not None:
+                logger.debug("Semantic cache hit.")
+                if session_id:
+                    self.conversation_memory.add_message(session_id, "assistant", cached.get("answer", ""))
+                return dict(cached), None
+
+        if query_type == 'statute':
+            # Names a statute, section or core legal term: the LLM router would only say SEARCH
+            logger.debug("Rule router chose SEARCH.")
+        elif query_type == 'legal':
+            # Retrieval doesn't depend on the router's verdict, so start it now and
+            # let it overlap the router call; it is dropped if the router answers directly
+            if self._cag_system_prompts is None:
+                retrieval = asyncio.create_task(self._retrieve(query, language, query_embedding))
+
+            # Optional LLM router as fallback when ambiguous
             try:
-                print(f"[RAGEngine] Calling LLM now...", flush=True)
-                # Check cache (keyed by query + language + modes + top sources)
-                cache_key = f"{language}|{analysis_mode}|{arguments_mode}|{query.strip()}|{','.join([c.get('source','') for c in citations[:2]])}"
-                if cache_key in self._cache:
-                    cached = self._cache[cache_key]
-                    response = {
-                        "answer": cached.get("answer", ""),
-                        "citations": citations[:3],
-                        "related_judgments": related_judgments[:3],
-                        "neutral_analysis": cached.get("neutral_analysis"),
-                        "arguments": cached.get("arguments")
-                    }
-                    if session_id:
-                        self.conversation_memory.add_message(session_id, "assistant", response.get("answer", ""))
-                    return response
-
-                max_tokens = 2000 if is_long else 1500
-                raw_answer = self._call_llm([
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_query}
-                ], max_tokens=max_tokens, model_override=self.model_legal)
-                print(f"[RAGEngine] LLM returned response.", flush=True)
-                try:
-                    print(f"\n[DEBUG] Raw LLM Answer:\n{raw_answer.encode('utf-8', 'replace').decode('utf-8')}\n[DEBUG] End Raw Answer\n", flush=True)
-                except Exception:
-                     print(f"\n[DEBUG] Raw LLM Answer: (encoding error)\n[DEBUG] End Raw Answer\n", flush=True)
-                
-                def extract_tag(text, start_tag, end_tag):
-                    # Try exact tag first
-                    pattern = f"{re.escape(start_tag)}\\s*(.*?)\\s*{re.escape(end_tag)}"
-                    match = re.search(pattern, text, re.DOTALL | re.IGNORECASE)
-                    
-                    if not match and "ARGUMENTS" in start_tag:
-                         # Fallback for "ARGUMENTS FOR" variations
-                         alt_start = start_tag.replace("FOR", "ARGUMENTS FOR").replace("AGAINST", "ARGUMENTS AGAINST")
-                         pattern = f"{re.escape(alt_start)}\\s*(.*?)\\s*{re.escape(end_tag)}"
-                         match = re.search(pattern, text, re.DOTALL | re.IGNORECASE)
-
-                    if match:
-                        content = match.group(1).strip()
-                        return [item.strip("- *").strip() for item in content.split("\n") if item.strip()]
-                    return []
-
-                if analysis_mode:
-                    factors = extract_tag(raw_answer, "[FACTORS]", "[/FACTORS]")
-                    interpretations = extract_tag(raw_answer, "[INTERPRETATIONS]", "[/INTERPRETATIONS]")
-                    if factors or interpretations:
-                        neutral_analysis = {"factors": factors or ["Analysis pending"], "interpretations": interpretations or ["Further research required"]}
-                
-                if arguments_mode:
-                    for_args = extract_tag(raw_answer, "[FOR]", "[/FOR]")
-                    against_args = extract_tag(raw_answer, "[AGAINST]", "[/AGAINST]")
-                    if for_args or against_args:
-                        arguments = {"for": for_args or ["N/A"], "against": against_args or ["N/A"]}
-
-                # Remove the special sections from the main answer to avoid duplication
-                # Expanded regex to catch variations like [ARGUMENTS FOR]
-                answer = re.sub(r'\[/?(FACTORS|INTERPRETATIONS|FOR|AGAINST|ARGUMENTS FOR|ARGUMENTS AGAINST)\]', '', raw_answer, flags=re.IGNORECASE).strip()
-                
-                # Robust approach: Split by the first occurrence of any special tag
-                # Added NEUTRAL ANALYSIS and BALANCED ARGUMENTS which the LLM was using
-                split_patterns = ["[FACTORS]", "[INTERPRETATIONS]", "[FOR]", "[AGAINST]", "[ARGUMENTS FOR]", "[ARGUMENTS AGAINST]", "[NEUTRAL ANALYSIS]", "[BALANCED ARGUMENTS]"]
-                for p in split_patterns:
-                    # Case insensitive check for splitting
-                    idx = answer.upper().find(p)
-                    if idx != -1:
-                        answer = answer[:idx].strip()
-
-                # Cleanup
-                answer = re.sub(r'\n{3,}', '\n\n', answer).strip()
-                # Cache the structured result
-                self._cache[cache_key] = {
-                    "answer": answer,
-                    "arguments": arguments,
-                    "neutral_analysis": neutral_analysis
-                }
-                
+                router_prompt = ROUTER_SYSTEM_PROMPTS.get(language) or _build_router_system_prompt(language)
+                routing_response = (await self._acall_llm([
+                    {"role": "system", "content": router_prompt},
+                    {"role": "user", "content": "User Input: " + query}
+                ], max_tokens=150, model_override=self.model_simple, cache=True)).strip()
+                if "SEARCH" not in routing_response and len(routing_response) > 5:
+                    logger.debug("LLM router DIRECT ANSWER: %s...", routing_response[:50])
+                    if retrieval is not None:
+                        retrieval.cancel()
+                    return _direct_answer_response(routing_response), None
+                logger.debug("Router chose SEARCH.")
             except Exception as e:
-                print(f"[RAGEngine] LLM Error: {e}")
-                answer = f"Error: {str(e)}"
+                logger.warning("Router Error: %s. Falling back to Search.", e)
+
+        
+        if self._cag_system_prompts is not None:
+            # The corpus is already in the system prompt; citations come from the answer
+            context_text, citations, related_judgments = None, [], []
+        else:
+            if retrieval is None:
+                retrieval = self._retrieve(query, language, query_embedding)
+            context_text, citations, related_judgments = await retrieval
+
+        plan = {
+            "session_id": session_id,
+            "analysis_mode": analysis_mode,
+            "arguments_mode": arguments_mode,
+            "cache_bucket": cache_bucket,
+            "query_embedding": query_embedding,
+            "cag": context_text is None,
+            "citations": citations,
+            "related_judgments": related_judgments,
+            "messages": None,
+        }
+
+        # 2. Build the generation request
+        logger.debug("Preparing LLM request...")
+        if not self.api_key:
+            return None, plan
+
+        prompt_key = ("hi" if language == "hi" else "en", is_long, analysis_mode, arguments_mode)
+        if context_text is None:
+            system_prompt = self._cag_system_prompts[prompt_key]
+            user_query = f"Query: {query}\n"
+        else:
+            system_prompt = ANSWER_SYSTEM_PROMPTS[prompt_key]
+            user_query = f"Context:\n{context_text}\n\nQuery: {query}\n"
+        
+        # Append instructions to User Prompt for Recency Bias
+        if analysis_mode:
+            user_query += (
+                "\n\nIMPORTANT: You MUST also provide a Neutral Analysis at the very end.\n"
+                "Use this EXACT format:\n"
+                "[FACTORS]\n- Factor 1\n- Factor 2\n[/FACTORS]\n"
+                "[INTERPRETATIONS]\n- Interpretation 1\n- Interpretation 2\n[/INTERPRETATIONS]"
+            )
+
+        if arguments_mode:
+             user_query += (
+                "\n\nIMPORTANT: You MUST also provide Balanced Arguments at the very end.\n"
+                "Use this EXACT format:\n"
+                "[FOR]\n- Argument For 1\n[/FOR]\n"
+                "[AGAINST]\n- Argument Against 1\n[/AGAINST]"
+            )
+
+        # Check cache (keyed by query + language + modes + top sources)
+        cache_key = f"{language}|{analysis_mode}|{arguments_mode}|{normalized}|{','.join([c.get('source','') for c in citations[:2]])}"
+        if cache_key in self._cache:
+            cached = self._cache[cache_key]
+            response = {
+                "answer": cached.get("answer", ""),
+                "citations": cached.get("citations", citations)[:MAX_RESPONSE_CITATIONS],
+                "related_judgments": related_judgments[:MAX_RESPONSE_CITATIONS],
+                "neutral_analysis": cached.get("neutral_analysis"),
+                "arguments": cached.get("arguments")
+            }
+            if session_id:
+                self.conversation_memory.add_message(session_id, "assistant", response.get("answer", ""))
+            return response, None
+
+        length_key = ("answer", is_long, analysis_mode, arguments_mode)
+        ceiling = 2000 if is_long else 1500
+        plan.update(
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_query}
+            ],
+            cache_key=cache_key,
+            length_key=length_key,
+            ceiling=ceiling,
+            max_tokens=self._adaptive_max_tokens(length_key, ceiling),
+        )
+        return None, plan
+
+    async def _finish_query(self, plan: Dict[str, Any], raw_answer: Optional[str] = None, error: Optional[Exception] = None) -> Dict[str, Any]:
+        """
+        Parse a generated answer, populate the caches and record it in conversation memory.
+        Without raw_answer the response carries the error (or the no-API-key apology).
+        """
+        answer = "I apologize, but I cannot generate an answer at this moment."
+        neutral_analysis = None
+        arguments = None
+        citations = plan["citations"]
+        cacheable = False
+
+        if error is not None:
+            logger.warning("LLM Error: %s", error)
+            answer = f"Error: {str(error)}"
+        elif raw_answer is not None:
+            self._record_output_length(plan["length_key"], raw_answer, plan["ceiling"])
+            logger.debug("LLM returned response.")
+            logger.debug("Raw LLM Answer:\n%s", raw_answer)
+            
+            # Tag extraction and cleanup are regex scans over the whole answer;
+            # run them in a worker thread so other requests keep being served
+            answer, neutral_analysis, arguments = await asyncio.to_thread(
+                _parse_answer, raw_answer, plan["analysis_mode"], plan["arguments_mode"]
+            )
+            # Cache the structured result
+            cache_key = plan["cache_key"]
+            self._cache[cache_key] = {
+                "answer": answer,
+                "arguments": arguments,
+                "neutral_analysis": neutral_analysis
+            }
+            if plan["cag"]:
+                citations = _extract_section_citations(answer, set())
+                self._cache[cache_key]["citations"] = citations
+            cacheable = True
 
         response = {
             "answer": answer,
-            "citations": citations[:3],
-            "related_judgments": related_judgments[:3], 
+            "citations": citations[:MAX_RESPONSE_CITATIONS],
+            "related_judgments": plan["related_judgments"][:MAX_RESPONSE_CITATIONS], 
             "arguments": arguments,
             "neutral_analysis": neutral_analysis,
             "disclaimer": "AI-generated response. For informational purposes only. Consult a qualified lawyer."
         }
 
+        query_embedding = plan["query_embedding"]
+        if cacheable and query_embedding is not None:
+            self.semantic_cache.put(plan["cache_bucket"], query_embedding, dict(response))
+
+        session_id = plan["session_id"]
         if session_id:
             self.conversation_memory.add_message(session_id, "assistant", response.get("answer", ""))
 
         return response
 
-    def generate_draft(self, draft_type: str, details: str, language: str = 'en') -> str:
-        """
-        Generates a formal legal draft based on the user's details.
+    async def query(self, query: str, language: str = "en", arguments_mode: bool = False, analysis_mode: bool = False, session_id: Optional[str] = None) -> Mapping[str, Any]:
         """
-        print(f"[RAGEngine] Generating draft: {draft_type}", flush=True)
+        Semantic Search + LLM Generation with Conversation Memory.
         
-        templates = {
-            "legal_notice": "## LEGAL NOTICE\nThrough Registered Post / Speed Post / Email\nDate: [Date]\n\nTo,\n[Recipient Name]\n[Recipient Address]\n\n### Subject:\n**Legal Notice under [Applicable Law] regarding [Issue Brief]**\n\nSir/Madam,\n\nUnder instructions and on behalf of my client **[Sender Name]**, residing at [Sender Address], I hereby serve upon you the present legal notice as follows:\n\n### 1. Facts of the Case\nThat my client [Brief Background].\nThat despite requests, you have [Breach Description].\n\n### 2. Legal Provisions\nYour actions amount to violation of:\n- **[Section Name] of [Act Name]**\n- Other applicable provisions of law\n\n### 3. Cause of Action\nThat the cause of action arose on [Date] and continues to subsist.\n\n### 4. Demand\nYou are hereby called upon to:\n- [Specific Demand]\nwithin **[Time Limit] days** from receipt of this notice.\n\n### 5. Consequences\nFailing compliance, my client shall initiate legal proceedings at your risk.\n\nYours faithfully,\n**[Advocate Name]**\nAdvocate for [Sender Name]",
-            
-            "nda": "## NON-DISCLOSURE AGREEMENT (NDA)\n\nThis Agreement is entered into on [Date] between:\n\n**Party A:** [Party A Name], at [Address A]\n**Party B:** [Party B Name], at [Address B]\n\n### 1. Purpose\nThe parties wish to exchange confidential information for [Purpose].\n\n### 2. Definition of Confidential Information\n'Confidential Information' includes all written, oral, electronic information disclosed.\n\n### 3. Obligations\nThe Receiving Party shall:\n- Not disclose confidential information to third parties\n- Use the information solely for the stated purpose\n\n### 4. Exclusions\nInformation publicly available or required by law is excluded.\n\n### 5. Term\nValid for [Duration] years.\n\n### 6. Governing Law\nGoverned by laws of **India**.\n\n### 7. Jurisdiction\nCourts at [City] shall have exclusive jurisdiction.\n\nIN WITNESS WHEREOF, the parties have signed.\n\n**Party A Signature:** __________\n**Party B Signature:** __________",
-            
-            "rent_agreement": "## RENT AGREEMENT\n\nThis Agreement is made on [Date] between:\n\n**Landlord:** [Landlord Name]\n**Tenant:** [Tenant Name]\n\n### 1. Property\nThe Landlord lets out the premises located at [Property Address].\n\n### 2. Rent\nMonthly rent shall be ₹[Rent Amount], payable on or before [Due Date].\n\n### 3. Security Deposit\nTenant shall pay ₹[Security Deposit] as refundable security deposit.\n\n### 4. Term\nValid for [Duration] months.\n\n### 5. Maintenance\nTenant shall maintain the premises and not sublet without permission.\n\n### 6. Termination\nEither party may terminate with [Notice Period] days’ notice.\n\nSigned on [Date].\n\n**Landlord Signature:** _______\n**Tenant Signature:** _______",
-            
-            "affidavit": "## AFFIDAVIT\n\nI, [Deponent Name], aged [Age], residing at [Address], do hereby solemnly affirm:\n\n1. That I am the deponent herein and competent to swear this affidavit.\n2. That [Statement of Facts].\n3. That the statements made herein are true to my knowledge.\n\nVerified at [Place] on [Date].\n\n**DEPONENT SIGNATURE**\n\nSolemnly affirmed before me on [Date].\n\n**Notary / Oath Commissioner**",
-            
-            "employment_contract": "## EMPLOYMENT AGREEMENT\n\nThis Agreement is entered on [Date] between:\n\n**Employer:** [Company Name]\n**Employee:** [Employee Name]\n\n### 1. Designation\nEmployee shall serve as [Designation].\n\n### 2. Duties\nEmployee shall perform duties assigned from time to time.\n\n### 3. Salary\nMonthly remuneration shall be ₹[Salary].\n\n### 4. Confidentiality\nEmployee shall maintain confidentiality during and after employment.\n\n### 5. Termination\nEither party may terminate with [Notice Period] days’ notice.\n\nSigned:\n\nEmployer: _______\nEmployee: _______",
-            
-            "posh_complaint": "## COMPLAINT UNDER POSH ACT, 2013\n\nTo,\nThe Internal Complaints Committee\n[Organization Name]\n\n### Subject:\nComplaint under **Sexual Harassment of Women at Workplace Act, 2013**\n\nI, [Complainant Name], employed as [Designation], submit the following:\n\n### 1. Incident Details\nOn [Date], at [Place], the respondent [Respondent Name] [Description of Harassment].\n\n### 2. Evidence\n[List of Evidence]\n\n### 3. Relief Sought\nI request appropriate inquiry and action under POSH Act.\n\nI affirm the above facts are true.\n\nSignature: ______\nDate: ______",
-            
-            "rti_application": "## APPLICATION UNDER RTI ACT, 2005\n\nTo,\nThe Public Information Officer\n[Department Name]\n\nSubject: Information under RTI Act, 2005\n\nSir/Madam,\n\nKindly provide the following information:\n\n1. [Question 1]\n2. [Question 2]\n\nI have enclosed the application fee of ₹10.\n\nAddress for correspondence: [Address]\n\nDate: [Date]\nApplicant Signature: _______"
-        }
+        Args:
+            query: User's question
+            language: 'en' or 'hi'
+            arguments_mode: Generate balanced arguments
+            analysis_mode: Generate neutral analysis
+            session_id: Optional session ID for conversation memory
+        """
+        response, plan = await self._prepare_query(query, language, arguments_mode, analysis_mode, session_id)
+        if response is not None:
+            return response
+        if plan["messages"] is None:
+            return await self._finish_query(plan)
 
-        template = templates.get(draft_type, "Generate a formal legal document for the user.")
+        try:
+            logger.debug("Calling LLM now...")
+            raw_answer = await self._acall_llm(
+                plan["messages"], max_tokens=plan["max_tokens"], model_override=self.model_legal
+            )
+        except Exception as e:
+            return await self._finish_query(plan, error=e)
+        return await self._finish_query(plan, raw_answer)
 
-        system_prompt = (
-            "You are an Indian Legal Drafting Assistant.\n\n"
-            "TASK:\n"
-            f"Fill in the following template based on the user's details. Do not change the legal structure unless necessary.\n\n"
-            f"TEMPLATE:\n{template}\n\n"
-            "RULES:\n"
-            "- Replace placeholders like [Name], [Date] with actual info from user input.\n"
-            "- If info is missing, keep the placeholder or make a reasonable inference (e.g., 'Date: Today').\n"
-            "- OUTPUT ONLY THE DOCUMENT CONTENT.\n"
-            "- Add a disclaimer at the very bottom.\n\n"
-        )
+    async def _stream_llm(self, deltas: AsyncIterator[str]) -> AsyncIterator[str]:
+        """
+        Re-yields an upstream completion stream, holding an LLM concurrency slot only
+        until its first delta arrives. The rest is read at the client's pace, so a slow
+        or stalled stream client can't keep a GROQ_CONCURRENCY slot from /query.
+        """
+        async with self._llm_semaphore:
+            try:
+                first = await deltas.__anext__()
+            except StopAsyncIteration:
+                return
+        yield first
+        async for delta in deltas:
+            yield delta
 
-        if language == 'hi':
-            system_prompt += (
-                "CRITICAL LANGUAGE RULE: Respond FULLY in Hindi (Devanagari script).\n"
-                "Use formal legal Hindi (Vidhi Hindi).\n"
-            )
-        else:
-            system_prompt += "Respond in English."
+    async def stream_query(self, query: str, language: str = "en", arguments_mode: bool = False, analysis_mode: bool = False, session_id: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streams the answer to a query as it is generated.
+        Yields {"delta"} events with raw answer text, then a final {"done", ...}
+        event carrying the same fields as query() (parsed answer, citations,
+        analysis/arguments). Cached and directly routed answers arrive as the
+        final event alone.
+        """
+        response, plan = await self._prepare_query(query, language, arguments_mode, analysis_mode, session_id)
+        if response is None and plan["messages"] is None:
+            response = await self._finish_query(plan)
+        if response is not None:
+            yield {"done": True, **response}
+            return
 
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": f"Details for draft:\n{details}"}
-        ]
+        parts: List[str] = []
+        try:
+            async for delta in self._stream_llm(self.groq.astream_chat_completion(
+                plan["messages"], max_tokens=plan["max_tokens"], model=self.model_legal
+            )):
+                parts.append(delta)
+                yield {"delta": delta}
+        except Exception as e:
+            yield {"done": True, **(await self._finish_query(plan, error=e))}
+            return
+
+        yield {"done": True, **(await self._finish_query(plan, "".join(parts)))}
+
+    def _draft_body_prefix(self, draft_type: str, language: str) -> bytes:
+        """Pre-encoded body prefix for a draft; unknown types are encoded on the fly, not cached."""
+        prefix = self._draft_body_prefixes.get((draft_type, language))
+        if prefix is None:
+            template = DOCUMENT_TEMPLATES.get(draft_type, DEFAULT_DRAFT_TEMPLATE)
+            prefix = _encode_draft_body_prefix(self.model_simple, _build_draft_system_prompt(template, language))
+        return prefix
 
+    async def generate_draft(self, draft_type: str, details: str, language: str = 'en') -> str:
+        """
+        Generates a formal legal draft based on the user's details.
+        """
+        logger.info("Generating draft: %s", draft_type)
+        
+        prefix = self._draft_body_prefix(draft_type, language)
+
+        length_key = ("draft", draft_type, language)
         try:
+            if not self.groq:
+                raise Exception("Groq Client not initialized (API Key missing)")
             # Using model_simple for lightweight draft generation.
-            return self._call_llm(messages, max_tokens=2000, model_override=self.model_simple)
+            body = _encode_draft_body(prefix, details, self._adaptive_max_tokens(length_key, DRAFT_MAX_TOKENS))
+            async with self._llm_semaphore:
+                draft = await self.groq.apost_completion(body)
+            self._record_output_length(length_key, draft, DRAFT_MAX_TOKENS)
+            return draft
         except Exception as e:
-            print(f"[RAGEngine] Drafting failed: {e}")
+            logger.warning("Drafting failed: %s", e)
             return f"Error: Could not generate draft. Reason: {str(e)}"
+
+    async def stream_draft(self, draft_type: str, details: str, language: str = 'en') -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streams a legal draft as it is generated.
+        Yields {"delta", "citations"} events, where citations holds statute references
+        first seen in lines completed so far, then a final {"done", "draft", "citations"}.
+        Citations are extracted line by line while tokens arrive, so they are
+        complete the moment generation ends.
+        """
+        logger.info("Streaming draft: %s", draft_type)
+        if not self.groq:
+            raise Exception("Groq Client not initialized (API Key missing)")
+
+        prefix = self._draft_body_prefix(draft_type, language)
+
+        parts: List[str] = []
+        citations: List[Dict[str, Any]] = []
+        seen: Set[Tuple[str, str]] = set()
+        # Text after the last newline; each completed line is scanned exactly once
+        pending = ""
+
+        length_key = ("draft", draft_type, language)
+        body = _encode_draft_body(prefix, details, self._adaptive_max_tokens(length_key, DRAFT_MAX_TOKENS), stream=True)
+        async for delta in self._stream_llm(self.groq.astream_completion(body)):
+            parts.append(delta)
+            pending += delta
+            new_citations = []
+            cut = pending.rfind("\n")
+            if cut != -1:
+                new_citations = _extract_section_citations(pending[:cut], seen)
+                citations.extend(new_citations)
+                pending = pending[cut + 1:]
+            yield {"delta": delta, "citations": new_citations}
+
+        citations.extend(_extract_section_citations(pending, seen))
+        draft = "".join(parts)
+        self._record_output_length(length_key, draft, DRAFT_MAX_TOKENS)
+        yield {"done": True, "draft": draft, "citations": citations}
+
+    async def generate_drafts_batch(self, items: List[Dict[str, str]]) -> List[str]:
+        """
+        Generates several drafts concurrently.
+        Each item holds generate_draft kwargs (draft_type, details, language).
+        """
+        semaphore = asyncio.Semaphore(self.max_parallel)
+
+        async def run(item: Dict[str, str]) -> str:
+            async with semaphore:
+                return await self.generate_draft(**item)
+
+        return await asyncio.gather(*(run(item) for item in items))
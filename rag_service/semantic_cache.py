@@ -0,0 +1,252 @@
+"""
+Semantic Response Cache
+Reuses answers for paraphrased queries by comparing query embeddings,
+so repeat questions skip routing, retrieval and generation entirely
+"""
+
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional
+
+import msgspec
+import numpy as np
+
+DEFAULT_THRESHOLD = 0.95
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+INITIAL_CAPACITY = 256
+
+
+class SemanticCache:
+    """
+    Embedding-keyed response cache.
+
+    Entries live in one matrix of unit vectors, so a lookup is a single
+    matrix-vector product. Each entry also carries an exact bucket key
+    (e.g. language and answer modes) that must match, expires after a TTL,
+    and the least recently used entry is evicted beyond max_entries.
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_THRESHOLD,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS
+    ):
+        """
+        Initialize semantic cache
+
+        Args:
+            threshold: Minimum cosine similarity for a hit
+            max_entries: Maximum cached responses
+            ttl_seconds: Lifetime of a cached response
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clear()
+
+    def clear(self) -> None:
+        """Drop every cached response (e.g. after the statute corpus changes)"""
+        self._vectors: Optional[np.ndarray] = None
+        self._bucket_ids = np.zeros(0, dtype=np.int32)
+        self._expires = np.zeros(0, dtype=np.float64)
+        self._responses: List[Any] = []
+        self._bucket_index: Dict[Hashable, int] = {}
+        self._rows = 0
+        self._lru: "OrderedDict[int, None]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._lru)
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+    def _best_slot(self, bucket_id: int, vector: np.ndarray) -> Optional[int]:
+        """Most similar live slot in the bucket at or above the threshold"""
+        if self._vectors is None or self._rows == 0:
+            return None
+        rows = self._rows
+        live = (self._bucket_ids[:rows] == bucket_id) & (self._expires[:rows] > time.time())
+        if not live.any():
+            return None
+        similarities = np.where(live, self._vectors[:rows] @ vector, -1.0)
+        slot = int(similarities.argmax())
+        return slot if similarities[slot] >= self.threshold else None
+
+    def get(self, bucket: Hashable, embedding) -> Optional[Any]:
+        """
+        Look up a response for a query embedding
+
+        Args:
+            bucket: Exact-match key the cached entry must share
+            embedding: Query embedding
+
+        Returns:
+            Cached response, or None on a miss
+        """
+        bucket_id = self._bucket_index.get(bucket)
+        if bucket_id is None:
+            return None
+        slot = self._best_slot(bucket_id, self._normalize(embedding))
+        if slot is None:
+            return None
+        self._lru.move_to_end(slot)
+        return self._responses[slot]
+
+    def put(self, bucket: Hashable, embedding, response: Any) -> None:
+        """
+        Store a response for a query embedding
+
+        Args:
+            bucket: Exact-match key for later lookups
+            embedding: Query embedding
+            response: Response to cache
+        """
+        vector = self._normalize(embedding)
+        bucket_id = self._bucket_index.setdefault(bucket, len(self._bucket_index))
+
+        # A near-identical query already cached in this bucket is refreshed in place
+        slot = self._best_slot(bucket_id, vector)
+        if slot is None:
+            slot = self._allocate_slot(vector.shape[0])
+        self._store(slot, bucket_id, vector, time.time() + self.ttl_seconds, response)
+
+    def save(self, path: str) -> int:
+        """
+        Write live entries to disk so a restarted process starts warm
+
+        Vectors and their bucket/expiry/response rows go into one file,
+        {path}.npz, written to a per-process temp file and moved into place
+        atomically. Live entries already saved there (e.g. by another
+        worker process) are merged in, so concurrent workers only add to it.
+
+        Args:
+            path: File path prefix
+
+        Returns:
+            Number of entries written
+        """
+        now = time.time()
+        buckets = {bucket_id: bucket for bucket, bucket_id in self._bucket_index.items()}
+        # Least recently used first, so reloading past max_entries evicts the same entries
+        entries = [
+            (self._vectors[slot], {
+                "bucket": buckets[int(self._bucket_ids[slot])],
+                "expires": float(self._expires[slot]),
+                "response": self._responses[slot]
+            })
+            for slot in self._lru if self._expires[slot] > now
+        ]
+        try:
+            saved = self._read_entries(path, now)
+        except (OSError, ValueError, KeyError, msgspec.DecodeError):
+            saved = []
+        if entries:
+            saved = [entry for entry in saved if entry[0].shape == entries[0][0].shape]
+
+        # Ours are newer; an entry saved twice (same bucket and vector) is kept once
+        merged: "OrderedDict[tuple, tuple]" = OrderedDict()
+        for vector, row in saved + entries:
+            key = (msgspec.json.encode(row["bucket"]), vector.tobytes())
+            merged.pop(key, None)
+            merged[key] = (vector, row)
+        merged_entries = list(merged.values())[-self.max_entries:]
+
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        vectors = (
+            np.stack([vector for vector, _ in merged_entries]).astype(np.float32)
+            if merged_entries else np.zeros((0, 0), dtype=np.float32)
+        )
+        rows = np.frombuffer(msgspec.json.encode([row for _, row in merged_entries]), dtype=np.uint8)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, vectors=vectors, rows=rows)
+            os.replace(tmp_path, path + ".npz")
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        return len(merged_entries)
+
+    def load(self, path: str) -> int:
+        """
+        Add entries written by save(), skipping any that have expired
+
+        Args:
+            path: File path prefix passed to save()
+
+        Returns:
+            Number of entries loaded (0 if nothing was saved)
+
+        Raises:
+            ValueError: If the file's vectors and rows don't line up
+        """
+        if not os.path.exists(path + ".npz"):
+            return 0
+
+        loaded = 0
+        for vector, row in self._read_entries(path, time.time()):
+            # JSON turns tuple buckets into lists; restore them so lookups hash the same
+            bucket = row["bucket"]
+            if isinstance(bucket, list):
+                bucket = tuple(bucket)
+            bucket_id = self._bucket_index.setdefault(bucket, len(self._bucket_index))
+            slot = self._allocate_slot(vector.shape[0])
+            self._store(slot, bucket_id, vector, row["expires"], row["response"])
+            loaded += 1
+        return loaded
+
+    @staticmethod
+    def _read_entries(path: str, now: float) -> List[tuple]:
+        """Unexpired (vector, row) pairs from {path}.npz"""
+        with np.load(path + ".npz", allow_pickle=False) as data:
+            vectors = data["vectors"]
+            rows = msgspec.json.decode(data["rows"].tobytes())
+        if len(vectors) != len(rows):
+            raise ValueError(f"{path}.npz has {len(vectors)} vectors but {len(rows)} rows")
+        return [
+            (np.asarray(vector, dtype=np.float32), row)
+            for vector, row in zip(vectors, rows) if row["expires"] > now
+        ]
+
+    def _store(self, slot: int, bucket_id: int, vector: np.ndarray, expires: float, response: Any) -> None:
+        self._vectors[slot] = vector
+        self._bucket_ids[slot] = bucket_id
+        self._expires[slot] = expires
+        self._responses[slot] = response
+        self._lru[slot] = None
+        self._lru.move_to_end(slot)
+
+    def _allocate_slot(self, dim: int) -> int:
+        if self._rows >= self.max_entries:
+            # Reuse an expired row first; only a full cache of live entries evicts the LRU one
+            expired = np.flatnonzero(self._expires[:self._rows] <= time.time())
+            if expired.size:
+                slot = int(expired[0])
+                self._lru.pop(slot, None)
+                return slot
+            slot, _ = self._lru.popitem(last=False)
+            return slot
+
+        if self._vectors is None or self._rows == self._vectors.shape[0]:
+            capacity = min(self.max_entries, max(INITIAL_CAPACITY, self._rows * 2))
+            vectors = np.zeros((capacity, dim), dtype=np.float32)
+            bucket_ids = np.full(capacity, -1, dtype=np.int32)
+            expires = np.zeros(capacity, dtype=np.float64)
+            if self._vectors is not None:
+                vectors[:self._rows] = self._vectors[:self._rows]
+                bucket_ids[:self._rows] = self._bucket_ids[:self._rows]
+                expires[:self._rows] = self._expires[:self._rows]
+            self._vectors, self._bucket_ids, self._expires = vectors, bucket_ids, expires
+            self._responses.extend([None] * (capacity - len(self._responses)))
+
+        slot = self._rows
+        self._rows += 1
+        return slot
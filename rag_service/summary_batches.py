@@ -0,0 +1,215 @@
+"""
+Batch Summarization Queue
+Accepts many documents at once and summarizes them in the background,
+so bulk uploads don't pay one HTTP round-trip and one request slot per file
+"""
+
+import asyncio
+import os
+import re
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+import msgspec
+from log_utils import get_logger
+
+logger = get_logger("SummaryBatch")
+
+# submit() issues uuid4 hex ids; anything else is never a file name we wrote
+BATCH_ID_RE = re.compile(r"[0-9a-f]{32}")
+MANIFEST_SUFFIX = ".manifest.json"
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class SummaryBatchQueue:
+    """Background workers that drain queued summarization jobs and record results per batch"""
+
+    def __init__(self, engine, output_dir: str, workers: int = 2, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        """
+        Initialize batch queue
+
+        Args:
+            engine: RAGEngine used to summarize each document
+            output_dir: Directory for per-batch JSONL result files
+            workers: Documents summarized concurrently
+            ttl_seconds: How long a batch's files are kept after it was last updated
+        """
+        self.engine = engine
+        self.output_dir = output_dir
+        self.workers = workers
+        self.ttl_seconds = ttl_seconds
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        # Batches still running in this process; completed ones are served from disk
+        self._batches: Dict[str, Dict[str, Any]] = {}
+
+    def _ensure_workers(self) -> None:
+        if self._tasks and not all(task.done() for task in self._tasks):
+            return
+        self._queue = self._queue or asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def submit(self, documents: List[Tuple[str, str]]) -> str:
+        """
+        Queue documents for summarization
+
+        Args:
+            documents: (filename, path) pairs; each file is deleted once summarized
+
+        Returns:
+            batch_id for polling with status()
+        """
+        self._ensure_workers()
+        batch_id = uuid.uuid4().hex
+        if documents:
+            self._batches[batch_id] = {
+                "batch_id": batch_id,
+                "status": "queued",
+                "total": len(documents),
+                "completed": 0,
+                "results": []
+            }
+        await asyncio.to_thread(self._sweep_expired)
+        # Other worker processes answer status() for this batch from the manifest and result file
+        await asyncio.to_thread(self._write_manifest, batch_id, len(documents))
+        for filename, path in documents:
+            await self._queue.put((batch_id, filename, path))
+        return batch_id
+
+    async def status(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get progress and finished results for a batch, including batches
+        submitted to another worker process
+
+        Args:
+            batch_id: Identifier returned by submit()
+
+        Returns:
+            Batch status dict, or None if unknown
+        """
+        batch = self._batches.get(batch_id)
+        if batch is not None:
+            return batch
+        if not BATCH_ID_RE.fullmatch(batch_id):
+            return None
+        return await asyncio.to_thread(self._read_persisted, batch_id)
+
+    async def stop(self) -> None:
+        """Cancel the background workers and delete the uploads still waiting in the queue"""
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        paths = []
+        while self._queue is not None and not self._queue.empty():
+            paths.append(self._queue.get_nowait()[2])
+        for path in paths:
+            await asyncio.to_thread(_remove_quietly, path)
+
+    async def _worker(self) -> None:
+        while True:
+            batch_id, filename, path = await self._queue.get()
+            batch = self._batches[batch_id]
+            batch["status"] = "running"
+            try:
+                summary = await self.engine.summarize(path, filename)
+            except Exception as e:
+                logger.warning("%s failed: %s", filename, e)
+                summary = f"Failed to summarize document: {str(e)}"
+            finally:
+                self._queue.task_done()
+                await asyncio.to_thread(_remove_quietly, path)
+
+            result = {"filename": filename, "summary": summary}
+            await asyncio.to_thread(self._append_result, batch_id, result)
+            # No await between counting and the completion check, so exactly one worker sees it
+            batch["results"].append(result)
+            batch["completed"] += 1
+            if batch["completed"] == batch["total"]:
+                # Results are all on disk now; drop the in-memory copy and restart the TTL
+                del self._batches[batch_id]
+                await asyncio.to_thread(self._write_manifest, batch_id, batch["total"])
+                logger.info("Batch %s completed (%s documents)", batch_id, batch['total'])
+
+    def _results_path(self, batch_id: str) -> str:
+        return os.path.join(self.output_dir, f"{batch_id}.jsonl")
+
+    def _manifest_path(self, batch_id: str) -> str:
+        return os.path.join(self.output_dir, batch_id + MANIFEST_SUFFIX)
+
+    def _is_expired(self, batch_id: str) -> bool:
+        """True once neither file has been written within the TTL (each result append refreshes it)"""
+        updated = os.path.getmtime(self._manifest_path(batch_id))
+        try:
+            updated = max(updated, os.path.getmtime(self._results_path(batch_id)))
+        except OSError:
+            pass
+        return time.time() - updated > self.ttl_seconds
+
+    def _sweep_expired(self) -> None:
+        """Delete the files of batches not updated within the TTL (including other workers')"""
+        try:
+            names = os.listdir(self.output_dir)
+        except FileNotFoundError:
+            return
+        for name in names:
+            batch_id = name[:-len(MANIFEST_SUFFIX)]
+            if not name.endswith(MANIFEST_SUFFIX) or batch_id in self._batches:
+                continue
+            try:
+                expired = self._is_expired(batch_id)
+            except OSError:
+                continue
+            if expired:
+                _remove_quietly(self._results_path(batch_id))
+                _remove_quietly(self._manifest_path(batch_id))
+
+    def _write_manifest(self, batch_id: str, total: int) -> None:
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = self._manifest_path(batch_id)
+        with open(path + ".tmp", "wb") as f:
+            f.write(msgspec.json.encode({"batch_id": batch_id, "total": total}))
+        os.replace(path + ".tmp", path)
+
+    def _append_result(self, batch_id: str, result: Dict[str, Any]) -> None:
+        os.makedirs(self.output_dir, exist_ok=True)
+        with open(self._results_path(batch_id), "ab") as f:
+            f.write(msgspec.json.encode(result) + b"\n")
+
+    def _read_persisted(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        """Rebuild a batch's status from its manifest and result file"""
+        try:
+            if self._is_expired(batch_id):
+                return None
+            with open(self._manifest_path(batch_id), "rb") as f:
+                total = msgspec.json.decode(f.read())["total"]
+        except FileNotFoundError:
+            return None
+
+        try:
+            with open(self._results_path(batch_id), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            data = b""
+        # Skip a trailing line the owning worker is still writing
+        complete = data[:data.rfind(b"\n") + 1]
+        results = [msgspec.json.decode(line) for line in complete.splitlines() if line]
+
+        if len(results) >= total:
+            state = "completed"
+        else:
+            state = "running" if results else "queued"
+        return {
+            "batch_id": batch_id,
+            "status": state,
+            "total": total,
+            "completed": len(results),
+            "results": results
+        }
@@ -3,24 +3,76 @@ Advanced Text Processing Module for Legal Documents
 Implements 12-stage text cleaning pipeline, language detection, and multi-modal PDF extraction
 """
 
+import os
 import re
+import threading
 import unicodedata
-from typing import Tuple, Optional
+from typing import Tuple, Optional, Union
 import io
+from log_utils import get_logger
+
+logger = get_logger("TextProcessor")
+
+# clean_text / extract_metadata patterns, compiled once
+_CID_RE = re.compile(r'\(cid:\d+\)')
+_RUN_OF_SPACES_RE = re.compile(r'[^\S\n]{3,}')
+_HYPHENATION_RE = re.compile(r'(\w+)-\s*\n\s*(\w+)')
+_BROKEN_LINE_RE = re.compile(r'([^\.\!\?\n])\n([a-z])')
+_DEVANAGARI_RE = re.compile(r'[\u0900-\u097F]')
+_LATIN_RE = re.compile(r'[a-zA-Z]')
+_STRAY_LATIN_RE = re.compile(r'\b[a-zA-Z]{1,2}\b')
+# Section and Article markers in one pass; group 2 picks the tag
+_MARKER_RE = re.compile(r'\b((Section|Article)\s+\d+[A-Z]?)\b', re.IGNORECASE)
+_REPEATED_PHRASE_RE = re.compile(r'\b(\w+\s+\w+\s+\w+)\s+\1\b', re.IGNORECASE)
+_SPACES_RE = re.compile(r'[ \t]+')
+_BLANK_LINES_RE = re.compile(r'\n{3,}')
+_SECTION_NUMBER_RE = re.compile(r'(\d+)\s*\.\s*(\d+)')
+_ACRONYM_RE = re.compile(r'([A-Z]{2,})\s+([A-Z]{2,})')
+
+_YEAR_PATTERNS = (
+    re.compile(r'(\d{4})'),  # Simple 4-digit year
+    re.compile(r'Act[_\s]+(\d{4})'),  # "Act 2023"
+    re.compile(r'(\d{4})[_\s]+Act'),  # "2023 Act"
+)
+_ACT_NUMBER_RE = re.compile(r'Act\s+No\.?\s*(\d+)', re.IGNORECASE)
+# YYYY-MM-DD, DD/MM/YYYY or DD-MM-YYYY in a single scan
+_DATE_RE = re.compile(r'\d{4}-\d{2}-\d{2}|\d{2}/\d{2}/\d{4}|\d{2}-\d{2}-\d{4}')
+_SECTION_REF_RE = re.compile(r'Section\s+(\d+[A-Z]?)', re.IGNORECASE)
+
+
+def _marker_replacement(match: "re.Match") -> str:
+    tag = "[SEC]" if match.group(2).lower() == "section" else "[ART]"
+    return f"{tag} {match.group(1)}"
 
 class TextProcessor:
     """Handles advanced text extraction and cleaning for legal documents"""
     
     def __init__(self):
-        self.language_detector = None
-        try:
-            from lingua import Language, LanguageDetectorBuilder
-            self.language_detector = LanguageDetectorBuilder.from_languages(
-                Language.ENGLISH, Language.HINDI
-            ).build()
-            print("[TextProcessor] Language detector initialized (English/Hindi)")
-        except ImportError:
-            print("[TextProcessor] ⚠️ Lingua not installed. Language detection disabled.")
+        # Built on first use: the lingua models are only needed by /summarize
+        self._language_detector = None
+        self._language_detector_loaded = False
+        self._language_detector_lock = threading.Lock()
+
+    @property
+    def language_detector(self):
+        """Lazily built English/Hindi detector, or None if lingua is unavailable"""
+        if self._language_detector_loaded:
+            return self._language_detector
+
+        # Concurrent extractions run in worker threads; the second waits instead of
+        # seeing the flag set and getting None while the first is still building
+        with self._language_detector_lock:
+            if not self._language_detector_loaded:
+                try:
+                    from lingua import Language, LanguageDetectorBuilder
+                    self._language_detector = LanguageDetectorBuilder.from_languages(
+                        Language.ENGLISH, Language.HINDI
+                    ).build()
+                    logger.info("Language detector initialized (English/Hindi)")
+                except ImportError:
+                    logger.warning("Lingua not installed. Language detection disabled.")
+                self._language_detector_loaded = True
+        return self._language_detector
     
     def detect_language(self, text: str) -> str:
         """
@@ -48,34 +100,34 @@ class TextProcessor:
                 return 'hi'
             return 'en'
         except Exception as e:
-            print(f"[TextProcessor] Language detection error: {e}")
+            logger.warning("Language detection error: %s", e)
             return 'en'
     
-    def extract_text_from_pdf(self, file_content: bytes, filename: str, max_ocr_pages: int = 100) -> Tuple[str, str]:
+    def extract_text_from_pdf(self, file_content: Union[bytes, str], filename: str, max_ocr_pages: int = 100) -> Tuple[str, str]:
         """
         Advanced multi-modal PDF text extraction with automatic fallback
         
         Args:
-            file_content: PDF file bytes
+            file_content: PDF file bytes, or a path to the PDF on disk (opened by each backend directly)
             filename: Name of the file
             max_ocr_pages: Maximum pages to process with OCR (default: 100)
             
         Returns:
             Tuple of (extracted_text, extraction_method)
         """
-        try:
-            print(f"[TextProcessor] Processing PDF: {filename.encode('utf-8', 'replace').decode('utf-8')} ({len(file_content)} bytes)")
-        except Exception:
-            print(f"[TextProcessor] Processing PDF: (filename encoding error) ({len(file_content)} bytes)")
+        is_path = isinstance(file_content, str)
+        size = os.path.getsize(file_content) if is_path else len(file_content)
+        logger.info("Processing PDF: %s (%s bytes)", filename, size)
         
         # Try PyMuPDF first (fast, for digital PDFs)
         try:
             import fitz  # PyMuPDF
             full_text = ""
             
-            with fitz.open(stream=file_content, filetype="pdf") as pdf:
+            pdf_source = fitz.open(file_content, filetype="pdf") if is_path else fitz.open(stream=file_content, filetype="pdf")
+            with pdf_source as pdf:
                 total_pages = len(pdf)
-                print(f"[TextProcessor] PDF has {total_pages} pages. Trying native extraction...")
+                logger.info("PDF has %s pages. Trying native extraction...", total_pages)
                 
                 for page_num in range(total_pages):
                     page = pdf[page_num]
@@ -85,22 +137,22 @@ class TextProcessor:
                 
                 # Check if we got meaningful text (at least 100 chars)
                 if len(full_text.strip()) > 100:
-                    print(f"[TextProcessor] Native extraction successful ({len(full_text)} chars)")
+                    logger.info("Native extraction successful (%s chars)", len(full_text))
                     return full_text, "pymupdf"
                 else:
-                    print(f"[TextProcessor] Native extraction yielded insufficient text. Falling back to OCR...")
+                    logger.info("Native extraction yielded insufficient text. Falling back to OCR...")
         
         except Exception as e:
-            print(f"[TextProcessor] PyMuPDF failed: {e}. Trying fallback...")
+            logger.warning("PyMuPDF failed: %s. Trying fallback...", e)
         
         # Fallback to pdfplumber
         try:
             import pdfplumber
             full_text = ""
             
-            with pdfplumber.open(io.BytesIO(file_content)) as pdf:
+            with pdfplumber.open(file_content if is_path else io.BytesIO(file_content)) as pdf:
                 total_pages = len(pdf.pages)
-                print(f"[TextProcessor] Trying pdfplumber extraction...")
+                logger.info("Trying pdfplumber extraction...")
                 
                 for page in pdf.pages:
                     extracted = page.extract_text()
@@ -108,64 +160,65 @@ class TextProcessor:
                         full_text += extracted + "\n"
                 
                 if len(full_text.strip()) > 100:
-                    print(f"[TextProcessor] pdfplumber extraction successful ({len(full_text)} chars)")
+                    logger.info("pdfplumber extraction successful (%s chars)", len(full_text))
                     return full_text, "pdfplumber"
         
         except ImportError:
-             print("[TextProcessor] pdfplumber not installed. Skipping.")
+             logger.info("pdfplumber not installed. Skipping.")
         except Exception as e:
-            print(f"[TextProcessor] pdfplumber failed: {e}")
+            logger.warning("pdfplumber failed: %s", e)
 
         # Fallback to pypdf (Pure Python, very reliable)
         try:
             import pypdf
             full_text = ""
-            print(f"[TextProcessor] Trying pypdf extraction...")
+            logger.info("Trying pypdf extraction...")
             
-            pdf_reader = pypdf.PdfReader(io.BytesIO(file_content))
+            pdf_reader = pypdf.PdfReader(file_content if is_path else io.BytesIO(file_content))
             for page in pdf_reader.pages:
                 full_text += page.extract_text() + "\n"
             
             if len(full_text.strip()) > 50:
-                 print(f"[TextProcessor] pypdf extraction successful ({len(full_text)} chars)")
+                 logger.info("pypdf extraction successful (%s chars)", len(full_text))
                  return full_text, "pypdf"
         except ImportError:
-            print("[TextProcessor] pypdf not installed. Skipping.")
+            logger.info("pypdf not installed. Skipping.")
         except Exception as e:
-             print(f"[TextProcessor] pypdf extraction failed: {e}")
+             logger.warning("pypdf extraction failed: %s", e)
 
 
         # Last resort: OCR with Pytesseract
         try:
             import pytesseract
-            from pdf2image import convert_from_bytes
+            from pdf2image import convert_from_bytes, convert_from_path
             
-            print(f"[TextProcessor] Attempting OCR extraction (max {max_ocr_pages} pages)...")
+            logger.info("Attempting OCR extraction (max %s pages)...", max_ocr_pages)
             
             # Convert PDF to images (limit pages for performance)
             try:
-                images = convert_from_bytes(file_content, dpi=300, first_page=1, last_page=max_ocr_pages)
+                convert = convert_from_path if is_path else convert_from_bytes
+                images = convert(file_content, dpi=300, first_page=1, last_page=max_ocr_pages)
             except Exception as poppler_error:
-                print(f"[TextProcessor] ⚠️ OCR Failed: {poppler_error}. Is Poppler installed and in PATH?")
+                logger.warning("OCR Failed: %s. Is Poppler installed and in PATH?", poppler_error)
                 return f"Error: Could not process PDF. Please install Poppler or ensure the PDF is text-readable.", "failed"
 
             full_text = ""
             for i, image in enumerate(images):
-                print(f"[TextProcessor] OCR processing page {i+1}/{len(images)}...")
+                logger.debug("OCR processing page %s/%s...", i+1, len(images))
                 text = pytesseract.image_to_string(image, lang='eng+hin')
                 full_text += text + "\n"
             
             if len(full_text.strip()) > 50:
-                print(f"[TextProcessor] OCR extraction successful ({len(full_text)} chars)")
+                logger.info("OCR extraction successful (%s chars)", len(full_text))
                 return full_text, "ocr"
             else:
                 return "Error: OCR extraction yielded no meaningful text.", "failed"
         
         except ImportError:
-            print("[TextProcessor] ⚠️ OCR dependencies not installed (pytesseract/pdf2image)")
+            logger.warning("OCR dependencies not installed (pytesseract/pdf2image)")
             return "Error: OCR not available. Install pytesseract and pdf2image.", "failed"
         except Exception as e:
-            print(f"[TextProcessor] OCR failed: {e}")
+            logger.warning("OCR failed: %s", e)
             return f"Error: All extraction methods failed. {str(e)}", "failed"
     
     def clean_text(self, text: str) -> str:
@@ -193,28 +246,33 @@ class TextProcessor:
         text = unicodedata.normalize('NFC', text)
         
         # Stage 2: PDF artifact removal
-        text = re.sub(r'\(cid:\d+\)', '', text)  # Remove (cid:NN) patterns
-        text = re.sub(r'[^\S\n]{3,}', ' ', text)  # Remove excessive spaces (preserve newlines)
+        text = _CID_RE.sub('', text)  # Remove (cid:NN) patterns
+        text = _RUN_OF_SPACES_RE.sub(' ', text)  # Remove excessive spaces (preserve newlines)
         
         # Stage 3: Hyphenation repair (rejoin words split across lines)
-        text = re.sub(r'(\w+)-\s*\n\s*(\w+)', r'\1\2', text)
+        text = _HYPHENATION_RE.sub(r'\1\2', text)
         
         # Stage 4: Sentence reconstruction across line breaks
         # Join lines that don't end with sentence terminators
-        text = re.sub(r'([^\.\!\?\n])\n([a-z])', r'\1 \2', text)
+        text = _BROKEN_LINE_RE.sub(r'\1 \2', text)
         
         # Stage 5: Devanagari-Latin script isolation
         # Remove mixed-script artifacts (e.g., stray Latin chars in Hindi text)
         lines = text.split('\n')
         cleaned_lines = []
         for line in lines:
+            # Lines without Devanagari (most of an English document) need no counting
+            if not _DEVANAGARI_RE.search(line):
+                cleaned_lines.append(line)
+                continue
+
             # Check if line is predominantly Devanagari
-            devanagari_chars = len(re.findall(r'[\u0900-\u097F]', line))
-            latin_chars = len(re.findall(r'[a-zA-Z]', line))
+            devanagari_chars = len(_DEVANAGARI_RE.findall(line))
+            latin_chars = len(_LATIN_RE.findall(line))
             
             # If predominantly Devanagari, remove isolated Latin chars
             if devanagari_chars > latin_chars * 2:
-                line = re.sub(r'\b[a-zA-Z]{1,2}\b', '', line)
+                line = _STRAY_LATIN_RE.sub('', line)
             
             cleaned_lines.append(line)
         text = '\n'.join(cleaned_lines)
@@ -235,16 +293,15 @@ class TextProcessor:
         
         # Stage 7: Section marker injection
         # Add [SEC_N] markers for hierarchical structure
-        text = re.sub(r'\b(Section\s+\d+[A-Z]?)\b', r'[SEC] \1', text, flags=re.IGNORECASE)
-        text = re.sub(r'\b(Article\s+\d+[A-Z]?)\b', r'[ART] \1', text, flags=re.IGNORECASE)
+        text = _MARKER_RE.sub(_marker_replacement, text)
         
         # Stage 8: Phrase deduplication (remove OCR repetition errors)
         # Remove consecutive duplicate phrases (3+ words)
-        text = re.sub(r'\b(\w+\s+\w+\s+\w+)\s+\1\b', r'\1', text, flags=re.IGNORECASE)
+        text = _REPEATED_PHRASE_RE.sub(r'\1', text)
         
         # Stage 9: Whitespace normalization
-        text = re.sub(r'[ \t]+', ' ', text)  # Multiple spaces to single
-        text = re.sub(r'\n{3,}', '\n\n', text)  # Multiple newlines to double
+        text = _SPACES_RE.sub(' ', text)  # Multiple spaces to single
+        text = _BLANK_LINES_RE.sub('\n\n', text)  # Multiple newlines to double
         
         # Stage 10: Special character cleanup
         # Remove control characters except newlines and tabs
@@ -252,8 +309,8 @@ class TextProcessor:
         
         # Stage 11: Legal formatting preservation
         # Ensure proper spacing around legal markers
-        text = re.sub(r'(\d+)\s*\.\s*(\d+)', r'\1.\2', text)  # Fix section numbering
-        text = re.sub(r'([A-Z]{2,})\s+([A-Z]{2,})', r'\1 \2', text)  # Preserve acronyms
+        text = _SECTION_NUMBER_RE.sub(r'\1.\2', text)  # Fix section numbering
+        text = _ACRONYM_RE.sub(r'\1 \2', text)  # Preserve acronyms
         
         # Stage 12: Final trimming
         text = text.strip()
@@ -282,13 +339,8 @@ class TextProcessor:
         }
         
         # Extract act year from filename (multiple patterns)
-        year_patterns = [
-            r'(\d{4})',  # Simple 4-digit year
-            r'Act[_\s]+(\d{4})',  # "Act 2023"
-            r'(\d{4})[_\s]+Act',  # "2023 Act"
-        ]
-        for pattern in year_patterns:
-            match = re.search(pattern, filename)
+        for pattern in _YEAR_PATTERNS:
+            match = pattern.search(filename)
             if match:
                 year = int(match.group(1))
                 if 1800 <= year <= 2100:  # Sanity check
@@ -296,7 +348,7 @@ class TextProcessor:
                     break
         
         # Extract act number from content
-        act_num_match = re.search(r'Act\s+No\.?\s*(\d+)', text, re.IGNORECASE)
+        act_num_match = _ACT_NUMBER_RE.search(text)
         if act_num_match:
             metadata["act_number"] = act_num_match.group(1)
         
@@ -312,18 +364,11 @@ class TextProcessor:
         metadata["keywords"] = found_keywords[:10]  # Limit to 10
         
         # Extract dates (YYYY-MM-DD or DD/MM/YYYY or DD-MM-YYYY)
-        date_patterns = [
-            r'\d{4}-\d{2}-\d{2}',
-            r'\d{2}/\d{2}/\d{4}',
-            r'\d{2}-\d{2}-\d{4}'
-        ]
-        dates = []
-        for pattern in date_patterns:
-            dates.extend(re.findall(pattern, text))
-        metadata["dates"] = list(set(dates))[:5]  # Unique, limit to 5
+        dates = _DATE_RE.findall(text)
+        metadata["dates"] = list(dict.fromkeys(dates))[:5]  # Unique in document order, limit to 5
         
         # Extract section references
-        sections = re.findall(r'Section\s+(\d+[A-Z]?)', text, re.IGNORECASE)
-        metadata["sections"] = list(set(sections))[:20]  # Unique, limit to 20
+        sections = _SECTION_REF_RE.findall(text)
+        metadata["sections"] = list(dict.fromkeys(sections))[:20]  # Unique in document order, limit to 20
         
         return metadata
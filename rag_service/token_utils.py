@@ -0,0 +1,117 @@
+"""
+Token Counting Utilities
+Counts and truncates text in model tokens, using a real tokenizer when available
+and a UTF-8 byte-length estimate otherwise (which stays sane for Devanagari)
+"""
+
+import os
+import threading
+from typing import List
+from log_utils import get_logger
+
+logger = get_logger("TokenUtils")
+
+# Approximate: 1 token ≈ 4 bytes of UTF-8 (≈ 4 chars for English, ≈ 1.3 chars for Hindi)
+BYTES_PER_TOKEN = 4
+
+# Ungated mirror with the Llama 3 tokenizer (shared by the Llama 3.x models served on Groq).
+# TOKENIZER_MODEL may also be a local tokenizer.json path, which loads without network access.
+DEFAULT_TOKENIZER_MODEL = "NousResearch/Meta-Llama-3-8B"
+
+_tokenizer = None
+_tokenizer_loaded = False
+_tokenizer_lock = threading.Lock()
+
+
+def get_tokenizer():
+    """Load the tokenizer once; returns None if it is unavailable."""
+    global _tokenizer, _tokenizer_loaded
+    if _tokenizer_loaded:
+        return _tokenizer
+
+    # Startup warmup loads this in a worker thread while requests may already need it;
+    # they wait for the one load rather than starting another or falling back to estimates
+    with _tokenizer_lock:
+        if _tokenizer_loaded:
+            return _tokenizer
+
+        model_name = os.getenv("TOKENIZER_MODEL", DEFAULT_TOKENIZER_MODEL)
+        try:
+            from tokenizers import Tokenizer
+            if os.path.isfile(model_name):
+                _tokenizer = Tokenizer.from_file(model_name)
+            else:
+                _tokenizer = Tokenizer.from_pretrained(model_name)
+            logger.info("Tokenizer loaded: %s", model_name)
+        except Exception as e:
+            logger.warning("Tokenizer unavailable (%s). Using byte-length estimate.", e)
+            _tokenizer = None
+        _tokenizer_loaded = True
+    return _tokenizer
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count tokens in text
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Token count (exact with a tokenizer, estimated otherwise)
+    """
+    tokenizer = get_tokenizer()
+    if tokenizer is not None:
+        return len(tokenizer.encode(text, add_special_tokens=False).ids)
+    return len(text.encode("utf-8")) // BYTES_PER_TOKEN
+
+
+def count_tokens_batch(texts: List[str]) -> List[int]:
+    """
+    Count tokens for many texts at once
+
+    Args:
+        texts: Texts to measure
+
+    Returns:
+        Token count per text, in order
+    """
+    if not texts:
+        return []
+    tokenizer = get_tokenizer()
+    if tokenizer is not None:
+        # encode_batch fans out across threads in the Rust backend
+        encodings = tokenizer.encode_batch(texts, add_special_tokens=False)
+        return [len(encoding.ids) for encoding in encodings]
+    return [len(text.encode("utf-8")) // BYTES_PER_TOKEN for text in texts]
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """
+    Truncate text to at most max_tokens tokens
+
+    Args:
+        text: Text to truncate
+        max_tokens: Token budget
+
+    Returns:
+        Text that fits the budget
+    """
+    if max_tokens <= 0:
+        return ""
+
+    tokenizer = get_tokenizer()
+    if tokenizer is not None:
+        ids = tokenizer.encode(text, add_special_tokens=False).ids
+        if len(ids) <= max_tokens:
+            return text
+        return tokenizer.decode(ids[:max_tokens])
+
+    estimated = len(text.encode("utf-8")) // BYTES_PER_TOKEN
+    if estimated <= max_tokens:
+        return text
+    cut = len(text) * max_tokens // max(estimated, 1)
+    truncated = text[:cut]
+    # Avoid ending mid-word
+    last_space = truncated.rfind(" ")
+    return truncated[:last_space] if last_space > 0 else truncated
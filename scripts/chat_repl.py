@@ -0,0 +1,50 @@
+"""
+Interactive RAG Chat REPL
+Keeps one event loop and one warmed RAGEngine alive across turns, so follow-up
+questions skip model loading, DB connection and connection setup.
+"""
+
+import sys
+import os
+import asyncio
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'rag_service'))
+
+from dotenv import load_dotenv
+from rag_engine import RAGEngine
+
+
+def main():
+    load_dotenv()
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    print("Initializing RAG Engine...")
+    engine = RAGEngine()
+    engine.warmup()
+    session_id = engine.conversation_memory.create_session()
+
+    print("\nLegalAi chat. Type 'exit' to quit.\n")
+    try:
+        while True:
+            try:
+                query = input("You: ").strip()
+            except (EOFError, KeyboardInterrupt):
+                break
+            if not query:
+                continue
+            if query.lower() in ("exit", "quit"):
+                break
+
+            result = loop.run_until_complete(engine.query(query, session_id=session_id))
+            print(f"\nLegalAi: {result.get('answer', '')}\n")
+            for citation in result.get("citations", []):
+                print(f"  - {citation.get('source')} {citation.get('section') or ''}")
+    finally:
+        loop.close()
+
+
+if __name__ == "__main__":
+    main()
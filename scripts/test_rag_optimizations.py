@@ -39,8 +39,10 @@ async def test_rag_optimizations():
     
     # Test vector DB connection
     print("\n3. Testing Vector Database Connection...")
-    if engine.collection:
-        count = engine.collection.count()
+    # The collection is opened lazily on first use
+    collection = engine._get_collection()
+    if collection:
+        count = collection.count()
         print(f"   ✅ Connected to ChromaDB: {count} documents")
     else:
         print("   ❌ Vector DB not connected")
@@ -61,7 +63,7 @@ async def test_rag_optimizations():
     # Test vector search optimization
     print("\n5. Testing Vector Search (n_results=5)...")
     try:
-        results = engine.collection.query(
+        results = collection.query(
             query_texts=["What is IT Act?"],
             n_results=5
         )